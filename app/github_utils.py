@@ -1,6 +1,10 @@
 # app/github_utils.py
 import os
-from github import Github, Auth
+import base64
+import hashlib
+import threading
+import time
+from github import Github, Auth, InputGitTreeElement
 from github import GithubException
 import httpx
 from dotenv import load_dotenv
@@ -11,85 +15,126 @@ load_dotenv()
 GITHUB_TOKEN = os.getenv("GITHUB_TOKEN")
 USERNAME = os.getenv("GITHUB_USERNAME")
 
+# Repo objects and the last known branch head/tree, reused between jobs
+REPO_CACHE_TTL_SECONDS = float(os.getenv("REPO_CACHE_TTL_SECONDS", "900"))
+
 # Use the new authentication method
 auth = Auth.Token(GITHUB_TOKEN)
 g = Github(auth=auth)
 
+# repo name -> {"repo", "head_sha", "blobs" (path -> blob SHA), "at"}
+_repo_cache = {}
+_repo_cache_lock = threading.Lock()
+
+def _cached(repo_name: str):
+    with _repo_cache_lock:
+        entry = _repo_cache.get(repo_name)
+        if entry and time.monotonic() - entry["at"] > REPO_CACHE_TTL_SECONDS:
+            del _repo_cache[repo_name]
+            entry = None
+        return entry
+
+def _remember(repo, head_sha=None, blobs=None):
+    with _repo_cache_lock:
+        _repo_cache[repo.name] = {"repo": repo, "head_sha": head_sha, "blobs": blobs, "at": time.monotonic()}
+
 def create_repo(repo_name: str, description: str = ""):
     """
     Create a public repository with the given name.
     """
+    entry = _cached(repo_name)
+    if entry:
+        return entry["repo"]
     user = g.get_user()
     # if repo exists, return it
     try:
         repo = user.get_repo(repo_name)
         print("Repo already exists:", repo.full_name)
-        return repo
     except GithubException:
-        pass
-
-    repo = user.create_repo(
-        name=repo_name,
-        description=description,
-        private=False,
-        auto_init=False
-    )
-    print("Created repo:", repo.full_name)
+        repo = user.create_repo(
+            name=repo_name,
+            description=description,
+            private=False,
+            # Start with an initial commit so the Git Data API can be used right away
+            auto_init=True
+        )
+        print("Created repo:", repo.full_name)
+    _remember(repo)
     return repo
 
-def create_or_update_file(repo, path: str, content: str, message: str):
+def git_blob_sha(content) -> str:
     """
-    Create a file or update if it already exists.
+    SHA git would give this content as a blob, computed locally.
     """
+    if isinstance(content, str):
+        content = content.encode("utf-8")
+    return hashlib.sha1(b"blob %d\0" % len(content) + content).hexdigest()
+
+def publish_files(repo, files: dict, message: str, branch: str = None):
+    """
+    Commit a batch of files in one go using the Git Data API.
+    files maps path -> str (text) or bytes (binary content).
+    Text goes inline in the tree, binary files become blobs; then one tree,
+    one commit and a single ref update. Files whose content already matches
+    the branch (same blob SHA) are skipped; if nothing changed no commit is
+    made. Returns the resulting head commit SHA.
+    """
+    branch = branch or repo.default_branch or "main"
+    pending = dict(files)
+    if not pending:
+        return None
+
     try:
-        # Try to get file to see if exists
-        current = repo.get_contents(path)
-        sha = current.sha
-        repo.update_file(path, message, content, sha)
-        print(f"Updated {path} in {repo.full_name}")
+        ref = repo.get_git_ref(f"heads/{branch}")
     except GithubException as e:
-        # If 404 (not found) then create
-        if e.status == 404:
-            repo.create_file(path, message, content)
-            print(f"Created {path} in {repo.full_name}")
-        else:
-            # some other error
+        # 409 = empty repository, 404 = branch missing
+        if e.status not in (404, 409):
             raise
+        # The Git Data API needs an existing commit, so seed the branch
+        # with one file through the Contents API first.
+        path, content = next(iter(pending.items()))
+        result = repo.create_file(path, message, content, branch=branch)
+        del pending[path]
+        print(f"Seeded {branch} with {path} in {repo.full_name}")
+        if not pending:
+            return result["commit"].sha
+        ref = repo.get_git_ref(f"heads/{branch}")
 
+    parent = repo.get_git_commit(ref.object.sha)
 
-def create_or_update_binary_file(repo, path: str, binary_content, commit_message: str):
-    """
-    Create or update a binary file in the repository.
-    This function handles binary data like images directly without encoding/decoding.
-    """
-    try:
-        # Try to get file to see if exists
-        try:
-            current = repo.get_contents(path)
-            # Update existing file
-            repo.update_file(
-                path=path,
-                message=commit_message,
-                content=binary_content,
-                sha=current.sha
-            )
-            print(f"Updated binary file {path} in {repo.full_name}")
-        except GithubException as e:
-            # If file doesn't exist, create it
-            if e.status == 404:
-                repo.create_file(
-                    path=path,
-                    message=commit_message,
-                    content=binary_content
-                )
-                print(f"Created binary file {path} in {repo.full_name}")
-            else:
-                # some other error
-                raise
-        return True
-    except Exception as e:
-        print(f"Error creating/updating binary file {path}: {e}")
-        return False
+    # Diff against the current tree so unchanged files are not rewritten;
+    # the cached tree is reused when it belongs to this very commit
+    entry = _cached(repo.name)
+    if entry and entry["blobs"] is not None and entry["head_sha"] == parent.sha:
+        existing = entry["blobs"]
+    else:
+        existing = {e.path: e.sha for e in repo.get_git_tree(parent.tree.sha, recursive=True).tree if e.type == "blob"}
+    unchanged = [p for p, c in pending.items() if existing.get(p) == git_blob_sha(c)]
+    for path in unchanged:
+        del pending[path]
+    if unchanged:
+        print(f"Skipping {len(unchanged)} unchanged files: {', '.join(unchanged)}")
+    if not pending:
+        print(f"No changes to commit in {repo.full_name}@{branch}")
+        return parent.sha
+
+    elements = []
+    blobs = dict(existing)
+    for path, content in pending.items():
+        if isinstance(content, bytes):
+            blob = repo.create_git_blob(base64.b64encode(content).decode("ascii"), "base64")
+            elements.append(InputGitTreeElement(path, "100644", "blob", sha=blob.sha))
+            blobs[path] = blob.sha
+        else:
+            elements.append(InputGitTreeElement(path, "100644", "blob", content=content))
+            blobs[path] = git_blob_sha(content)
+
+    tree = repo.create_git_tree(elements, base_tree=parent.tree)
+    commit = repo.create_git_commit(message, tree, [parent])
+    ref.edit(commit.sha)
+    _remember(repo, commit.sha, blobs)
+    print(f"Committed {len(pending)} files to {repo.full_name}@{branch} ({commit.sha[:7]})")
+    return commit.sha
 
 def enable_pages(repo_name: str, branch: str = "main"):
     """
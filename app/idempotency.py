@@ -0,0 +1,105 @@
+# app/idempotency.py
+import os
+import json
+import time
+import sqlite3
+import threading
+from dotenv import load_dotenv
+
+load_dotenv()
+
+STORE_PATH = os.getenv("IDEMPOTENCY_PATH", "/tmp/processed_requests.db")
+LEGACY_JSON_PATH = "/tmp/processed_requests.json"
+TTL_SECONDS = int(os.getenv("IDEMPOTENCY_TTL_SECONDS", str(30 * 24 * 3600)))
+PRUNE_EVERY_SECONDS = 3600
+
+class IdempotencyStore:
+    """
+    Processed-request store keyed by email::task::round::nonce.
+
+    SQLite in WAL mode with the key as primary key: lookups are an index
+    probe, writers from several workers don't clobber each other, and
+    entries older than TTL_SECONDS are pruned periodically.
+    """
+
+    def __init__(self, path: str = STORE_PATH, ttl: int = TTL_SECONDS):
+        self.path = path
+        self.ttl = ttl
+        self._local = threading.local()
+        self._last_prune = 0.0
+        conn = self._conn()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS processed (
+                key TEXT PRIMARY KEY,
+                payload TEXT NOT NULL,
+                created_at REAL NOT NULL
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS ix_processed_created_at ON processed (created_at)")
+        self._import_legacy_json()
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _import_legacy_json(self):
+        """One-time import of the old processed_requests.json file."""
+        if not os.path.exists(LEGACY_JSON_PATH):
+            return
+        try:
+            with open(LEGACY_JSON_PATH) as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return
+        now = time.time()
+        self._conn().executemany(
+            "INSERT OR IGNORE INTO processed (key, payload, created_at) VALUES (?, ?, ?)",
+            [(k, json.dumps(v), now) for k, v in data.items()],
+        )
+        os.replace(LEGACY_JSON_PATH, LEGACY_JSON_PATH + ".imported")
+        print(f"📦 Imported {len(data)} processed requests from {LEGACY_JSON_PATH}")
+
+    def get(self, key: str):
+        row = self._conn().execute(
+            "SELECT payload, created_at FROM processed WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None or time.time() - row[1] > self.ttl:
+            return None
+        return json.loads(row[0])
+
+    def insert_or_get(self, key: str, payload: dict):
+        """
+        Store payload under key unless it already exists.
+        Returns (stored_payload, inserted).
+        """
+        now = time.time()
+        # Expired entries count as absent and get overwritten
+        cur = self._conn().execute(
+            "INSERT INTO processed (key, payload, created_at) VALUES (?, ?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET payload = excluded.payload, created_at = excluded.created_at "
+            "WHERE processed.created_at < ?",
+            (key, json.dumps(payload), now, now - self.ttl),
+        )
+        self._maybe_prune()
+        if cur.rowcount == 1:
+            return payload, True
+        return self.get(key) or payload, False
+
+    def prune(self) -> int:
+        cur = self._conn().execute(
+            "DELETE FROM processed WHERE created_at < ?", (time.time() - self.ttl,)
+        )
+        return cur.rowcount
+
+    def _maybe_prune(self):
+        now = time.time()
+        if now - self._last_prune > PRUNE_EVERY_SECONDS:
+            self._last_prune = now
+            removed = self.prune()
+            if removed:
+                print(f"🧹 Pruned {removed} expired processed requests")
@@ -0,0 +1,268 @@
+# app/job_queue.py
+import os
+import json
+import time
+import socket
+import sqlite3
+import threading
+from contextlib import contextmanager
+import httpx
+import requests
+from dotenv import load_dotenv
+from github import GithubException
+from google.api_core import exceptions as google_exceptions
+
+load_dotenv()
+
+QUEUE_PATH = os.getenv("JOB_QUEUE_PATH", "/tmp/app_jobs.db")
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+JOB_LEASE_SECONDS = int(os.getenv("JOB_LEASE_SECONDS", "300"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+# Failed attempts wait base * 2^(attempt - 1) seconds, capped, before a retry
+JOB_RETRY_BASE_SECONDS = float(os.getenv("JOB_RETRY_BASE_SECONDS", "10"))
+JOB_RETRY_MAX_SECONDS = float(os.getenv("JOB_RETRY_MAX_SECONDS", "600"))
+# Finished (done/failed) jobs are deleted after this long
+JOB_RETENTION_SECONDS = int(os.getenv("JOB_RETENTION_SECONDS", str(7 * 24 * 3600)))
+PRUNE_INTERVAL_SECONDS = 3600
+
+# Transient failures worth another attempt; anything else fails the job at once
+RETRYABLE_ERRORS = (
+    httpx.TransportError,
+    requests.ConnectionError,
+    requests.Timeout,
+    google_exceptions.ResourceExhausted,
+    google_exceptions.TooManyRequests,
+    google_exceptions.ServiceUnavailable,
+    google_exceptions.InternalServerError,
+    google_exceptions.DeadlineExceeded,
+    TimeoutError,
+)
+
+# Per-stage concurrency limits shared by all workers
+_stage_semaphores = {
+    "llm": threading.BoundedSemaphore(int(os.getenv("LLM_CONCURRENCY", "2"))),
+    "github": threading.BoundedSemaphore(int(os.getenv("GITHUB_CONCURRENCY", "4"))),
+    "notify": threading.BoundedSemaphore(int(os.getenv("NOTIFY_CONCURRENCY", "8"))),
+}
+
+@contextmanager
+def stage(name: str):
+    """
+    Hold one slot of the named stage ("llm", "github", "notify") while running.
+    """
+    sem = _stage_semaphores[name]
+    with sem:
+        yield
+
+def _connect():
+    conn = sqlite3.connect(QUEUE_PATH, timeout=30, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    return conn
+
+def init_queue():
+    conn = _connect()
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS jobs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            dedupe_key TEXT UNIQUE,
+            payload TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'queued',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            lease_owner TEXT,
+            lease_expires REAL,
+            last_error TEXT,
+            created_at REAL NOT NULL,
+            not_before REAL,
+            finished_at REAL
+        )
+    """)
+    # Queues created before retry backoff and pruning lack these columns
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(jobs)")}
+    for column in ("not_before", "finished_at"):
+        if column not in columns:
+            conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} REAL")
+    conn.execute("CREATE INDEX IF NOT EXISTS ix_jobs_status ON jobs (status, lease_expires)")
+    conn.close()
+
+def is_retryable(error: Exception) -> bool:
+    """
+    Network failures, rate limits and server errors: worth another attempt.
+    """
+    if isinstance(error, RETRYABLE_ERRORS):
+        return True
+    if isinstance(error, GithubException):
+        status = error.status or 0
+        return status >= 500 or status == 429 or (status == 403 and "rate limit" in str(error.data).lower())
+    return False
+
+def retry_delay(attempts: int) -> float:
+    """
+    Backoff before the next try of a job that has failed `attempts` times.
+    """
+    return min(JOB_RETRY_BASE_SECONDS * 2 ** (attempts - 1), JOB_RETRY_MAX_SECONDS)
+
+def enqueue(payload: dict, dedupe_key: str = None) -> bool:
+    """
+    Persist a job. Returns False if a job with the same dedupe_key is already queued.
+    """
+    conn = _connect()
+    try:
+        cur = conn.execute(
+            "INSERT OR IGNORE INTO jobs (dedupe_key, payload, created_at) VALUES (?, ?, ?)",
+            (dedupe_key, json.dumps(payload), time.time()),
+        )
+        if cur.rowcount == 0 and dedupe_key:
+            # A failed job may be resubmitted
+            cur = conn.execute(
+                "UPDATE jobs SET status = 'queued', attempts = 0, payload = ?, last_error = NULL, "
+                "not_before = NULL, finished_at = NULL WHERE dedupe_key = ? AND status = 'failed'",
+                (json.dumps(payload), dedupe_key),
+            )
+        return cur.rowcount == 1
+    finally:
+        conn.close()
+
+def _claim(conn, owner: str):
+    """
+    Lease the oldest queued job (or one whose lease ran out). Returns (id, payload) or None.
+    """
+    now = time.time()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        row = conn.execute(
+            "SELECT id, attempts FROM jobs "
+            "WHERE (status = 'queued' AND (not_before IS NULL OR not_before <= ?)) "
+            "OR (status = 'running' AND lease_expires < ?) "
+            "ORDER BY id LIMIT 1",
+            (now, now),
+        ).fetchone()
+        if row is None:
+            conn.execute("COMMIT")
+            return None
+        job_id, attempts = row
+        if attempts >= JOB_MAX_ATTEMPTS:
+            conn.execute(
+                "UPDATE jobs SET status = 'failed', last_error = COALESCE(last_error, 'Lease expired too many times'), "
+                "finished_at = ? WHERE id = ?",
+                (now, job_id),
+            )
+            conn.execute("COMMIT")
+            print(f"❌ Job {job_id} gave up after {attempts} attempts")
+            return _claim(conn, owner)
+        conn.execute(
+            "UPDATE jobs SET status = 'running', lease_owner = ?, lease_expires = ?, attempts = attempts + 1 WHERE id = ?",
+            (owner, now + JOB_LEASE_SECONDS, job_id),
+        )
+        payload = conn.execute("SELECT payload FROM jobs WHERE id = ?", (job_id,)).fetchone()[0]
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    if attempts > 0:
+        print(f"♻ Recovered job {job_id} (attempt {attempts + 1})")
+    return job_id, json.loads(payload)
+
+def _finish(conn, job_id: int, owner: str, error: str = None, retry: bool = False):
+    now = time.time()
+    row = conn.execute("SELECT attempts FROM jobs WHERE id = ? AND lease_owner = ?", (job_id, owner)).fetchone()
+    if row is None:
+        return
+    if error and retry and row[0] < JOB_MAX_ATTEMPTS:
+        # Put it back for another worker once the backoff has passed
+        delay = retry_delay(row[0])
+        conn.execute(
+            "UPDATE jobs SET status = 'queued', lease_owner = NULL, lease_expires = NULL, "
+            "not_before = ?, last_error = ? WHERE id = ? AND lease_owner = ?",
+            (now + delay, error, job_id, owner),
+        )
+        print(f"⏳ Job {job_id} will be retried in {delay:g}s")
+    else:
+        conn.execute(
+            "UPDATE jobs SET status = ?, last_error = ?, finished_at = ? WHERE id = ? AND lease_owner = ?",
+            ("failed" if error else "done", error, now, job_id, owner),
+        )
+
+def prune(conn) -> int:
+    """
+    Delete done and failed jobs that finished more than JOB_RETENTION_SECONDS ago.
+    """
+    cur = conn.execute(
+        "DELETE FROM jobs WHERE status IN ('done', 'failed') AND finished_at < ?",
+        (time.time() - JOB_RETENTION_SECONDS,),
+    )
+    if cur.rowcount:
+        print(f"🧹 Pruned {cur.rowcount} finished jobs")
+    return cur.rowcount
+
+class WorkerPool:
+    """
+    Fixed number of threads draining the sidecar SQLite queue.
+    A running job holds a lease that its worker renews; if the process dies
+    the lease expires and the job is picked up again after restart. Jobs
+    failing with a retryable error are requeued with exponential backoff.
+    """
+
+    def __init__(self, handler, workers: int = JOB_WORKERS, retryable=is_retryable):
+        self.handler = handler
+        self.workers = workers
+        self.retryable = retryable
+        self.owner_prefix = f"{socket.gethostname()}:{os.getpid()}"
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._threads = []
+        self._pruned_at = 0.0
+        self._prune_lock = threading.Lock()
+
+    def start(self):
+        init_queue()
+        for n in range(self.workers):
+            t = threading.Thread(target=self._run, args=(f"{self.owner_prefix}:{n}",), daemon=True)
+            t.start()
+            self._threads.append(t)
+        print(f"👷 Started {self.workers} job workers")
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+    def wake(self):
+        self._wake.set()
+
+    def _run(self, owner: str):
+        conn = _connect()
+        while not self._stop.is_set():
+            job = _claim(conn, owner)
+            if job is None:
+                self._maybe_prune(conn)
+                self._wake.wait(timeout=1.0)
+                self._wake.clear()
+                continue
+
+            job_id, payload = job
+            done = threading.Event()
+            threading.Thread(target=self._heartbeat, args=(job_id, owner, done), daemon=True).start()
+            try:
+                self.handler(payload)
+                _finish(conn, job_id, owner)
+            except Exception as e:
+                print(f"❌ Job {job_id} failed: {e}")
+                _finish(conn, job_id, owner, str(e), retry=self.retryable(e))
+            finally:
+                done.set()
+        conn.close()
+
+    def _maybe_prune(self, conn):
+        with self._prune_lock:
+            if time.monotonic() - self._pruned_at < PRUNE_INTERVAL_SECONDS:
+                return
+            self._pruned_at = time.monotonic()
+        prune(conn)
+
+    def _heartbeat(self, job_id: int, owner: str, done: threading.Event):
+        conn = _connect()
+        while not done.wait(timeout=max(1, JOB_LEASE_SECONDS // 3)):
+            conn.execute(
+                "UPDATE jobs SET lease_expires = ? WHERE id = ? AND lease_owner = ?",
+                (time.time() + JOB_LEASE_SECONDS, job_id, owner),
+            )
+        conn.close()
@@ -1,10 +1,10 @@
 import os
-import base64
 import mimetypes
-from pathlib import Path
+from itertools import islice
 from datetime import datetime
 from dotenv import load_dotenv
 import google.generativeai as genai
+from app.attachments import decode_attachments
 
 load_dotenv()
 
@@ -19,38 +19,6 @@ else:
     model = None
     print("⚠️  No Gemini API key configured - will use fallback mode")
 
-TMP_DIR = Path("/tmp/llm_attachments")
-TMP_DIR.mkdir(parents=True, exist_ok=True)
-
-def decode_attachments(attachments):
-    """
-    attachments: list of {name, url: data:<mime>;base64,<b64>}
-    Saves files into /tmp/llm_attachments/<name>
-    Returns list of dicts: {"name": name, "path": "/tmp/..", "mime": mime, "size": n}
-    """
-    saved = []
-    for att in attachments or []:
-        name = att.get("name") or "attachment"
-        url = att.get("url", "")
-        if not url.startswith("data:"):
-            continue
-        try:
-            header, b64data = url.split(",", 1)
-            mime = header.split(";")[0].replace("data:", "")
-            data = base64.b64decode(b64data)
-            path = TMP_DIR / name
-            with open(path, "wb") as f:
-                f.write(data)
-            saved.append({
-                "name": name,
-                "path": str(path),
-                "mime": mime,
-                "size": len(data)
-            })
-        except Exception as e:
-            print("Failed to decode attachment", name, e)
-    return saved
-
 def summarize_attachment_meta(saved):
     """
     saved is list from decode_attachments.
@@ -65,7 +33,8 @@ def summarize_attachment_meta(saved):
             if mime.startswith("text") or nm.endswith((".md", ".txt", ".json", ".csv")):
                 with open(p, "r", encoding="utf-8", errors="ignore") as f:
                     if nm.endswith(".csv"):
-                        lines = [next(f).strip() for _ in range(3)]
+                        # Short files have fewer than 3 lines
+                        lines = [line.strip() for line in islice(f, 3)]
                         preview = "\\n".join(lines)
                     else:
                         data = f.read(1000)
@@ -108,13 +77,15 @@ def generate_readme_fallback(brief: str, checks=None, attachments_meta=None, rou
 This README was generated as a fallback (OpenAI did not return an explicit README).
 """
 
-def generate_app_code(brief: str, attachments=None, checks=None, round_num=1, prev_readme=None):
+def generate_app_code(brief: str, attachments=None, checks=None, round_num=1, prev_readme=None,
+                      saved_attachments=None):
     """
     Generate or revise an app using the OpenAI Responses API.
     - round_num=1: build from scratch
     - round_num=2: refactor based on new brief and previous README/code
+    Pass saved_attachments (from decode_attachments) to avoid decoding twice.
     """
-    saved = decode_attachments(attachments or [])
+    saved = saved_attachments if saved_attachments is not None else decode_attachments(attachments or [])
     attachments_meta = summarize_attachment_meta(saved)
 
     context_note = ""
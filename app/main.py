@@ -1,115 +1,118 @@
-from fastapi import FastAPI, Request, BackgroundTasks
+from fastapi import FastAPI, Request
 from fastapi.responses import HTMLResponse
-import os, json, base64
+import os, base64, threading
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 from app.llm_generator import generate_app_code, decode_attachments
 from app.github_utils import (
     create_repo,
-    create_or_update_file,
+    publish_files,
     enable_pages,
     generate_mit_license,
 )
 from app.notify import notify_evaluation_server
-from app.github_utils import create_or_update_binary_file
+from app.job_queue import WorkerPool, enqueue, stage
+from app.workspace import JobWorkspace, start_sweeper
+from app.idempotency import IdempotencyStore
 
 load_dotenv()
 USER_SECRET = os.getenv("USER_SECRET")
 USERNAME = os.getenv("GITHUB_USERNAME")
-PROCESSED_PATH = "/tmp/processed_requests.json"
 
 app = FastAPI(title="TDS Project 1 - Automated App Builder")
 
 # === Persistence for processed requests ===
-def load_processed():
-    if os.path.exists(PROCESSED_PATH):
-        try:
-            return json.load(open(PROCESSED_PATH))
-        except json.JSONDecodeError:
-            return {}
-    return {}
+processed_store = IdempotencyStore()
 
-def save_processed(data):
-    json.dump(data, open(PROCESSED_PATH, "w"), indent=2)
+def request_key(data):
+    return f"{data['email']}::{data['task']}::round{data['round']}::nonce{data['nonce']}"
 
 # === Background task ===
 def process_request(data):
     round_num = data.get("round", 1)
     task_id = data["task"]
+    # Each job decodes attachments into its own directory, removed when done
+    with JobWorkspace(f"{task_id}-r{round_num}") as workspace:
+        _build(data, round_num, task_id, workspace.path)
+
+def _build(data, round_num, task_id, workdir):
     print(f"⚙ Starting background process for task {task_id} (round {round_num})")
 
     attachments = data.get("attachments", [])
-    saved_attachments = decode_attachments(attachments)
+    saved_attachments = decode_attachments(attachments, workdir)
     print("Attachments saved:", saved_attachments)
 
-    # Step 1: Get or create repo (needed for round 2 README fetch)
-    repo = create_repo(task_id, description=f"Auto-generated app for task: {data['brief']}")
-
-    # Optional: fetch previous README for round 2
-    prev_readme = None
-    if round_num == 2:
-        try:
-            readme = repo.get_contents("README.md")
-            prev_readme = readme.decoded_content.decode("utf-8", errors="ignore")
-            print("📖 Loaded previous README for round 2 context.")
-        except Exception:
-            prev_readme = None
-
-    gen = generate_app_code(
-        data["brief"],
-        attachments=attachments,
-        checks=data.get("checks", []),
-        round_num=round_num,
-        prev_readme=prev_readme
-        )
+    # Step 1: Get or create repo. Round 1 does this (and enables Pages, which
+    # only needs the auto-initialised branch) on a helper thread while the
+    # LLM runs; round 2 needs the repo first for the previous README.
+    def setup_repo():
+        with stage("github"):
+            repo = create_repo(task_id, description=f"Auto-generated app for task: {data['brief']}")
+        if round_num != 1:
+            return repo, True
+        with stage("github"):
+            pages_ok = enable_pages(task_id)
+        return repo, pages_ok
+
+    with ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"repo-{task_id}") as pool:
+        repo_setup = pool.submit(setup_repo)
+
+        # Optional: fetch previous README for round 2
+        prev_readme = None
+        if round_num == 2:
+            repo, _ = repo_setup.result()
+            try:
+                with stage("github"):
+                    readme = repo.get_contents("README.md")
+                prev_readme = readme.decoded_content.decode("utf-8", errors="ignore")
+                print("📖 Loaded previous README for round 2 context.")
+            except Exception:
+                prev_readme = None
+
+        with stage("llm"):
+            gen = generate_app_code(
+                data["brief"],
+                attachments=attachments,
+                checks=data.get("checks", []),
+                round_num=round_num,
+                prev_readme=prev_readme,
+                saved_attachments=saved_attachments
+                )
+
+        repo, pages_ok = repo_setup.result()
 
     files = gen.get("files", {})
-    saved_info = gen.get("attachments", [])
 
-    # Step 2: Round-specific logic
+    # Step 2: Collect everything for this round so it lands as a single commit
+    commit_files = {}
     if round_num == 1:
         print("🏗 Round 1: Building fresh repo...")
         # Add attachments
-        for att in saved_info:
+        for att in saved_attachments:
             path = att["name"]
             try:
                 with open(att["path"], "rb") as f:
                     content_bytes = f.read()
                 if att["mime"].startswith("text") or att["name"].endswith((".md", ".csv", ".json", ".txt")):
-                    text = content_bytes.decode("utf-8", errors="ignore")
-                    create_or_update_file(repo, path, text, f"Add attachment {path}")
+                    commit_files[path] = content_bytes.decode("utf-8", errors="ignore")
                 else:
-                    create_or_update_binary_file(repo, path, content_bytes, f"Add binary {path}")
+                    commit_files[path] = content_bytes
                     b64 = base64.b64encode(content_bytes).decode("utf-8")
-                    create_or_update_file(repo, f"attachments/{att['name']}.b64", b64, f"Backup {att['name']}.b64")
+                    commit_files[f"attachments/{att['name']}.b64"] = b64
             except Exception as e:
-                print("⚠ Attachment commit failed:", e)
+                print("⚠ Attachment read failed:", e)
     else:
         print("🔁 Round 2: Revising existing repo...")
-        # For round 2, update existing code and README
-        # Commit new files on top of existing repo
-        for fname, content in files.items():
-            create_or_update_file(repo, fname, content, f"Update {fname} for round 2")
 
     # Step 3: Common steps for both rounds
-    for fname, content in files.items():
-        create_or_update_file(repo, fname, content, f"Add/Update {fname}")
+    commit_files.update(files)
+    commit_files["LICENSE"] = generate_mit_license()
 
-    mit_text = generate_mit_license()
-    create_or_update_file(repo, "LICENSE", mit_text, "Add MIT license")
-
-    # Step 6: Handle GitHub Pages enablement or reuse existing
-    if data["round"] == 1:
-        pages_ok = enable_pages(task_id)
-        pages_url = f"https://{USERNAME}.github.io/{task_id}/" if pages_ok else None
-    else:
-        # For round 2 or later, Pages already exist
-        pages_ok = True
-        pages_url = f"https://{USERNAME}.github.io/{task_id}/"
+    with stage("github"):
+        commit_sha = publish_files(repo, commit_files, f"Round {round_num}: add/update app for {task_id}")
 
-    try:
-        commit_sha = repo.get_commits()[0].sha
-    except Exception:
-        commit_sha = None
+    # Step 6: Pages were enabled during setup (round 1); later rounds reuse them
+    pages_url = f"https://{USERNAME}.github.io/{task_id}/" if pages_ok else None
 
     payload = {
         "email": data["email"],
@@ -121,16 +124,28 @@ def process_request(data):
         "pages_url": pages_url,
     }
 
-    notify_evaluation_server(data["evaluation_url"], payload)
+    with stage("notify"):
+        notify_evaluation_server(data["evaluation_url"], payload)
 
-    processed = load_processed()
-    key = f"{data['email']}::{data['task']}::round{round_num}::nonce{data['nonce']}"
-    processed[key] = payload
-    save_processed(processed)
+    processed_store.insert_or_get(request_key(data), payload)
 
     print(f"✅ Finished round {round_num} for {task_id}")
 
 
+workers = WorkerPool(process_request)
+sweeper_stop = threading.Event()
+
+@app.on_event("startup")
+def start_workers():
+    workers.start()
+    start_sweeper(sweeper_stop)
+
+@app.on_event("shutdown")
+def stop_workers():
+    workers.stop()
+    sweeper_stop.set()
+
+
 # === Root endpoint with helpful info ===
 @app.get("/", response_class=HTMLResponse)
 async def root():
@@ -218,7 +233,7 @@ async def root():
 
 # === Main endpoint ===
 @app.post("/api-endpoint")
-async def receive_request(request: Request, background_tasks: BackgroundTasks):
+async def receive_request(request: Request):
     data = await request.json()
     print("📩 Received request:", data)
 
@@ -227,18 +242,21 @@ async def receive_request(request: Request, background_tasks: BackgroundTasks):
         print("❌ Invalid secret received.")
         return {"error": "Invalid secret"}
 
-    processed = load_processed()
-    key = f"{data['email']}::{data['task']}::round{data['round']}::nonce{data['nonce']}"
+    key = request_key(data)
 
     # Duplicate detection
-    if key in processed:
+    prev = processed_store.get(key)
+    if prev is not None:
         print(f"⚠ Duplicate request detected for {key}. Re-notifying only.")
-        prev = processed[key]
         notify_evaluation_server(data.get("evaluation_url"), prev)
         return {"status": "ok", "note": "duplicate handled & re-notified"}
 
-    # Schedule background task (non-blocking)
-    background_tasks.add_task(process_request, data)
+    # Queue for the worker pool (non-blocking, survives restarts)
+    job = {k: v for k, v in data.items() if k != "secret"}
+    if not enqueue(job, dedupe_key=key):
+        print(f"⚠ {key} is already queued.")
+        return {"status": "ok", "note": "already queued"}
+    workers.wake()
 
     # Immediate HTTP 200 acknowledgment
     return {"status": "accepted", "note": f"processing round {data['round']} started"}
@@ -1,8 +1,9 @@
 from fastapi import APIRouter
-from .endpoints import projects, builder, health
+from .endpoints import projects, builder, health, events
 
 router = APIRouter()
 
 router.include_router(health.router, prefix="/health", tags=["health"])
 router.include_router(projects.router, prefix="/projects", tags=["projects"])
 router.include_router(builder.router, prefix="/builder", tags=["builder"])
+router.include_router(events.router, prefix="/events", tags=["events"])
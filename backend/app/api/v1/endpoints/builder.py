@@ -1,20 +1,29 @@
-from fastapi import APIRouter, Depends, BackgroundTasks, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from datetime import datetime
-from ....core.database import get_db
+import asyncio
+import time
+import httpx
+from github import GithubException
+from ....core.database import get_db, SessionLocal
 from ....core.config import settings
+from ....core.metrics import BUILDS, BUILD_SECONDS, start_job_timings, timed
 from ....models.project import Project, ProjectStatus
 from ....schemas.project import ProjectCreate, ProjectResponse
+from ....services.job_queue import enqueue_job, stage
+from ....services.pages_tracker import pages_tracker
+from ....services.pipeline import StageGraph
+from ....services.rate_limiter import RETRYABLE_ERRORS
+from ....services.workspace import JobWorkspace
 from ....websockets.manager import manager
 
 router = APIRouter()
 
 async def process_request_legacy(data: dict, db: Session):
     """Legacy processing function for backward compatibility"""
-    from ....services.llm_generator import generate_app_code, decode_attachments
-    from ....services.github_service import create_repo, create_or_update_file, enable_pages, generate_mit_license, create_or_update_binary_file
-    from ....services.notification_service import notify_evaluation_server
-    import base64
+    from ....services.llm_generator import generate_app_code_async, decode_attachments
+    from ....services.github_service import github_client, generate_mit_license
+    from ....services.notification_service import notify_evaluation_server_async
     
     task_id = data["task"]
     round_num = data.get("round", 1)
@@ -38,8 +47,13 @@ async def process_request_legacy(data: dict, db: Session):
     else:
         project.status = ProjectStatus.PROCESSING
         project.round_num = round_num
+        project.pages_deployed_at = None
         db.commit()
     
+    workspace = JobWorkspace(f"{task_id}-r{round_num}")
+    started = time.perf_counter()
+    timings = start_job_timings()
+    early_blob = {}
     try:
         # Broadcast status update
         await manager.broadcast_project_update(task_id, {
@@ -47,115 +61,192 @@ async def process_request_legacy(data: dict, db: Session):
             "message": "Starting project generation..."
         })
         
-        # Decode attachments
         attachments = data.get("attachments", [])
-        saved_attachments = decode_attachments(attachments)
+        workspace.create()
         
-        # Create or get repo
-        repo = create_repo(task_id, description=f"Auto-generated app: {data['brief']}")
-        project.repo_url = repo.html_url
-        db.commit()
+        # Stages run as a dependency graph: repo setup, attachment uploads and
+        # Pages enablement proceed while Gemini generates the code
+        async def decode():
+            with timed("attachment_decode"):
+                return await asyncio.to_thread(decode_attachments, attachments, workspace.path)
         
-        await manager.broadcast_project_update(task_id, {
-            "status": "processing",
-            "message": "Repository created, generating code..."
-        })
+        async def setup_repo():
+            async with stage("github"):
+                with timed("github_create_repo"):
+                    repo = await github_client.create_repo(task_id, description=f"Auto-generated app: {data['brief']}")
+            project.repo_url = repo["html_url"]
+            db.commit()
+            await manager.broadcast_project_update(task_id, {
+                "status": "processing",
+                "message": "Repository ready"
+            })
+            return repo
         
-        # Get previous README for round 2
-        prev_readme = None
-        if round_num == 2:
+        async def fetch_prev_readme(repo=None):
+            # Previous README gives round 2 its context
+            if round_num != 2:
+                return None
             try:
-                readme = repo.get_contents("README.md")
-                prev_readme = readme.decoded_content.decode("utf-8", errors="ignore")
+                async with stage("github"):
+                    with timed("github_get_readme"):
+                        return await github_client.get_file_text(task_id, "README.md")
             except:
-                prev_readme = None
+                return None
         
-        # Generate code
-        gen = generate_app_code(
-            data["brief"],
-            attachments=attachments,
-            checks=data.get("checks", []),
-            round_num=round_num,
-            prev_readme=prev_readme
-        )
+        async def on_progress(received, section):
+            await manager.broadcast_project_update(task_id, {
+                "status": "processing",
+                "message": f"Generating {section}... ({received} bytes)",
+                "bytes_received": received,
+                "section": section
+            })
         
-        files = gen.get("files", {})
-        saved_info = gen.get("attachments", [])
+        async def upload_early_blob(code, superseded=None):
+            if superseded is not None:
+                # The fallback regenerated index.html: settle the earlier upload first
+                await asyncio.gather(superseded, return_exceptions=True)
+            async with stage("github"):
+                return await github_client.create_blob(task_id, code)
         
-        await manager.broadcast_project_update(task_id, {
-            "status": "processing",
-            "message": "Code generated, uploading to GitHub..."
-        })
+        def on_code_ready(code):
+            # Streamed: index.html is uploaded as soon as it is complete
+            previous = early_blob.get("task")
+            if previous is not None:
+                previous.cancel()
+            early_blob["content"] = code
+            early_blob["task"] = asyncio.create_task(upload_early_blob(code, previous))
         
-        # Upload attachments
-        if round_num == 1:
-            for att in saved_info:
-                path = att["name"]
-                try:
-                    with open(att["path"], "rb") as f:
-                        content_bytes = f.read()
-                    if att["mime"].startswith("text") or att["name"].endswith((".md", ".csv", ".json", ".txt")):
-                        text = content_bytes.decode("utf-8", errors="ignore")
-                        create_or_update_file(repo, path, text, f"Add attachment {path}")
-                    else:
-                        create_or_update_binary_file(repo, path, content_bytes, f"Add binary {path}")
-                except Exception as e:
-                    print(f"⚠ Attachment commit failed: {e}")
+        async def generate(saved_attachments, prev_readme):
+            await manager.broadcast_project_update(task_id, {
+                "status": "processing",
+                "message": "Generating code..."
+            })
+            async with stage("llm"):
+                with timed("llm"):
+                    return await generate_app_code_async(
+                        data["brief"],
+                        attachments=attachments,
+                        checks=data.get("checks", []),
+                        round_num=round_num,
+                        prev_readme=prev_readme,
+                        on_progress=on_progress,
+                        on_code_ready=on_code_ready,
+                        saved_attachments=saved_attachments
+                    )
         
-        # Upload generated files
-        for fname, content in files.items():
-            create_or_update_file(repo, fname, content, f"Add/Update {fname}")
+        async def upload_attachments(saved_attachments, repo):
+            """Round 1: read attachments and upload them as blobs ahead of the commit"""
+            if round_num != 1:
+                return {}, {}
+            files = await asyncio.to_thread(_read_attachments, saved_attachments)
+            blob_shas = {}
+            try:
+                async with stage("github"):
+                    with timed("attachment_upload"):
+                        for path, content in files.items():
+                            blob_shas[path] = await github_client.create_blob(task_id, content)
+            except Exception as e:
+                # publish_files sends whatever is missing inline
+                print(f"⚠ Attachment upload failed, sending inline: {e}")
+            return files, blob_shas
         
-        # Add MIT license
-        mit_text = generate_mit_license()
-        create_or_update_file(repo, "LICENSE", mit_text, "Add MIT license")
+        async def enable_pages(repo):
+            # The repo is auto-initialised, so Pages can be switched on before our commit lands
+            if round_num != 1:
+                return True
+            async with stage("github"):
+                with timed("pages_enable"):
+                    return await github_client.enable_pages(task_id, branch=repo.get("default_branch") or "main")
         
-        await manager.broadcast_project_update(task_id, {
-            "status": "processing",
-            "message": "Enabling GitHub Pages..."
-        })
+        async def publish(repo, gen, uploaded):
+            files = gen.get("files", {})
+            attachment_files, blob_shas = uploaded
+            await manager.broadcast_project_update(task_id, {
+                "status": "processing",
+                "message": "Code generated, uploading to GitHub..."
+            })
+            
+            # Attachments, generated files and license go into one commit
+            commit_files = dict(attachment_files)
+            commit_files.update(files)
+            commit_files["LICENSE"] = generate_mit_license()
+            
+            if early_blob:
+                try:
+                    sha = await early_blob["task"]
+                    if files.get("index.html") == early_blob["content"]:
+                        blob_shas["index.html"] = sha
+                except Exception as e:
+                    print(f"⚠ Early index.html upload failed, sending inline: {e}")
+            
+            async with stage("github"):
+                with timed("publish"):
+                    commit_sha = await github_client.publish_files(
+                        task_id, commit_files, f"Round {round_num}: add/update app for {task_id}",
+                        branch=repo.get("default_branch") or "main", blob_shas=blob_shas
+                    )
+            project.commit_sha = commit_sha
+            return commit_sha
         
-        # Enable GitHub Pages
-        if round_num == 1:
-            pages_ok = enable_pages(task_id)
-            pages_url = f"https://{settings.GITHUB_USERNAME}.github.io/{task_id}/" if pages_ok else None
-        else:
-            pages_ok = True
-            pages_url = f"https://{settings.GITHUB_USERNAME}.github.io/{task_id}/"
+        def pages_url(pages_ok):
+            return f"https://{settings.GITHUB_USERNAME}.github.io/{task_id}/" if pages_ok else None
         
-        project.pages_url = pages_url
+        async def track_deploy(commit_sha, pages_ok):
+            """Follow the Pages build in the background; optionally hold the callback until the site is live"""
+            if not (settings.PAGES_TRACK_DEPLOYS and pages_ok):
+                return None
+            tracking = pages_tracker.track(task_id, commit_sha, pages_url(pages_ok))
+            if not settings.PAGES_WAIT_BEFORE_NOTIFY:
+                return None
+            await manager.broadcast_project_update(task_id, {
+                "status": "processing",
+                "message": "Waiting for the GitHub Pages site to go live..."
+            })
+            # Shielded: tracking carries on even if this job is cancelled
+            return await asyncio.shield(tracking)
         
-        # Get commit SHA
-        try:
-            commit_sha = repo.get_commits()[0].sha
-            project.commit_sha = commit_sha
-        except:
-            commit_sha = None
-        
-        # Notify evaluation server
-        payload = {
-            "email": data["email"],
-            "task": data["task"],
-            "round": round_num,
-            "nonce": data["nonce"],
-            "repo_url": repo.html_url,
-            "commit_sha": commit_sha,
-            "pages_url": pages_url,
-        }
+        async def notify(repo, commit_sha, pages_ok, deployed):
+            payload = {
+                "email": data["email"],
+                "task": data["task"],
+                "round": round_num,
+                "nonce": data["nonce"],
+                "repo_url": repo["html_url"],
+                "commit_sha": commit_sha,
+                "pages_url": pages_url(pages_ok),
+            }
+            async with stage("notify"):
+                with timed("notify"):
+                    await notify_evaluation_server_async(data["evaluation_url"], payload)
         
-        notify_evaluation_server(data["evaluation_url"], payload)
+        graph = StageGraph()
+        graph.add("attachments", decode)
+        graph.add("repo", setup_repo)
+        # Only round 2 reads the README, so round 1 generation does not wait for the repo
+        graph.add("prev_readme", fetch_prev_readme, after=["repo"] if round_num == 2 else [])
+        graph.add("code", generate, after=["attachments", "prev_readme"])
+        graph.add("uploads", upload_attachments, after=["attachments", "repo"])
+        graph.add("pages", enable_pages, after=["repo"])
+        graph.add("commit", publish, after=["repo", "code", "uploads"])
+        graph.add("deploy", track_deploy, after=["commit", "pages"])
+        graph.add("notify", notify, after=["repo", "commit", "pages", "deploy"])
+        results = await graph.run()
+        
+        repo = results["repo"]
+        project.pages_url = pages_url(results["pages"])
         project.evaluation_notified = 1
         
         # Mark as completed
         project.status = ProjectStatus.COMPLETED
         project.completed_at = datetime.utcnow()
+        project.stage_timings = _finish_timings(timings, started, "completed")
         db.commit()
         
         await manager.broadcast_project_update(task_id, {
             "status": "completed",
             "message": "Project completed successfully!",
-            "repo_url": repo.html_url,
-            "pages_url": pages_url
+            "repo_url": repo["html_url"],
+            "pages_url": project.pages_url
         })
         
         print(f"✅ Finished round {round_num} for {task_id}")
@@ -164,17 +255,68 @@ async def process_request_legacy(data: dict, db: Session):
         print(f"❌ Error processing {task_id}: {e}")
         project.status = ProjectStatus.FAILED
         project.error_message = str(e)
+        project.stage_timings = _finish_timings(timings, started, "failed")
         db.commit()
         
         await manager.broadcast_project_update(task_id, {
             "status": "failed",
             "message": f"Error: {str(e)}"
         })
+        if _is_retryable(e):
+            # Let the job queue run it again (it gives up after JOB_MAX_ATTEMPTS)
+            raise
+    finally:
+        # A failed build never reaches publish(): don't leave the upload running
+        if early_blob.get("task"):
+            early_blob["task"].cancel()
+            await asyncio.gather(early_blob["task"], return_exceptions=True)
+        await asyncio.to_thread(workspace.cleanup)
+
+def _read_attachments(saved_attachments) -> dict:
+    """Attachment contents by path: text for text-like files, bytes otherwise"""
+    files = {}
+    for att in saved_attachments:
+        try:
+            with open(att["path"], "rb") as f:
+                content_bytes = f.read()
+            if att["mime"].startswith("text") or att["name"].endswith((".md", ".csv", ".json", ".txt")):
+                files[att["name"]] = content_bytes.decode("utf-8", errors="ignore")
+            else:
+                files[att["name"]] = content_bytes
+        except Exception as e:
+            print(f"⚠ Attachment read failed: {e}")
+    return files
+
+def _is_retryable(error: Exception) -> bool:
+    """Network failures, rate limits and server errors: worth another attempt"""
+    if isinstance(error, (httpx.TransportError,) + RETRYABLE_ERRORS):
+        return True
+    if isinstance(error, GithubException):
+        status = error.status or 0
+        return status >= 500 or status == 429 or (status == 403 and "rate limit" in str(error.data).lower())
+    return False
+
+def _finish_timings(timings: dict, started: float, status: str) -> dict:
+    """Record the build outcome and return the per-stage seconds to store on the project"""
+    total = time.perf_counter() - started
+    BUILDS.inc(status)
+    BUILD_SECONDS.observe(status, value=total)
+    return {**timings, "total": round(total, 3)}
+
+async def run_build_job(payload: dict):
+    """
+    Job queue handler: run one build with its own database session.
+    Retryable failures propagate so the queue schedules another attempt.
+    """
+    db = SessionLocal()
+    try:
+        await process_request_legacy(payload, db)
+    finally:
+        db.close()
 
 @router.post("/create", response_model=ProjectResponse)
 async def create_project_endpoint(
     project_data: ProjectCreate,
-    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db)
 ):
     """Create a new project and start processing"""
@@ -219,8 +361,8 @@ async def create_project_endpoint(
     db.commit()
     db.refresh(project)
     
-    # Schedule background processing
-    background_tasks.add_task(process_request_legacy, project_data.dict(), db)
+    # Queue for the worker pool (the secret is not persisted)
+    enqueue_job(db, project.task_id, project_data.dict(exclude={"secret"}))
     
     # Broadcast new project
     await manager.broadcast_global({
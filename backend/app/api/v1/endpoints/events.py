@@ -0,0 +1,80 @@
+import asyncio
+import json
+import time
+from typing import Optional
+
+from fastapi import APIRouter, Header, Request
+from fastapi.responses import StreamingResponse
+
+from ....core.config import settings
+from ....services.event_log import Event, event_log
+
+router = APIRouter()
+
+def _format(event: Event) -> str:
+    return f"id: {event.id}\nevent: {event.type}\ndata: {json.dumps(event.message())}\n\n"
+
+def _parse_last_id(value: Optional[str]) -> int:
+    try:
+        return max(0, int(value))
+    except (TypeError, ValueError):
+        return 0
+
+async def _stream(request: Request, task_id: Optional[str], last_event_id: int):
+    """
+    Replay what the client missed, then forward live events. A project
+    stream opened without Last-Event-ID replays that project's recent history.
+
+    The stream ends after SSE_MAX_STREAM_SECONDS so it fits serverless
+    request limits; EventSource reconnects on its own and resumes from
+    Last-Event-ID.
+    """
+    listener = event_log.subscribe(task_id)
+    try:
+        yield "retry: 3000\n\n"
+        if task_id is None and not last_event_id:
+            # Fresh dashboard: it fetches current state itself, so only live events
+            seen = event_log.last_id
+        else:
+            missed = event_log.replay(last_event_id, task_id)
+            if missed is None:
+                # Gap in the buffer: tell the client to refetch, then continue live
+                seen = event_log.last_id
+                yield f"id: {seen}\nevent: reset\ndata: {{}}\n\n"
+            else:
+                seen = last_event_id
+                for event in missed:
+                    seen = event.id
+                    yield _format(event)
+
+        deadline = time.monotonic() + settings.SSE_MAX_STREAM_SECONDS
+        while time.monotonic() < deadline:
+            if await request.is_disconnected():
+                break
+            try:
+                event = await asyncio.wait_for(listener.outbox.get(), settings.SSE_KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            if event.id > seen:
+                seen = event.id
+                yield _format(event)
+    finally:
+        event_log.unsubscribe(listener)
+
+def _response(request: Request, task_id: Optional[str], last_event_id: Optional[str]) -> StreamingResponse:
+    return StreamingResponse(
+        _stream(request, task_id, _parse_last_id(last_event_id)),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@router.get("")
+async def stream_all_events(request: Request, last_event_id: Optional[str] = Header(None)):
+    """Server-Sent Events for every project"""
+    return _response(request, None, last_event_id)
+
+@router.get("/{task_id}")
+async def stream_project_events(task_id: str, request: Request, last_event_id: Optional[str] = Header(None)):
+    """Server-Sent Events for one project, replaying its recent history"""
+    return _response(request, task_id, last_event_id)
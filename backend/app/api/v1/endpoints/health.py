@@ -1,5 +1,12 @@
 from fastapi import APIRouter
 from ....core.config import settings
+from ....core.http import http_pool
+from ....services.llm_cache import llm_cache
+from ....services.rate_limiter import llm_limiter
+from ....services.github_rate import github_scheduler
+from ....services.pages_tracker import pages_tracker
+from ....services.repo_cache import repo_cache
+from ....websockets.manager import manager
 
 router = APIRouter()
 
@@ -9,5 +16,12 @@ async def health_check():
         "status": "healthy",
         "version": settings.VERSION,
         "github_configured": bool(settings.GITHUB_TOKEN),
-        "gemini_configured": bool(settings.GEMINI_API_KEY)
+        "gemini_configured": bool(settings.GEMINI_API_KEY),
+        "http_pool": http_pool.stats(),
+        "llm_cache": llm_cache.stats(),
+        "llm_rate": llm_limiter.stats(),
+        "github_rate": github_scheduler.stats(),
+        "pages": pages_tracker.stats(),
+        "repo_cache": repo_cache.stats(),
+        "realtime": manager.stats()
     }
@@ -1,57 +1,117 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+import base64
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy.orm import Session, load_only
 from typing import List, Optional
 from ....core.database import get_db
+from ....core.etag import make_etag, conditional_response
 from ....models.project import Project, ProjectStatus
 from ....schemas.project import ProjectResponse, ProjectListResponse, ProjectStats
+from ....services.project_stats import project_stats, change_seq
 
 router = APIRouter()
 
 @router.get("/stats", response_model=ProjectStats)
-async def get_project_stats(db: Session = Depends(get_db)):
+async def get_project_stats(request: Request, response: Response, db: Session = Depends(get_db)):
     """Get project statistics"""
-    total = db.query(Project).count()
-    completed = db.query(Project).filter(Project.status == ProjectStatus.COMPLETED).count()
-    processing = db.query(Project).filter(Project.status == ProjectStatus.PROCESSING).count()
-    failed = db.query(Project).filter(Project.status == ProjectStatus.FAILED).count()
-    pending = db.query(Project).filter(Project.status == ProjectStatus.PENDING).count()
+    seq = change_seq(db)
+    not_modified = conditional_response(request, response, make_etag(["stats", seq]))
+    if not_modified:
+        return not_modified
     
+    counts, _ = project_stats.get(db, seq)
     return ProjectStats(
-        total_projects=total,
-        completed=completed,
-        processing=processing,
-        failed=failed,
-        pending=pending
+        total_projects=counts["total"],
+        completed=counts[ProjectStatus.COMPLETED.value],
+        processing=counts[ProjectStatus.PROCESSING.value],
+        failed=counts[ProjectStatus.FAILED.value],
+        pending=counts[ProjectStatus.PENDING.value]
     )
 
+# The cursor is keyed on id alone: ids are assigned in creation order, and unlike
+# created_at (whole seconds on SQLite, so many rows share a value) they compare
+# exactly on every database
+def _encode_cursor(project: Project) -> str:
+    return base64.urlsafe_b64encode(str(project.id).encode()).decode()
+
+def _decode_cursor(cursor: str) -> int:
+    try:
+        # Older cursors were "created_at|id"
+        return int(base64.urlsafe_b64decode(cursor.encode()).decode().rsplit("|", 1)[-1])
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+# Columns needed for ProjectResponse; checks/attachments can be large and are skipped
+_RESPONSE_COLUMNS = (
+    Project.id, Project.task_id, Project.email, Project.brief, Project.round_num,
+    Project.status, Project.repo_url, Project.pages_url, Project.commit_sha,
+    Project.created_at, Project.updated_at, Project.completed_at, Project.error_message,
+    Project.stage_timings, Project.pages_deployed_at,
+)
+
 @router.get("", response_model=ProjectListResponse)
 async def list_projects(
+    request: Request,
+    response: Response,
+    cursor: Optional[str] = None,
     skip: int = 0,
-    limit: int = 50,
+    limit: int = Query(50, ge=1, le=200),
     status: Optional[ProjectStatus] = None,
     db: Session = Depends(get_db)
 ):
-    """List all projects with optional filtering"""
-    query = db.query(Project)
+    """
+    List projects newest first, with optional filtering.
+
+    Pass the returned `next_cursor` as `cursor` to get the next page.
+    `total` comes from the cached stats counters, not a COUNT per page.
+    """
+    seq = change_seq(db)
+    etag = make_etag(["list", seq, cursor, skip, limit, status])
+    not_modified = conditional_response(request, response, etag)
+    if not_modified:
+        return not_modified
+    
+    query = db.query(Project).options(load_only(*_RESPONSE_COLUMNS))
     
     if status:
         query = query.filter(Project.status == status)
     
-    total = query.count()
-    projects = query.order_by(Project.created_at.desc()).offset(skip).limit(limit).all()
+    if cursor:
+        query = query.filter(Project.id < _decode_cursor(cursor))
+    elif skip:
+        query = query.offset(skip)
+    
+    # One extra row tells us whether there is a next page
+    projects = query.order_by(Project.id.desc()).limit(limit + 1).all()
+    next_cursor = _encode_cursor(projects[limit - 1]) if len(projects) > limit else None
     
-    return ProjectListResponse(total=total, projects=projects)
+    counts, _ = project_stats.get(db, seq)
+    total = counts[status.value] if status else counts["total"]
+    
+    return ProjectListResponse(total=total, projects=projects[:limit], next_cursor=next_cursor)
 
 @router.get("/{task_id}", response_model=ProjectResponse)
-async def get_project(task_id: str, db: Session = Depends(get_db)):
+async def get_project(task_id: str, request: Request, response: Response, db: Session = Depends(get_db)):
     """Get a specific project by task_id"""
-    project = db.query(Project).filter(Project.task_id == task_id).first()
+    project = (
+        db.query(Project)
+        .options(load_only(*_RESPONSE_COLUMNS))
+        .filter(Project.task_id == task_id)
+        .first()
+    )
     
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
     
-    return project
+    body = ProjectResponse.model_validate(project)
+    not_modified = conditional_response(
+        request, response,
+        make_etag(body.model_dump(mode="json")),
+        last_modified=project.updated_at or project.created_at,
+    )
+    if not_modified:
+        return not_modified
+    
+    return body
 
 @router.delete("/{task_id}")
 async def delete_project(task_id: str, db: Session = Depends(get_db)):
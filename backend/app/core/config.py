@@ -44,6 +44,33 @@ class Settings(BaseSettings):
     # AI
     GEMINI_API_KEY: str = ""
     
+    # Stream Gemini output (progress updates + early index.html upload)
+    LLM_STREAMING: bool = True
+    
+    # Gemini request pacing (adapts to quota errors) and retries
+    LLM_RATE_PER_MINUTE: float = 30.0
+    LLM_RATE_MIN_PER_MINUTE: float = 2.0
+    LLM_RATE_MAX_PER_MINUTE: float = 300.0
+    LLM_RATE_BURST: int = 5
+    LLM_RETRY_DEADLINE_SECONDS: float = 300.0
+    LLM_RETRY_BASE_DELAY: float = 2.0
+    LLM_RETRY_MAX_DELAY: float = 60.0
+    
+    # Upper bound on prompt size (approximate tokens); sections are trimmed to fit
+    LLM_PROMPT_TOKEN_BUDGET: int = 8000
+    
+    # Long briefs: plan the app's files, then generate them in parallel
+    LLM_MULTI_FILE: bool = True
+    LLM_MULTI_FILE_MIN_BRIEF_CHARS: int = 1200
+    LLM_MAX_PLANNED_FILES: int = 6
+    LLM_PARALLEL_REQUESTS: int = 3
+    
+    # LLM response cache
+    LLM_CACHE_ENABLED: bool = True
+    LLM_CACHE_DIR: Path = Path("/tmp/tds_llm_cache")
+    LLM_CACHE_TTL_SECONDS: int = 7 * 24 * 3600
+    LLM_CACHE_MAX_BYTES: int = 200 * 1024 * 1024
+    
     # Security
     USER_SECRET: str = ""
     SECRET_KEY: str = "your-secret-key-change-in-production"
@@ -51,6 +78,77 @@ class Settings(BaseSettings):
     # Paths
     TEMP_DIR: Path = Path("/tmp/tds_attachments")
     
+    # Per-job workspaces under TEMP_DIR/jobs
+    WORKSPACE_MAX_AGE_SECONDS: int = 2 * 3600
+    WORKSPACE_QUOTA_BYTES: int = 1024 * 1024 * 1024
+    WORKSPACE_SWEEP_INTERVAL: int = 600
+    
+    # Attachment size caps (decoded bytes)
+    MAX_ATTACHMENT_BYTES: int = 10 * 1024 * 1024
+    MAX_JOB_ATTACHMENT_BYTES: int = 25 * 1024 * 1024
+    
+    # Job queue
+    JOB_WORKERS: int = 4
+    JOB_LEASE_SECONDS: int = 300
+    JOB_MAX_ATTEMPTS: int = 3
+    JOB_POLL_INTERVAL: float = 1.0
+    # Failed attempts wait base * 2^(attempt - 1) seconds, capped, before a retry
+    JOB_RETRY_BASE_SECONDS: float = 10.0
+    JOB_RETRY_MAX_SECONDS: float = 600.0
+    # Finished (done/failed) jobs are deleted after this long
+    JOB_RETENTION_SECONDS: int = 7 * 24 * 3600
+    
+    # Outbound HTTP connection pool (per host)
+    HTTP_MAX_CONNECTIONS_PER_HOST: int = 20
+    HTTP_MAX_KEEPALIVE_PER_HOST: int = 10
+    HTTP_KEEPALIVE_EXPIRY: float = 60.0
+    HTTP_TIMEOUT: float = 30.0
+    # Clients for origins unused this long are closed (evaluation URLs come and go)
+    HTTP_CLIENT_IDLE_SECONDS: float = 300.0
+    HTTP_MAX_ORIGINS: int = 32
+    
+    # GitHub API pacing (see services/github_rate.py)
+    GITHUB_RATE_RESERVE: int = 200
+    GITHUB_WRITE_INTERVAL: float = 0.5
+    GITHUB_MAX_RATE_WAIT_SECONDS: float = 900.0
+    GITHUB_RATE_LIMIT_RETRIES: int = 3
+    
+    # GitHub Pages deployment tracking (see services/pages_tracker.py)
+    PAGES_TRACK_DEPLOYS: bool = True
+    PAGES_WAIT_BEFORE_NOTIFY: bool = False
+    PAGES_POLL_INITIAL_SECONDS: float = 5.0
+    PAGES_POLL_MAX_SECONDS: float = 30.0
+    PAGES_DEPLOY_TIMEOUT_SECONDS: float = 600.0
+    
+    # Repository metadata cache: repo, branch head and tree (see services/repo_cache.py)
+    REPO_CACHE_TTL_SECONDS: float = 900.0
+    REPO_CACHE_MAX_REPOS: int = 500
+    
+    # Per-stage concurrency limits (shared by all job workers)
+    LLM_CONCURRENCY: int = 2
+    GITHUB_CONCURRENCY: int = 4
+    NOTIFY_CONCURRENCY: int = 8
+    
+    # Server-Sent Events: replay buffers and stream lifetime
+    EVENT_LOG_SIZE: int = 2000
+    EVENT_LOG_SIZE_PER_TASK: int = 200
+    EVENT_LOG_MAX_TASKS: int = 500
+    SSE_KEEPALIVE_SECONDS: float = 15.0
+    SSE_MAX_STREAM_SECONDS: float = 240.0
+    
+    # Real-time event bus: "memory" (single process) or "sqlite" (shared by all workers on a host)
+    BROADCAST_BACKEND: str = "memory"
+    BROADCAST_DB_PATH: str = "/tmp/tds_events.db"
+    BROADCAST_POLL_INTERVAL: float = 0.25
+    BROADCAST_RETENTION_SECONDS: int = 3600
+    
+    # Per-client outbound queues (WebSocket and SSE)
+    CLIENT_QUEUE_SIZE: int = 100
+    WS_SEND_TIMEOUT_SECONDS: float = 10.0
+    
+    # Dashboard stats cache (also invalidated on every project write)
+    PROJECT_STATS_TTL_SECONDS: float = 5.0
+    
     class Config:
         case_sensitive = True
 
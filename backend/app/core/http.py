@@ -0,0 +1,143 @@
+import asyncio
+import importlib.util
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Set
+from urllib.parse import urlsplit
+
+import httpx
+
+from .config import settings
+
+# HTTP/2 needs the optional `h2` package (httpx[http2]); fall back to HTTP/1.1 without it
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+def _origin(url: str) -> str:
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+class HTTPPool:
+    """
+    Process-wide keep-alive HTTP clients, one per origin.
+
+    Every outbound call (GitHub API, Pages, evaluation callbacks) goes through
+    here so TLS connections are reused instead of re-negotiated per request.
+    Each origin gets its own connection limits. Clients unused for
+    HTTP_CLIENT_IDLE_SECONDS are closed, and at most HTTP_MAX_ORIGINS are
+    kept (least recently used go first).
+    """
+
+    def __init__(self):
+        self._async: "OrderedDict[str, httpx.AsyncClient]" = OrderedDict()
+        self._used: Dict[int, float] = {}
+        self._closing: Set[asyncio.Task] = set()
+        self._stats: Dict[str, Dict[str, int]] = {}
+        self._transports: Dict[str, httpx.AsyncBaseTransport] = {}
+
+    def _limits(self) -> httpx.Limits:
+        return httpx.Limits(
+            max_connections=settings.HTTP_MAX_CONNECTIONS_PER_HOST,
+            max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_PER_HOST,
+            keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY,
+        )
+
+    def _host_stats(self, origin: str) -> Dict[str, int]:
+        if origin not in self._stats:
+            self._stats[origin] = {"requests": 0, "errors": 0}
+        return self._stats[origin]
+
+    def mount(self, url: str, transport: Optional[httpx.AsyncBaseTransport]):
+        """
+        Route async requests for the origin of `url` through `transport`
+        (e.g. in-process fakes for benchmarks); None restores the network.
+        """
+        origin = _origin(url)
+        if transport is None:
+            self._transports.pop(origin, None)
+        else:
+            self._transports[origin] = transport
+        # The next client_for() builds a client on the new transport
+        old = self._async.pop(origin, None)
+        if old is not None:
+            self._close_async(old)
+
+    def _touch(self, clients: OrderedDict, origin: str, client):
+        clients.move_to_end(origin)
+        self._used[id(client)] = time.monotonic()
+
+    def _evict(self, clients: OrderedDict) -> list:
+        """Remove clients idle past HTTP_CLIENT_IDLE_SECONDS or beyond HTTP_MAX_ORIGINS; returns them"""
+        now = time.monotonic()
+        evicted = []
+        for origin, client in list(clients.items()):
+            idle = now - self._used.get(id(client), now)
+            over_cap = len(clients) > settings.HTTP_MAX_ORIGINS
+            # Over the cap, still spare anything that may have a request in flight
+            if idle <= settings.HTTP_CLIENT_IDLE_SECONDS and not (over_cap and idle > settings.HTTP_TIMEOUT):
+                break
+            del clients[origin]
+            self._used.pop(id(client), None)
+            evicted.append(client)
+        return evicted
+
+    def _close_async(self, client: httpx.AsyncClient):
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            asyncio.run(client.aclose())
+            return
+        task = loop.create_task(client.aclose())
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
+
+    def client_for(self, url: str) -> httpx.AsyncClient:
+        """Shared AsyncClient for the origin of `url`."""
+        origin = _origin(url)
+        client = self._async.get(origin)
+        if client is None or client.is_closed:
+            stats = self._host_stats(origin)
+
+            async def on_response(response: httpx.Response):
+                stats["requests"] += 1
+                if response.status_code >= 500:
+                    stats["errors"] += 1
+
+            client = httpx.AsyncClient(
+                http2=HTTP2_AVAILABLE,
+                limits=self._limits(),
+                timeout=settings.HTTP_TIMEOUT,
+                event_hooks={"response": [on_response]},
+                transport=self._transports.get(origin),
+            )
+            self._async[origin] = client
+            for old in self._evict(self._async):
+                self._close_async(old)
+        self._touch(self._async, origin, client)
+        return client
+
+    async def aclose(self):
+        for client in self._async.values():
+            await client.aclose()
+        if self._closing:
+            await asyncio.gather(*self._closing, return_exceptions=True)
+        self._async.clear()
+        self._used.clear()
+
+    def stats(self) -> dict:
+        """Per-origin request counters and connection usage for /health."""
+        hosts = {}
+        for origin, counters in self._stats.items():
+            pool = getattr(getattr(self._async.get(origin), "_transport", None), "_pool", None)
+            connections = list(getattr(pool, "connections", [])) if pool else []
+            hosts[origin] = {
+                **counters,
+                "open_connections": len(connections),
+                "idle_connections": sum(1 for c in connections if c.is_idle()),
+            }
+        return {
+            "http2": HTTP2_AVAILABLE,
+            "max_connections_per_host": settings.HTTP_MAX_CONNECTIONS_PER_HOST,
+            "hosts": hosts,
+        }
+
+http_pool = HTTPPool()
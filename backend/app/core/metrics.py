@@ -0,0 +1,153 @@
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+
+# Build stages take from milliseconds (GitHub reads) to minutes (Gemini)
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+
+LabelValues = Tuple[str, ...]
+
+def _format_labels(names: Tuple[str, ...], values: LabelValues, extra: str = "") -> str:
+    parts = [f'{n}="{v}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self._lock = threading.Lock()
+        registry.register(self)
+
+    def _key(self, values) -> LabelValues:
+        return tuple(str(v) for v in values)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name, help, labels=()):
+        super().__init__(name, help, labels)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, *labels, amount: float = 1):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labels, k)} {v}" for k, v in items]
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, *labels, amount: float = 1):
+        self.inc(*labels, amount=-amount)
+
+    def set(self, *labels, value: float):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(buckets)
+        # label values -> [per-bucket counts..., +Inf count, sum]
+        self._values: Dict[LabelValues, List[float]] = {}
+
+    def observe(self, *labels, value: float):
+        key = self._key(labels)
+        with self._lock:
+            row = self._values.setdefault(key, [0] * (len(self.buckets) + 1) + [0.0])
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    row[i] += 1
+            row[len(self.buckets)] += 1
+            row[-1] += value
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted((k, list(v)) for k, v in self._values.items())
+        lines = []
+        for key, row in items:
+            total = row[len(self.buckets)]
+            for bound, count in zip(self.buckets + ("+Inf",), row):
+                le = f'le="{bound}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labels, key, le)} {count}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, key)} {round(row[-1], 6)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, key)} {total}")
+        return lines
+
+class Registry:
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+
+    def register(self, metric: _Metric):
+        self._metrics.append(metric)
+
+    def render(self) -> str:
+        """Prometheus text exposition format"""
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines += metric.header()
+            lines += metric.render()
+        return "\n".join(lines) + "\n"
+
+registry = Registry()
+
+# === Build pipeline metrics ===
+
+STAGE_SECONDS = Histogram("build_stage_seconds", "Time spent in each build stage", ("stage",))
+STAGE_WAIT_SECONDS = Histogram("build_stage_wait_seconds", "Time spent waiting for a stage concurrency slot", ("stage",))
+STAGE_IN_FLIGHT = Gauge("build_stage_in_flight", "Build stages currently running", ("stage",))
+STAGE_ERRORS = Counter("build_stage_errors_total", "Build stages that raised", ("stage",))
+BUILDS = Counter("builds_total", "Finished builds by outcome", ("status",))
+BUILD_SECONDS = Histogram("build_seconds", "End-to-end time of one build", ("status",))
+LLM_RETRIES = Counter("llm_retries_total", "Gemini calls retried after a retryable error")
+LLM_FALLBACKS = Counter("llm_fallbacks_total", "Generations that fell back (to a single call, or to the static page)", ("kind",))
+GITHUB_RATE_LIMITED = Counter("github_rate_limited_total", "GitHub responses that signalled a rate limit")
+PAGES_DEPLOYS = Counter("pages_deploys_total", "Tracked Pages deployments by outcome", ("outcome",))
+NOTIFY_RETRIES = Counter("notify_retries_total", "Evaluation callbacks that had to be retried")
+
+# Per-job stage totals; set by start_job_timings() and filled in by timed()
+_job_timings: ContextVar[Optional[Dict[str, float]]] = ContextVar("job_timings", default=None)
+
+def start_job_timings() -> Dict[str, float]:
+    """
+    Start collecting the seconds each stage takes in the current job.
+    Tasks the job spawns share the same dict; stages that nest
+    (e.g. github_write inside publish) are each counted in full.
+    """
+    timings: Dict[str, float] = {}
+    _job_timings.set(timings)
+    return timings
+
+@contextmanager
+def timed(stage: str):
+    """Record one run of a stage: histogram, in-flight gauge, errors and the job's totals"""
+    STAGE_IN_FLIGHT.inc(stage)
+    start = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        STAGE_ERRORS.inc(stage)
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        STAGE_IN_FLIGHT.dec(stage)
+        STAGE_SECONDS.observe(stage, value=elapsed)
+        timings = _job_timings.get()
+        if timings is not None:
+            timings[stage] = round(timings.get(stage, 0.0) + elapsed, 3)
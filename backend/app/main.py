@@ -1,13 +1,23 @@
-from fastapi import FastAPI, Request, BackgroundTasks, WebSocket, WebSocketDisconnect, Depends
+from fastapi import FastAPI, Request, WebSocket, WebSocketDisconnect, Depends
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, PlainTextResponse
 from sqlalchemy.orm import Session
+import asyncio
 import os
 
 from .core.config import settings
 from .core.database import init_db, get_db
 from .api.v1 import api as api_v1
 from .websockets.manager import manager
+from .services.job_queue import job_queue
+from .core.http import http_pool
+from .core.metrics import registry
+from .services.llm_cache import llm_cache
+from .services.rate_limiter import llm_limiter
+from .services.github_rate import github_scheduler
+from .services.pages_tracker import pages_tracker
+from .services.repo_cache import repo_cache
+from .services.workspace import run_sweeper
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
@@ -32,6 +42,26 @@ app.add_middleware(
 # Include API routes
 app.include_router(api_v1.router, prefix=settings.API_V1_STR)
 
+# Job workers
+from .api.v1.endpoints.builder import run_build_job
+
+background_tasks = []
+
+@app.on_event("startup")
+async def start_job_workers():
+    await manager.start()
+    job_queue.start(run_build_job)
+    background_tasks.append(asyncio.create_task(run_sweeper()))
+
+@app.on_event("shutdown")
+async def stop_job_workers():
+    for task in background_tasks:
+        task.cancel()
+    await job_queue.stop()
+    await pages_tracker.stop()
+    await manager.stop()
+    await http_pool.aclose()
+
 # WebSocket endpoint (disabled for Vercel serverless)
 # @app.websocket("/ws")
 # async def websocket_endpoint(websocket: WebSocket):
@@ -54,11 +84,10 @@ app.include_router(api_v1.router, prefix=settings.API_V1_STR)
 #         manager.disconnect(websocket)
 
 # Legacy endpoint for backward compatibility
-from .api.v1.endpoints.builder import process_request_legacy
 from .schemas.project import ProjectCreate
 
 @app.post("/api-endpoint")
-async def legacy_endpoint(request: Request, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
+async def legacy_endpoint(request: Request, db: Session = Depends(get_db)):
     """Legacy endpoint for backward compatibility"""
     data = await request.json()
     
@@ -71,7 +100,7 @@ async def legacy_endpoint(request: Request, background_tasks: BackgroundTasks, d
     
     # Process using new system
     from .api.v1.endpoints.builder import create_project_endpoint
-    return await create_project_endpoint(project_data, background_tasks, db)
+    return await create_project_endpoint(project_data, db)
 
 # Root endpoint
 @app.get("/", response_class=HTMLResponse)
@@ -138,7 +167,9 @@ async def root():
                         <li><strong>GET</strong> <code>{settings.API_V1_STR}/projects</code> - List all projects</li>
                         <li><strong>GET</strong> <code>{settings.API_V1_STR}/projects/{{task_id}}</code> - Get project details</li>
                         <li><strong>GET</strong> <code>{settings.API_V1_STR}/projects/stats</code> - Get statistics</li>
+                        <li><strong>GET</strong> <code>{settings.API_V1_STR}/events</code> - Real-time updates (Server-Sent Events)</li>
                         <li><strong>WebSocket</strong> <code>/ws</code> - Real-time updates</li>
+                        <li><strong>GET</strong> <code>/metrics</code> - Build pipeline metrics (Prometheus)</li>
                     </ul>
 
                     <h5 class="mt-4">✨ New Features</h5>
@@ -180,5 +211,17 @@ async def health_check():
         "status": "healthy",
         "version": settings.VERSION,
         "github_configured": bool(settings.GITHUB_TOKEN),
-        "gemini_configured": bool(settings.GEMINI_API_KEY)
+        "gemini_configured": bool(settings.GEMINI_API_KEY),
+        "http_pool": http_pool.stats(),
+        "llm_cache": llm_cache.stats(),
+        "llm_rate": llm_limiter.stats(),
+        "github_rate": github_scheduler.stats(),
+        "pages": pages_tracker.stats(),
+        "repo_cache": repo_cache.stats(),
+        "realtime": manager.stats()
     }
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Build pipeline metrics in Prometheus text format"""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
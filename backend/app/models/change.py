@@ -0,0 +1,9 @@
+from sqlalchemy import Column, Integer, String
+from ..core.database import Base
+
+class ChangeSequence(Base):
+    """Monotonic counter per table, bumped in the same transaction as each write"""
+    __tablename__ = "change_sequences"
+
+    name = Column(String, primary_key=True)
+    seq = Column(Integer, nullable=False, default=0)
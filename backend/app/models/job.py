@@ -0,0 +1,33 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, Enum, JSON
+from sqlalchemy.sql import func
+from ..core.database import Base
+import enum
+
+class JobStatus(str, enum.Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+class Job(Base):
+    __tablename__ = "jobs"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    task_id = Column(String, index=True, nullable=False)
+    payload = Column(JSON, nullable=False)
+    
+    status = Column(Enum(JobStatus), default=JobStatus.QUEUED, index=True)
+    attempts = Column(Integer, default=0)
+    
+    # Leasing: a running job belongs to lease_owner until lease_expires_at
+    lease_owner = Column(String)
+    lease_expires_at = Column(DateTime(timezone=True), index=True)
+    # A requeued job is not claimed again before this (retry backoff)
+    not_before = Column(DateTime(timezone=True))
+    
+    last_error = Column(Text)
+    
+    # Timestamps
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    finished_at = Column(DateTime(timezone=True))
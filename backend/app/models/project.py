@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, Enum, JSON
+from sqlalchemy import Column, Integer, String, Text, DateTime, Enum, JSON, Index
 from sqlalchemy.sql import func
 from ..core.database import Base
 import enum
@@ -11,6 +11,11 @@ class ProjectStatus(str, enum.Enum):
 
 class Project(Base):
     __tablename__ = "projects"
+    __table_args__ = (
+        # Keyset pagination of the listing by id, newest first; the primary
+        # key covers the unfiltered listing
+        Index("ix_projects_status_id", "status", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     task_id = Column(String, unique=True, index=True, nullable=False)
@@ -38,6 +43,11 @@ class Project(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     completed_at = Column(DateTime(timezone=True))
+    # When the Pages site for the latest commit went live (see services/pages_tracker.py)
+    pages_deployed_at = Column(DateTime(timezone=True))
     
     # Error tracking
     error_message = Column(Text)
+    
+    # Seconds spent in each build stage of the latest round (see core/metrics.py)
+    stage_timings = Column(JSON)
@@ -31,7 +31,9 @@ class ProjectResponse(BaseModel):
     created_at: datetime
     updated_at: Optional[datetime] = None
     completed_at: Optional[datetime] = None
+    pages_deployed_at: Optional[datetime] = None
     error_message: Optional[str] = None
+    stage_timings: Optional[dict] = None
     
     class Config:
         from_attributes = True
@@ -39,6 +41,7 @@ class ProjectResponse(BaseModel):
 class ProjectListResponse(BaseModel):
     total: int
     projects: List[ProjectResponse]
+    next_cursor: Optional[str] = None
 
 class ProjectStats(BaseModel):
     total_projects: int
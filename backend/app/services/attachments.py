@@ -0,0 +1,128 @@
+import base64
+import hashlib
+import mimetypes
+import os
+import tempfile
+from pathlib import Path
+from typing import Optional
+from urllib.parse import unquote_to_bytes
+
+from ..core.config import settings
+
+# Base64 characters decoded per step; a multiple of 4 so every step is self-contained
+B64_CHUNK_CHARS = 256 * 1024
+
+# Leading bytes of common binary formats, used when the data URI has no useful MIME type
+_MAGIC = [
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"GIF8", "image/gif"),
+    (b"%PDF-", "application/pdf"),
+    (b"PK\x03\x04", "application/zip"),
+    (b"RIFF", "image/webp"),
+]
+
+class AttachmentTooLarge(Exception):
+    pass
+
+def _sniff_mime(declared: str, name: str, head: bytes) -> str:
+    if declared and declared != "application/octet-stream":
+        return declared
+    for magic, mime in _MAGIC:
+        if head.startswith(magic):
+            return mime
+    guessed, _ = mimetypes.guess_type(name)
+    return guessed or declared or "application/octet-stream"
+
+def _iter_decoded(url: str, start: int, is_base64: bool):
+    """Yield decoded bytes from url[start:] a chunk at a time."""
+    if not is_base64:
+        yield unquote_to_bytes(url[start:])
+        return
+    carry = ""
+    pos = start
+    end = len(url)
+    while pos < end:
+        piece = carry + url[pos:pos + B64_CHUNK_CHARS]
+        pos += B64_CHUNK_CHARS
+        if "\n" in piece or " " in piece:
+            # Wrapped base64: drop whitespace so the 4-char alignment holds
+            piece = "".join(piece.split())
+        if pos < end:
+            usable = len(piece) - len(piece) % 4
+            piece, carry = piece[:usable], piece[usable:]
+        else:
+            carry = ""
+        if piece:
+            yield base64.b64decode(piece)
+
+def spool_data_uri(name: str, url: str, dest_dir: Path, max_bytes: int) -> dict:
+    """
+    Decode one data URI straight to disk.
+
+    Hashes and sniffs the MIME type while writing, so the content is read
+    exactly once. The file ends up at dest_dir/<sha256>, which makes identical
+    attachments share one file. Raises AttachmentTooLarge past max_bytes.
+    """
+    comma = url.index(",")
+    header = url[len("data:"):comma]
+    declared = header.split(";")[0]
+    is_base64 = header.endswith(";base64")
+
+    digest = hashlib.sha256()
+    size = 0
+    head = b""
+    fd, tmp_path = tempfile.mkstemp(dir=dest_dir, suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            for chunk in _iter_decoded(url, comma + 1, is_base64):
+                size += len(chunk)
+                if size > max_bytes:
+                    raise AttachmentTooLarge(f"{name} is larger than {max_bytes} bytes")
+                if len(head) < 16:
+                    head += chunk[:16 - len(head)]
+                digest.update(chunk)
+                f.write(chunk)
+        sha256 = digest.hexdigest()
+        path = Path(dest_dir) / sha256
+        os.replace(tmp_path, path)
+    except BaseException:
+        Path(tmp_path).unlink(missing_ok=True)
+        raise
+
+    return {
+        "name": name,
+        "path": str(path),
+        "mime": _sniff_mime(declared, name, head),
+        "size": size,
+        "sha256": sha256,
+    }
+
+def decode_attachments(attachments, dest_dir: Optional[Path] = None):
+    """
+    attachments: list of {name, url: data:<mime>;base64,<b64>}
+    Streams each one into a content-addressed spool file under dest_dir
+    (default: settings.TEMP_DIR), enforcing MAX_ATTACHMENT_BYTES per file
+    and MAX_JOB_ATTACHMENT_BYTES for the whole job.
+    Returns list of dicts: {"name", "path", "mime", "size", "sha256"}
+    """
+    dest_dir = Path(dest_dir or settings.TEMP_DIR)
+    dest_dir.mkdir(parents=True, exist_ok=True)
+    budget = settings.MAX_JOB_ATTACHMENT_BYTES
+    saved = []
+    for att in attachments or []:
+        name = att.get("name") or "attachment"
+        url = att.get("url", "")
+        if not url.startswith("data:"):
+            continue
+        try:
+            info = spool_data_uri(name, url, dest_dir, min(settings.MAX_ATTACHMENT_BYTES, budget))
+        except AttachmentTooLarge as e:
+            print(f"⚠ Skipping attachment: {e}")
+            continue
+        except Exception as e:
+            print("Failed to decode attachment", name, e)
+            continue
+        budget -= info["size"]
+        saved.append(info)
+    return saved
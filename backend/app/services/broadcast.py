@@ -0,0 +1,139 @@
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+from typing import Callable, List, Optional, Tuple
+
+from ..core.config import settings
+from .event_log import event_log
+
+# deliver(type, data, task_id, event_id) fans an event out to this process's clients
+Deliver = Callable[[str, dict, Optional[str], Optional[int]], None]
+
+class MemoryBackend:
+    """Single-process bus: publishing delivers straight to local clients."""
+
+    def __init__(self):
+        self._deliver: Optional[Deliver] = None
+
+    async def start(self, deliver: Deliver):
+        self._deliver = deliver
+
+    async def stop(self):
+        pass
+
+    async def publish(self, type: str, data: dict, task_id: Optional[str] = None):
+        if self._deliver:
+            self._deliver(type, data, task_id, None)
+
+class SQLiteBackend:
+    """
+    Cross-process bus for several workers on one host.
+
+    Publishing appends to an events table in a shared SQLite file (WAL);
+    every process polls for rows past the last id it saw and delivers them
+    to its own clients. Row ids double as SSE event ids, so a client can
+    reconnect to any worker and resume from Last-Event-ID.
+    """
+
+    def __init__(self, path: str, poll_interval: float, retention: int, warm_events: int):
+        self.path = path
+        self.poll_interval = poll_interval
+        self.retention = retention
+        self.warm_events = warm_events
+        self._local = threading.local()
+        self._deliver: Optional[Deliver] = None
+        self._task: Optional[asyncio.Task] = None
+        self._last_id = 0
+        self._last_prune = 0.0
+        self._wake = asyncio.Event()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS events (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    type TEXT NOT NULL,
+                    task_id TEXT,
+                    data TEXT NOT NULL,
+                    created_at REAL NOT NULL
+                )
+            """)
+            self._local.conn = conn
+        return conn
+
+    def _insert(self, type: str, data: dict, task_id: Optional[str]):
+        self._conn().execute(
+            "INSERT INTO events (type, task_id, data, created_at) VALUES (?, ?, ?, ?)",
+            (type, task_id, json.dumps(data), time.time()),
+        )
+
+    def _fetch(self, after_id: int) -> List[Tuple[int, str, Optional[str], str]]:
+        return self._conn().execute(
+            "SELECT id, type, task_id, data FROM events WHERE id > ? ORDER BY id LIMIT 1000",
+            (after_id,),
+        ).fetchall()
+
+    def _start_id(self) -> int:
+        (max_id,) = self._conn().execute("SELECT COALESCE(MAX(id), 0) FROM events").fetchone()
+        return max(0, max_id - self.warm_events)
+
+    def _prune(self):
+        self._conn().execute("DELETE FROM events WHERE created_at < ?", (time.time() - self.retention,))
+
+    async def start(self, deliver: Deliver):
+        self._deliver = deliver
+        # Start a little in the past so this process can replay recent events too
+        self._last_id = await asyncio.to_thread(self._start_id)
+        event_log.set_floor(self._last_id)
+        self._task = asyncio.create_task(self._poll())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    async def publish(self, type: str, data: dict, task_id: Optional[str] = None):
+        await asyncio.to_thread(self._insert, type, data, task_id)
+        # Our own events show up without waiting for the next poll
+        self._wake.set()
+
+    async def _poll(self):
+        while True:
+            self._wake.clear()
+            try:
+                rows = await asyncio.to_thread(self._fetch, self._last_id)
+                for event_id, type, task_id, data in rows:
+                    self._last_id = event_id
+                    self._deliver(type, json.loads(data), task_id, event_id)
+                if time.monotonic() - self._last_prune > 60:
+                    self._last_prune = time.monotonic()
+                    await asyncio.to_thread(self._prune)
+                if len(rows) == 1000:
+                    continue
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"⚠ Broadcast poll failed: {e}")
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+def create_backend():
+    """Backend selected by BROADCAST_BACKEND ("memory" or "sqlite")"""
+    if settings.BROADCAST_BACKEND == "sqlite":
+        return SQLiteBackend(
+            settings.BROADCAST_DB_PATH,
+            poll_interval=settings.BROADCAST_POLL_INTERVAL,
+            retention=settings.BROADCAST_RETENTION_SECONDS,
+            warm_events=settings.EVENT_LOG_SIZE,
+        )
+    if settings.BROADCAST_BACKEND != "memory":
+        print(f"⚠ Unknown BROADCAST_BACKEND {settings.BROADCAST_BACKEND!r}, using memory")
+    return MemoryBackend()
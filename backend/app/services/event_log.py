@@ -0,0 +1,144 @@
+import asyncio
+import itertools
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, Hashable, List, Optional, Set
+
+from ..core.config import settings
+
+@dataclass
+class Event:
+    id: int
+    type: str
+    data: dict
+    task_id: Optional[str] = None
+
+    def message(self) -> dict:
+        """Same shape as the WebSocket messages"""
+        msg = {"type": self.type, "data": self.data}
+        if self.task_id is not None:
+            msg["task_id"] = self.task_id
+        return msg
+
+class Outbox:
+    """
+    Bounded, coalescing queue of outgoing messages for one client.
+
+    A message put under a key replaces any unsent message with the same key
+    (e.g. only the latest status of a task is kept), and when the outbox is
+    full the oldest message is dropped, so a slow consumer never makes the
+    publisher wait or grows memory without bound.
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.dropped = 0
+        self.coalesced = 0
+        self._items: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._ready = asyncio.Event()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def put(self, item: Any, key: Optional[Hashable] = None):
+        if key is None:
+            key = object()
+        elif self._items.pop(key, None) is not None:
+            self.coalesced += 1
+        while len(self._items) >= self.maxsize:
+            self._items.popitem(last=False)
+            self.dropped += 1
+        # Re-inserting at the end keeps messages in publish order
+        self._items[key] = item
+        self._ready.set()
+
+    async def get(self) -> Any:
+        while not self._items:
+            self._ready.clear()
+            await self._ready.wait()
+        _, item = self._items.popitem(last=False)
+        return item
+
+def coalesce_key(type: str, task_id: Optional[str]) -> Optional[Hashable]:
+    """Project updates coalesce per task; everything else is delivered as is"""
+    return (type, task_id) if type == "project_update" and task_id is not None else None
+
+@dataclass(eq=False)
+class Listener:
+    task_id: Optional[str]
+    outbox: Outbox = field(default_factory=lambda: Outbox(settings.CLIENT_QUEUE_SIZE))
+
+class EventLog:
+    """
+    Replayable log of project events for Server-Sent Events clients.
+
+    Every broadcast gets a monotonically increasing id and is kept in a
+    bounded global buffer and a bounded per-task buffer, so a client that
+    reconnects with Last-Event-ID receives what it missed instead of
+    polling for it.
+    """
+
+    def __init__(self, max_events: int, max_events_per_task: int, max_tasks: int):
+        self._ids = itertools.count(1)
+        self.last_id = 0
+        self._events: Deque[Event] = deque(maxlen=max_events)
+        self._by_task: "OrderedDict[str, Deque[Event]]" = OrderedDict()
+        self._max_per_task = max_events_per_task
+        self._max_tasks = max_tasks
+        self._listeners: Set[Listener] = set()
+        # Id of the newest event each buffer (None = global) has discarded
+        self._dropped_upto: Dict[Optional[str], int] = {}
+        self._floor = 0
+
+    def _append(self, key: Optional[str], log: Deque[Event], event: Event):
+        if len(log) == log.maxlen:
+            self._dropped_upto[key] = log[0].id
+        log.append(event)
+
+    def set_floor(self, event_id: int):
+        """History up to event_id is unknown here (e.g. written by other processes before we started)"""
+        self.last_id = max(self.last_id, event_id)
+        self._floor = max(self._floor, event_id)
+
+    def publish(self, type: str, data: dict, task_id: Optional[str] = None,
+                event_id: Optional[int] = None) -> Event:
+        """Record and fan out an event; event_id comes from the broadcast backend if it assigns ids"""
+        event = Event(id=event_id or next(self._ids), type=type, data=data, task_id=task_id)
+        self.last_id = event.id
+        self._append(None, self._events, event)
+        if task_id is not None:
+            log = self._by_task.pop(task_id, None) or deque(maxlen=self._max_per_task)
+            self._append(task_id, log, event)
+            self._by_task[task_id] = log
+            while len(self._by_task) > self._max_tasks:
+                evicted, _ = self._by_task.popitem(last=False)
+                self._dropped_upto.pop(evicted, None)
+        for listener in self._listeners:
+            if listener.task_id is None or listener.task_id == task_id:
+                listener.outbox.put(event, coalesce_key(type, task_id))
+        return event
+
+    def replay(self, after_id: int, task_id: Optional[str] = None) -> Optional[List[Event]]:
+        """
+        Events newer than `after_id`, or None if some of them were already
+        dropped from the buffer (or the id is from before a restart), in
+        which case the client has to refetch its state.
+        """
+        if after_id > self.last_id or max(self._floor, self._dropped_upto.get(task_id, 0)) > after_id:
+            return None
+        log = self._events if task_id is None else self._by_task.get(task_id, ())
+        return [event for event in log if event.id > after_id]
+
+    def subscribe(self, task_id: Optional[str] = None) -> Listener:
+        listener = Listener(task_id)
+        self._listeners.add(listener)
+        return listener
+
+    def unsubscribe(self, listener: Listener):
+        self._listeners.discard(listener)
+
+event_log = EventLog(
+    max_events=settings.EVENT_LOG_SIZE,
+    max_events_per_task=settings.EVENT_LOG_SIZE_PER_TASK,
+    max_tasks=settings.EVENT_LOG_MAX_TASKS,
+)
@@ -0,0 +1,147 @@
+import asyncio
+import re
+import time
+from typing import Dict, Optional
+
+import httpx
+from github import GithubException
+
+from ..core.config import settings
+from ..core.metrics import GITHUB_RATE_LIMITED
+
+_REPO_RE = re.compile(r"^/repos/([^/]+/[^/]+)")
+
+def _repo_from_path(path: str) -> str:
+    match = _REPO_RE.match(path)
+    return match.group(1) if match else ""
+
+class GitHubRateScheduler:
+    """
+    Central pacing for GitHub API calls, driven by the rate-limit headers.
+
+    - Tracks the primary quota (X-RateLimit-*) from every response.
+    - When the quota drops below GITHUB_RATE_RESERVE, spreads the remaining
+      calls evenly until the reset instead of spending them in a burst.
+    - When GitHub signals a secondary limit (Retry-After, or a 403/429
+      mentioning it) or the quota is gone, holds every call until it is
+      safe to continue.
+    - Spaces write requests to the same repository GITHUB_WRITE_INTERVAL apart.
+
+    Callers wait in acquire(); a wait longer than GITHUB_MAX_RATE_WAIT_SECONDS
+    raises a 429 GithubException so the job fails (and can be retried)
+    rather than holding a worker indefinitely.
+    """
+
+    def __init__(self, reserve: int, write_interval: float, max_wait: float):
+        self.reserve = reserve
+        self.write_interval = write_interval
+        self.max_wait = max_wait
+        self.limit: Optional[int] = None
+        self.remaining: Optional[int] = None
+        self.reset_at = 0.0
+        self.paused_until = 0.0
+        self._low_budget_lock = asyncio.Lock()
+        self._repo_locks: Dict[str, asyncio.Lock] = {}
+        self._last_write: Dict[str, float] = {}
+        self.waiting = 0
+        self.deferred = 0
+        self.rate_limited = 0
+
+    def _blocked_for(self, now: float) -> float:
+        wait = self.paused_until - now
+        if self.remaining is not None and self.remaining <= 0 and self.reset_at > now:
+            wait = max(wait, self.reset_at - now)
+        return wait
+
+    async def acquire(self, method: str, path: str):
+        """Wait until a call may be sent"""
+        self.waiting += 1
+        try:
+            wait = self._blocked_for(time.time())
+            if wait > self.max_wait:
+                raise GithubException(429, {"message": f"GitHub rate limit: next slot in {wait:.0f}s"}, None)
+            if wait > 0:
+                self.deferred += 1
+                print(f"⏳ GitHub budget exhausted, waiting {wait:.0f}s")
+                while wait > 0:
+                    await asyncio.sleep(wait)
+                    wait = self._blocked_for(time.time())
+
+            if self.remaining is not None and self.remaining <= self.reserve:
+                # Low budget: one call at a time, evenly spread until the reset
+                async with self._low_budget_lock:
+                    pace = max(0.0, self.reset_at - time.time()) / max(1, self.remaining)
+                    await asyncio.sleep(min(pace, self.max_wait))
+            if self.remaining is not None:
+                self.remaining -= 1
+
+            if method.upper() != "GET":
+                await self._pace_write(_repo_from_path(path))
+        finally:
+            self.waiting -= 1
+
+    async def _pace_write(self, repo: str):
+        lock = self._repo_locks.setdefault(repo, asyncio.Lock())
+        async with lock:
+            wait = self._last_write.get(repo, 0.0) + self.write_interval - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            self._last_write[repo] = time.monotonic()
+        if len(self._last_write) > 1000:
+            cutoff = time.monotonic() - 60
+            for name, at in list(self._last_write.items()):
+                if at < cutoff and not self._repo_locks[name].locked():
+                    del self._last_write[name]
+                    del self._repo_locks[name]
+
+    def observe(self, response: httpx.Response) -> bool:
+        """
+        Update the budget from a response. Returns True if the response was
+        rate limited, in which case the call should be sent again.
+        """
+        headers = response.headers
+        if "x-ratelimit-remaining" in headers and headers.get("x-ratelimit-resource", "core") == "core":
+            try:
+                self.limit = int(headers["x-ratelimit-limit"])
+                self.remaining = int(headers["x-ratelimit-remaining"])
+                self.reset_at = float(headers["x-ratelimit-reset"])
+            except (KeyError, ValueError):
+                pass
+
+        if response.status_code not in (403, 429):
+            return False
+        now = time.time()
+        if "retry-after" in headers:
+            try:
+                pause = float(headers["retry-after"])
+            except ValueError:
+                pause = 60.0
+        elif headers.get("x-ratelimit-remaining") == "0":
+            pause = self.reset_at - now
+        elif "rate limit" in response.text.lower():
+            # Secondary limit without Retry-After: GitHub asks for at least a minute
+            pause = 60.0
+        else:
+            return False
+        self.rate_limited += 1
+        GITHUB_RATE_LIMITED.inc()
+        self.paused_until = max(self.paused_until, now + max(1.0, pause))
+        return True
+
+    def stats(self) -> dict:
+        now = time.time()
+        return {
+            "limit": self.limit,
+            "remaining": self.remaining,
+            "reset_in": round(max(0.0, self.reset_at - now)) if self.reset_at else None,
+            "paused_for": round(max(0.0, self._blocked_for(now)), 1),
+            "waiting": self.waiting,
+            "deferred": self.deferred,
+            "rate_limited": self.rate_limited,
+        }
+
+github_scheduler = GitHubRateScheduler(
+    reserve=settings.GITHUB_RATE_RESERVE,
+    write_interval=settings.GITHUB_WRITE_INTERVAL,
+    max_wait=settings.GITHUB_MAX_RATE_WAIT_SECONDS,
+)
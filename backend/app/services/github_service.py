@@ -1,24 +1,16 @@
-from github import Github, Auth, GithubException
+from github import GithubException
+import base64
+import hashlib
 import httpx
 from datetime import datetime
 from ..core.config import settings
+from ..core.http import http_pool
+from ..core.metrics import timed
+from .github_rate import github_scheduler
+from .repo_cache import repo_cache
 
-# Use the new authentication method
-auth = Auth.Token(settings.GITHUB_TOKEN)
-g = Github(auth=auth)
-
-def create_repo(repo_name: str, description: str = ""):
-    """Create a public repository with the given name."""
-    user = g.get_user()
-    # if repo exists, return it
-    try:
-        repo = user.get_repo(repo_name)
-        print("Repo already exists:", repo.full_name)
-        return repo
-    except GithubException:
-        pass
-
-    # Sanitize description - remove control characters and limit length
+def _clean_description(description: str) -> str:
+    """Sanitize description - remove control characters and limit length"""
     # GitHub doesn't allow newlines or other control characters in description
     if description:
         # Replace newlines and tabs with spaces
@@ -27,78 +19,22 @@ def create_repo(repo_name: str, description: str = ""):
         description = ''.join(char for char in description if ord(char) >= 32 or char in '\n\r\t')
         # Limit to 350 characters (GitHub's limit)
         description = description[:350].strip()
-    
-    repo = user.create_repo(
-        name=repo_name,
-        description=description or "Auto-generated application",
-        private=False,
-        auto_init=False
-    )
-    print("Created repo:", repo.full_name)
-    return repo
-
-def create_or_update_file(repo, path: str, content: str, message: str):
-    """Create a file or update if it already exists."""
-    try:
-        # Try to get file to see if exists
-        current = repo.get_contents(path)
-        sha = current.sha
-        repo.update_file(path, message, content, sha)
-        print(f"Updated {path} in {repo.full_name}")
-    except GithubException as e:
-        # If 404 (not found) then create
-        if e.status == 404:
-            repo.create_file(path, message, content)
-            print(f"Created {path} in {repo.full_name}")
-        else:
-            raise
+    return description or "Auto-generated application"
 
-def create_or_update_binary_file(repo, path: str, binary_content, commit_message: str):
-    """Create or update a binary file in the repository."""
-    try:
-        try:
-            current = repo.get_contents(path)
-            repo.update_file(
-                path=path,
-                message=commit_message,
-                content=binary_content,
-                sha=current.sha
-            )
-            print(f"Updated binary file {path} in {repo.full_name}")
-        except GithubException as e:
-            if e.status == 404:
-                repo.create_file(
-                    path=path,
-                    message=commit_message,
-                    content=binary_content
-                )
-                print(f"Created binary file {path} in {repo.full_name}")
-            else:
-                raise
-        return True
-    except Exception as e:
-        print(f"Error creating/updating binary file {path}: {e}")
-        return False
-
-def enable_pages(repo_name: str, branch: str = "main"):
-    """Enable GitHub Pages via REST API."""
-    url = f"https://api.github.com/repos/{settings.GITHUB_USERNAME}/{repo_name}/pages"
-    headers = {
-        "Authorization": f"token {settings.GITHUB_TOKEN}",
-        "Accept": "application/vnd.github.v3+json"
-    }
-    data = {"source": {"branch": branch, "path": "/"}}
-    try:
-        r = httpx.post(url, headers=headers, json=data, timeout=30.0)
-        if r.status_code in (201, 204):
-            print("✅ Pages enabled for", repo_name)
-            return True
-        else:
-            print("Pages API returned:", r.status_code, r.text)
-            return False
-    except Exception as e:
-        print("Failed to call Pages API:", e)
-        return False
+def git_blob_sha(content) -> str:
+    """SHA git would give this content as a blob, computed locally."""
+    if isinstance(content, str):
+        content = content.encode("utf-8")
+    return hashlib.sha1(b"blob %d\0" % len(content) + content).hexdigest()
+
+def _drop_unchanged(pending: dict, existing: dict) -> list:
+    """Remove files whose blob SHA matches the current tree; returns their paths."""
+    unchanged = [p for p, c in pending.items() if existing.get(p) == git_blob_sha(c)]
+    for path in unchanged:
+        del pending[path]
+    if unchanged:
+        print(f"Skipping {len(unchanged)} unchanged files: {', '.join(unchanged)}")
+    return unchanged
 
 def generate_mit_license(owner_name=None):
     year = datetime.utcnow().year
@@ -125,3 +61,243 @@ LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
 OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 SOFTWARE.
 """
+
+
+class AsyncGitHubClient:
+    """
+    Minimal async GitHub REST client used by the build pipeline.
+
+    Covers just what a build needs (repo lookup/creation, reading a file,
+    publishing a commit through the Git Data API, enabling Pages) so none of
+    it blocks the event loop. Errors are raised as PyGithub's GithubException.
+    Repository metadata and the branch head/tree are kept in the repo cache
+    between jobs.
+    """
+
+    def __init__(self, token: str = None, owner: str = None, base_url: str = "https://api.github.com"):
+        self.token = token if token is not None else settings.GITHUB_TOKEN
+        self.owner = owner if owner is not None else settings.GITHUB_USERNAME
+        self.base_url = base_url
+        self.cache = repo_cache
+        self.headers = {
+            "Authorization": f"token {self.token}",
+            "Accept": "application/vnd.github.v3+json",
+        }
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        # Shared keep-alive pool for api.github.com
+        return http_pool.client_for(self.base_url)
+
+    async def send(self, method: str, path: str, **kwargs) -> httpx.Response:
+        """
+        Raw request; returns the response whatever its status.
+        Paced by github_scheduler, and re-sent after a rate-limit wait.
+        """
+        for attempt in range(settings.GITHUB_RATE_LIMIT_RETRIES + 1):
+            await github_scheduler.acquire(method, path)
+            with timed("github_read" if method.upper() == "GET" else "github_write"):
+                r = await self.client.request(method, self.base_url + path, headers=self.headers, **kwargs)
+            if not github_scheduler.observe(r):
+                break
+            print(f"⏳ GitHub rate limited on {method} {path} (attempt {attempt + 1})")
+        return r
+
+    async def request(self, method: str, path: str, **kwargs) -> httpx.Response:
+        r = await self.send(method, path, **kwargs)
+        if r.status_code >= 400:
+            try:
+                data = r.json()
+            except ValueError:
+                data = {"message": r.text}
+            raise GithubException(r.status_code, data, dict(r.headers))
+        return r
+
+    def _repo_path(self, repo_name: str) -> str:
+        return f"/repos/{self.owner}/{repo_name}"
+
+    async def get_repo(self, repo_name: str) -> dict:
+        r = await self.request("GET", self._repo_path(repo_name))
+        return r.json()
+
+    async def create_repo(self, repo_name: str, description: str = "") -> dict:
+        """Return the repository, creating it (public, auto-initialised) if needed."""
+        state = self.cache.get(repo_name)
+        if state is not None:
+            return state.repo
+        try:
+            repo = await self.get_repo(repo_name)
+            print("Repo already exists:", repo["full_name"])
+        except GithubException as e:
+            if e.status != 404:
+                raise
+            r = await self.request("POST", "/user/repos", json={
+                "name": repo_name,
+                "description": _clean_description(description),
+                "private": False,
+                "auto_init": True,
+            })
+            repo = r.json()
+            print("Created repo:", repo["full_name"])
+        self.cache.put(repo_name, repo, repo.get("default_branch"))
+        return repo
+
+    async def get_file_text(self, repo_name: str, path: str):
+        """Return a file's text content, or None if it does not exist."""
+        # A cached tree answers "does it exist" and, for small files, the content too
+        state = self.cache.get(repo_name)
+        if state is not None and state.blobs is not None:
+            sha = state.blobs.get(path)
+            if sha is None:
+                return None
+            text = self.cache.get_blob(sha)
+            if text is not None:
+                return text
+        try:
+            r = await self.request("GET", f"{self._repo_path(repo_name)}/contents/{path}")
+        except GithubException as e:
+            if e.status == 404:
+                return None
+            raise
+        data = r.json()
+        text = base64.b64decode(data.get("content", "")).decode("utf-8", errors="ignore")
+        if data.get("sha"):
+            self.cache.put_blob(data["sha"], text)
+        return text
+
+    async def create_blob(self, repo_name: str, content) -> str:
+        """Upload one blob (str or bytes) and return its SHA."""
+        if isinstance(content, str):
+            content = content.encode("utf-8")
+        r = await self.request("POST", f"{self._repo_path(repo_name)}/git/blobs", json={
+            "content": base64.b64encode(content).decode("ascii"),
+            "encoding": "base64",
+        })
+        return r.json()["sha"]
+
+    async def publish_files(self, repo_name: str, files: dict, message: str, branch: str = "main",
+                            blob_shas: dict = None):
+        """
+        Commit a batch of files in one go using the Git Data API: blobs for
+        binary content, one tree, one commit and a single ref update, skipping
+        files that are unchanged. files maps path -> str (text) or bytes.
+        Returns the resulting head commit SHA.
+        blob_shas maps paths to blobs that were already uploaded (see create_blob).
+
+        The branch head and tree come from the repo cache when we know them
+        (typically from our previous commit); if GitHub rejects the commit
+        because the branch moved meanwhile, it is retried once with fresh reads.
+        """
+        state = self.cache.get(repo_name)
+        cached = state is not None and state.default_branch == branch and state.head_sha and state.tree_sha
+        try:
+            return await self._publish(repo_name, files, message, branch, blob_shas or {}, state if cached else None)
+        except GithubException as e:
+            self.cache.invalidate(repo_name)
+            # 404/409/422: the cached head or tree is gone or no longer the branch tip
+            if not cached or e.status not in (404, 409, 422):
+                raise
+            print(f"🔄 Cached head of {repo_name}@{branch} is stale, retrying with fresh reads")
+            # The repository itself is fine; only its head is re-read
+            self.cache.put(repo_name, state.repo, state.default_branch)
+            return await self._publish(repo_name, files, message, branch, blob_shas or {}, None)
+
+    async def _publish(self, repo_name: str, files: dict, message: str, branch: str, blob_shas: dict, state):
+        pending = dict(files)
+        if not pending:
+            return None
+        repo_path = self._repo_path(repo_name)
+
+        if state is not None:
+            head_sha, base_tree, existing = state.head_sha, state.tree_sha, state.blobs
+        else:
+            try:
+                # The branch carries both the head commit and its tree
+                with timed("commit_lookup"):
+                    r = await self.request("GET", f"{repo_path}/branches/{branch}")
+                head = r.json()["commit"]
+                head_sha, base_tree = head["sha"], head["commit"]["tree"]["sha"]
+            except GithubException as e:
+                # 409 = empty repository, 404 = branch missing
+                if e.status not in (404, 409):
+                    raise
+                path, content = next(iter(pending.items()))
+                if isinstance(content, str):
+                    content = content.encode("utf-8")
+                r = await self.request("PUT", f"{repo_path}/contents/{path}", json={
+                    "message": message,
+                    "content": base64.b64encode(content).decode("ascii"),
+                    "branch": branch,
+                })
+                del pending[path]
+                seeded = r.json()
+                head_sha = seeded["commit"]["sha"]
+                print(f"Seeded {branch} with {path} in {repo_name}")
+                if not pending:
+                    return head_sha
+                base_tree = (seeded["commit"].get("tree") or {}).get("sha")
+                if base_tree is None:
+                    r = await self.request("GET", f"{repo_path}/git/commits/{head_sha}")
+                    base_tree = r.json()["tree"]["sha"]
+
+            # Diff against the current tree so unchanged files are not rewritten
+            r = await self.request("GET", f"{repo_path}/git/trees/{base_tree}", params={"recursive": "1"})
+            existing = {e["path"]: e["sha"] for e in r.json().get("tree", []) if e.get("type") == "blob"}
+            self.cache.set_head(repo_name, head_sha, base_tree, existing)
+
+        _drop_unchanged(pending, existing)
+        if not pending:
+            print(f"No changes to commit in {self.owner}/{repo_name}@{branch}")
+            return head_sha
+
+        tree = []
+        blobs = dict(existing)
+        for path, content in pending.items():
+            if path in blob_shas:
+                sha = blob_shas[path]
+                tree.append({"path": path, "mode": "100644", "type": "blob", "sha": sha})
+            elif isinstance(content, bytes):
+                sha = await self.create_blob(repo_name, content)
+                tree.append({"path": path, "mode": "100644", "type": "blob", "sha": sha})
+            else:
+                sha = git_blob_sha(content)
+                tree.append({"path": path, "mode": "100644", "type": "blob", "content": content})
+                self.cache.put_blob(sha, content)
+            blobs[path] = sha
+
+        r = await self.request("POST", f"{repo_path}/git/trees", json={"base_tree": base_tree, "tree": tree})
+        tree_sha = r.json()["sha"]
+        r = await self.request("POST", f"{repo_path}/git/commits", json={
+            "message": message,
+            "tree": tree_sha,
+            "parents": [head_sha],
+        })
+        commit_sha = r.json()["sha"]
+        await self.request("PATCH", f"{repo_path}/git/refs/heads/{branch}", json={"sha": commit_sha})
+        self.cache.set_head(repo_name, commit_sha, tree_sha, blobs)
+        print(f"Committed {len(pending)} files to {self.owner}/{repo_name}@{branch} ({commit_sha[:7]})")
+        return commit_sha
+
+    async def enable_pages(self, repo_name: str, branch: str = "main") -> bool:
+        data = {"source": {"branch": branch, "path": "/"}}
+        try:
+            r = await self.send("POST", f"{self._repo_path(repo_name)}/pages", json=data)
+            if r.status_code in (201, 204):
+                print("✅ Pages enabled for", repo_name)
+                return True
+            print("Pages API returned:", r.status_code, r.text)
+            return False
+        except Exception as e:
+            print("Failed to call Pages API:", e)
+            return False
+
+    async def get_latest_pages_build(self, repo_name: str):
+        """The latest Pages build ({"status", "commit", ...}), or None if Pages is not enabled."""
+        r = await self.send("GET", f"{self._repo_path(repo_name)}/pages/builds/latest")
+        if r.status_code == 404:
+            return None
+        if r.status_code >= 400:
+            raise GithubException(r.status_code, {"message": r.text}, dict(r.headers))
+        return r.json()
+
+github_client = AsyncGitHubClient()
@@ -0,0 +1,218 @@
+import asyncio
+import os
+import socket
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from sqlalchemy import or_, and_
+from sqlalchemy.orm import Session
+
+from ..core.config import settings
+from ..core.database import SessionLocal
+from ..core.metrics import STAGE_WAIT_SECONDS
+from ..models.job import Job, JobStatus
+
+JobHandler = Callable[[dict], Awaitable[None]]
+
+# How often a worker deletes finished jobs past JOB_RETENTION_SECONDS
+PRUNE_INTERVAL_SECONDS = 3600
+
+# === Per-stage concurrency limits ===
+_stage_limits: Dict[str, int] = {
+    "llm": settings.LLM_CONCURRENCY,
+    "github": settings.GITHUB_CONCURRENCY,
+    "notify": settings.NOTIFY_CONCURRENCY,
+}
+_stage_semaphores: Dict[str, asyncio.Semaphore] = {}
+
+@asynccontextmanager
+async def stage(name: str):
+    """Hold one slot of the named stage ("llm", "github", "notify") while running"""
+    sem = _stage_semaphores.get(name)
+    if sem is None:
+        sem = _stage_semaphores[name] = asyncio.Semaphore(max(1, _stage_limits.get(name, 1)))
+    queued_at = time.perf_counter()
+    async with sem:
+        STAGE_WAIT_SECONDS.observe(name, value=time.perf_counter() - queued_at)
+        yield
+
+def enqueue_job(db: Session, task_id: str, payload: dict) -> Job:
+    """Persist a build job; a worker picks it up on its next poll"""
+    job = Job(task_id=task_id, payload=payload, status=JobStatus.QUEUED)
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    job_queue.wake()
+    return job
+
+def retry_delay(attempts: int) -> float:
+    """Backoff before the next try of a job that has failed `attempts` times"""
+    return min(settings.JOB_RETRY_BASE_SECONDS * 2 ** (attempts - 1), settings.JOB_RETRY_MAX_SECONDS)
+
+class JobQueue:
+    """
+    Bounded pool of asyncio workers draining the `jobs` table.
+
+    A worker claims a job by taking a lease on it and keeps renewing the lease
+    while the job runs. If the process dies, the lease runs out and the job
+    becomes claimable again, so nothing is lost across restarts. A job whose
+    handler raises is requeued with exponential backoff until
+    JOB_MAX_ATTEMPTS; finished jobs are pruned after JOB_RETENTION_SECONDS.
+    """
+
+    def __init__(self):
+        self.owner_prefix = f"{socket.gethostname()}:{os.getpid()}"
+        self._workers: List[asyncio.Task] = []
+        self._wake: Optional[asyncio.Event] = None
+        self._stopping = False
+        self._pruned_at = 0.0
+
+    def start(self, handler: JobHandler, workers: Optional[int] = None):
+        if self._workers:
+            return
+        self._stopping = False
+        self._wake = asyncio.Event()
+        count = workers or settings.JOB_WORKERS
+        for n in range(count):
+            owner = f"{self.owner_prefix}:{n}"
+            self._workers.append(asyncio.create_task(self._worker(owner, handler)))
+        print(f"👷 Started {count} job workers")
+
+    async def stop(self):
+        self._stopping = True
+        self.wake()
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    def wake(self):
+        if self._wake is not None:
+            self._wake.set()
+
+    async def _worker(self, owner: str, handler: JobHandler):
+        while not self._stopping:
+            job = await asyncio.to_thread(self._claim, owner)
+            if job is None:
+                if time.monotonic() - self._pruned_at > PRUNE_INTERVAL_SECONDS:
+                    self._pruned_at = time.monotonic()
+                    await asyncio.to_thread(self._prune)
+                await self._idle()
+                continue
+
+            job_id, payload = job
+            heartbeat = asyncio.create_task(self._heartbeat(job_id, owner))
+            try:
+                await handler(payload)
+            except asyncio.CancelledError:
+                # Shutting down: leave the lease to expire so the job is retried
+                raise
+            except Exception as e:
+                print(f"❌ Job {job_id} failed: {e}")
+                await asyncio.to_thread(self._finish, job_id, owner, str(e))
+            else:
+                await asyncio.to_thread(self._finish, job_id, owner, None)
+            finally:
+                heartbeat.cancel()
+
+    async def _idle(self):
+        try:
+            await asyncio.wait_for(self._wake.wait(), timeout=settings.JOB_POLL_INTERVAL)
+        except asyncio.TimeoutError:
+            pass
+        self._wake.clear()
+
+    async def _heartbeat(self, job_id: int, owner: str):
+        interval = max(1, settings.JOB_LEASE_SECONDS // 3)
+        while True:
+            await asyncio.sleep(interval)
+            await asyncio.to_thread(self._renew, job_id, owner)
+
+    def _claim(self, owner: str):
+        """Atomically lease the oldest available job; returns (id, payload) or None"""
+        now = datetime.utcnow()
+        claimable = or_(
+            and_(Job.status == JobStatus.QUEUED, or_(Job.not_before.is_(None), Job.not_before <= now)),
+            and_(Job.status == JobStatus.RUNNING, Job.lease_expires_at < now),
+        )
+        db = SessionLocal()
+        try:
+            candidates = db.query(Job.id).filter(claimable).order_by(Job.id).limit(5).all()
+            for (job_id,) in candidates:
+                # Conditional update: only one worker can win the row
+                claimed = db.query(Job).filter(Job.id == job_id, claimable).update({
+                    Job.status: JobStatus.RUNNING,
+                    Job.lease_owner: owner,
+                    Job.lease_expires_at: now + timedelta(seconds=settings.JOB_LEASE_SECONDS),
+                    Job.attempts: Job.attempts + 1,
+                }, synchronize_session=False)
+                db.commit()
+                if not claimed:
+                    continue
+
+                job = db.get(Job, job_id)
+                if job.attempts > settings.JOB_MAX_ATTEMPTS:
+                    job.status = JobStatus.FAILED
+                    job.last_error = job.last_error or "Lease expired too many times"
+                    job.finished_at = now
+                    db.commit()
+                    print(f"❌ Job {job_id} for {job.task_id} gave up after {job.attempts - 1} attempts")
+                    continue
+                if job.attempts > 1:
+                    print(f"♻ Recovered job {job_id} for {job.task_id} (attempt {job.attempts})")
+                return job.id, dict(job.payload)
+            return None
+        finally:
+            db.close()
+
+    def _renew(self, job_id: int, owner: str):
+        db = SessionLocal()
+        try:
+            db.query(Job).filter(Job.id == job_id, Job.lease_owner == owner).update({
+                Job.lease_expires_at: datetime.utcnow() + timedelta(seconds=settings.JOB_LEASE_SECONDS),
+            }, synchronize_session=False)
+            db.commit()
+        finally:
+            db.close()
+
+    def _finish(self, job_id: int, owner: str, error: Optional[str]):
+        db = SessionLocal()
+        try:
+            job = db.query(Job).filter(Job.id == job_id, Job.lease_owner == owner).first()
+            if not job:
+                return
+            if error and job.attempts < settings.JOB_MAX_ATTEMPTS:
+                # Put it back for another worker once the backoff has passed
+                delay = retry_delay(job.attempts)
+                job.status = JobStatus.QUEUED
+                job.lease_owner = None
+                job.lease_expires_at = None
+                job.not_before = datetime.utcnow() + timedelta(seconds=delay)
+                print(f"⏳ Job {job_id} for {job.task_id} will be retried in {delay:g}s")
+            else:
+                job.status = JobStatus.FAILED if error else JobStatus.DONE
+                job.finished_at = datetime.utcnow()
+            job.last_error = error
+            db.commit()
+        finally:
+            db.close()
+
+    def _prune(self):
+        """Delete done and failed jobs that finished more than JOB_RETENTION_SECONDS ago"""
+        cutoff = datetime.utcnow() - timedelta(seconds=settings.JOB_RETENTION_SECONDS)
+        db = SessionLocal()
+        try:
+            removed = db.query(Job).filter(
+                Job.status.in_([JobStatus.DONE, JobStatus.FAILED]),
+                Job.finished_at < cutoff,
+            ).delete(synchronize_session=False)
+            db.commit()
+            if removed:
+                print(f"🧹 Pruned {removed} finished jobs")
+            return removed
+        finally:
+            db.close()
+
+job_queue = JobQueue()
@@ -0,0 +1,115 @@
+import hashlib
+import os
+import time
+from pathlib import Path
+from typing import Optional
+
+from ..core.config import settings
+
+def file_digest(path: str) -> str:
+    """sha256 of a file, read in chunks"""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+class LLMCache:
+    """
+    Content-addressed on-disk cache of model responses.
+
+    Entries are keyed by a hash of everything that determines the output
+    (model name, exact prompt, attachment digests), expire after `ttl`
+    seconds and are evicted least-recently-used first once the directory
+    grows past `max_bytes`.
+    """
+
+    def __init__(self, directory: Path, ttl: int, max_bytes: int, enabled: bool = True):
+        self.directory = Path(directory)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        if self.enabled:
+            self.directory.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def make_key(model_name: str, prompt: str, attachment_digests=()) -> str:
+        h = hashlib.sha256()
+        for part in (model_name, prompt, *sorted(attachment_digests)):
+            h.update(part.encode("utf-8"))
+            h.update(b"\0")
+        return h.hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.txt"
+
+    def get(self, key: str) -> Optional[str]:
+        if not self.enabled:
+            return None
+        path = self._path(key)
+        try:
+            if time.time() - path.stat().st_mtime > self.ttl:
+                path.unlink(missing_ok=True)
+                self.misses += 1
+                return None
+            text = path.read_text(encoding="utf-8")
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        # Bump access time for LRU eviction
+        now = time.time()
+        os.utime(path, (now, path.stat().st_mtime))
+        self.hits += 1
+        return text
+
+    def set(self, key: str, text: str):
+        if not self.enabled or not text:
+            return
+        path = self._path(key)
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_text(text, encoding="utf-8")
+        os.replace(tmp, path)
+        self._evict()
+
+    def _evict(self):
+        entries = []
+        total = 0
+        now = time.time()
+        for p in self.directory.glob("*.txt"):
+            try:
+                st = p.stat()
+            except FileNotFoundError:
+                continue
+            if now - st.st_mtime > self.ttl:
+                p.unlink(missing_ok=True)
+                self.evictions += 1
+                continue
+            entries.append((st.st_atime, st.st_size, p))
+            total += st.st_size
+
+        entries.sort()
+        while total > self.max_bytes and entries:
+            _, size, p = entries.pop(0)
+            p.unlink(missing_ok=True)
+            total -= size
+            self.evictions += 1
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "evictions": self.evictions,
+        }
+
+llm_cache = LLMCache(
+    settings.LLM_CACHE_DIR,
+    ttl=settings.LLM_CACHE_TTL_SECONDS,
+    max_bytes=settings.LLM_CACHE_MAX_BYTES,
+    enabled=settings.LLM_CACHE_ENABLED,
+)
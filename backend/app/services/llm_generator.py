@@ -1,72 +1,50 @@
 import os
-import base64
+import re
+import json
+import time
+import asyncio
 from pathlib import Path
 from dotenv import load_dotenv
 import google.generativeai as genai
 from ..core.config import settings
+from ..core.metrics import LLM_FALLBACKS, timed
+from .llm_cache import llm_cache, file_digest
+from .attachments import decode_attachments
+from .prompt_budget import count_tokens, fit_prompt_inputs, summarize_attachments
+from .rate_limiter import llm_limiter
 
 load_dotenv()
 
+MODEL_NAME = "gemini-2.5-flash"
+README_MARKER = "---README.md---"
+PROGRESS_EVERY_BYTES = 4096
+
+# Multi-file generation: what the planner may emit, and the plan used if it fails
+PLAN_PATH_RE = re.compile(r"^[A-Za-z0-9_-]+(/[A-Za-z0-9_-]+)*\.(html|css|js|md)$")
+DEFAULT_PLAN = {
+    "files": [
+        {"path": "index.html", "purpose": "Page markup; links style.css and loads app.js"},
+        {"path": "style.css", "purpose": "All styling"},
+        {"path": "app.js", "purpose": "All behaviour and data handling"},
+        {"path": "README.md", "purpose": "Overview, Setup, Usage"},
+    ],
+    "contract": "index.html defines the element ids used by app.js; app.js runs on DOMContentLoaded.",
+}
+
 # Configure Google Gemini API
 if settings.GEMINI_API_KEY:
     genai.configure(api_key=settings.GEMINI_API_KEY)
-    model = genai.GenerativeModel('gemini-2.5-flash')
-    print("✅ Using Google Gemini API (gemini-2.5-flash)")
+    model = genai.GenerativeModel(MODEL_NAME)
+    print(f"✅ Using Google Gemini API ({MODEL_NAME})")
 else:
     model = None
     print("⚠️  No Gemini API key configured - will use fallback mode")
 
-def decode_attachments(attachments):
-    """
-    attachments: list of {name, url: data:<mime>;base64,<b64>}
-    Saves files into temp directory
-    Returns list of dicts: {"name": name, "path": "/tmp/..", "mime": mime, "size": n}
-    """
-    saved = []
-    for att in attachments or []:
-        name = att.get("name") or "attachment"
-        url = att.get("url", "")
-        if not url.startswith("data:"):
-            continue
-        try:
-            header, b64data = url.split(",", 1)
-            mime = header.split(";")[0].replace("data:", "")
-            data = base64.b64decode(b64data)
-            path = settings.TEMP_DIR / name
-            with open(path, "wb") as f:
-                f.write(data)
-            saved.append({
-                "name": name,
-                "path": str(path),
-                "mime": mime,
-                "size": len(data)
-            })
-        except Exception as e:
-            print("Failed to decode attachment", name, e)
-    return saved
-
-def summarize_attachment_meta(saved):
+def summarize_attachment_meta(saved, max_tokens=None):
     """Returns a short human-readable summary string for the prompt."""
-    summaries = []
-    for s in saved:
-        nm = s["name"]
-        p = s["path"]
-        mime = s.get("mime", "")
-        try:
-            if mime.startswith("text") or nm.endswith((".md", ".txt", ".json", ".csv")):
-                with open(p, "r", encoding="utf-8", errors="ignore") as f:
-                    if nm.endswith(".csv"):
-                        lines = [next(f).strip() for _ in range(3)]
-                        preview = "\\n".join(lines)
-                    else:
-                        data = f.read(1000)
-                        preview = data.replace("\n", "\\n")[:1000]
-                summaries.append(f"- {nm} ({mime}): preview: {preview}")
-            else:
-                summaries.append(f"- {nm} ({mime}): {s['size']} bytes")
-        except Exception as e:
-            summaries.append(f"- {nm} ({mime}): (could not read preview: {e})")
-    return "\\n".join(summaries)
+    if max_tokens is None:
+        max_tokens = settings.LLM_PROMPT_TOKEN_BUDGET // 3
+    return summarize_attachments(saved, max_tokens)
 
 def _strip_code_block(text: str) -> str:
     """If text is inside triple-backticks, return inner contents."""
@@ -97,16 +75,13 @@ def generate_readme_fallback(brief: str, checks=None, attachments_meta=None, rou
 This README was generated as a fallback.
 """
 
-def generate_app_code(brief: str, attachments=None, checks=None, round_num=1, prev_readme=None):
-    """Generate or revise an app using Google Gemini API."""
-    saved = decode_attachments(attachments or [])
-    attachments_meta = summarize_attachment_meta(saved)
-
+def build_prompt(brief: str, attachments_meta: str, checks=None, round_num=1, prev_readme=None) -> str:
+    """Build the Gemini prompt for a round."""
     context_note = ""
     if round_num == 2 and prev_readme:
         context_note = f"\n### Previous README.md:\n{prev_readme}\n\nRevise and enhance this project according to the new brief below.\n"
 
-    user_prompt = f"""
+    return f"""
 You are a professional web developer assistant that outputs runnable web apps.
 
 ### Round
@@ -136,17 +111,8 @@ You are a professional web developer assistant that outputs runnable web apps.
 4. Do not include any commentary outside code or README.
 """
 
-    try:
-        if not model:
-            raise Exception("No Gemini API client configured")
-        
-        print("🤖 Calling Gemini API...")
-        response = model.generate_content(user_prompt)
-        text = response.text or ""
-        print(f"✅ Generated code using Google Gemini API ({len(text)} chars).")
-    except Exception as e:
-        print(f"⚠ Gemini API failed, using fallback HTML instead: {e}")
-        text = f"""
+def _fallback_text(brief: str, checks, attachments_meta, round_num) -> str:
+    return f"""
 <html>
   <head><title>Fallback App</title></head>
   <body>
@@ -159,13 +125,323 @@ You are a professional web developer assistant that outputs runnable web apps.
 {generate_readme_fallback(brief, checks, attachments_meta, round_num)}
 """
 
-    if "---README.md---" in text:
-        code_part, readme_part = text.split("---README.md---", 1)
+def _split_output(text: str, brief: str, checks, attachments_meta, round_num) -> dict:
+    """Split model output into the files dict."""
+    if README_MARKER in text:
+        code_part, readme_part = text.split(README_MARKER, 1)
         code_part = _strip_code_block(code_part)
         readme_part = _strip_code_block(readme_part)
     else:
         code_part = _strip_code_block(text)
         readme_part = generate_readme_fallback(brief, checks, attachments_meta, round_num)
 
-    files = {"index.html": code_part, "README.md": readme_part}
+    return {"index.html": code_part, "README.md": readme_part}
+
+def _cache_key(user_prompt: str, saved) -> str:
+    """Cache key: model + exact prompt + attachment contents."""
+    digests = []
+    for s in saved:
+        try:
+            digests.append(s.get("sha256") or file_digest(s["path"]))
+        except OSError:
+            digests.append(s["name"])
+    return llm_cache.make_key(MODEL_NAME, user_prompt, digests)
+
+class StreamingOutputParser:
+    """
+    Incrementally splits a streamed response into the index.html and README parts.
+
+    Only the last few characters are rescanned per chunk, so finding the
+    README marker costs O(chunk) rather than O(total) on every feed().
+    """
+
+    def __init__(self):
+        self.parts = []
+        self.received = 0
+        self.section = "index.html"
+        self.code = None
+        self._tail = ""
+
+    def feed(self, chunk: str) -> bool:
+        """Add a chunk. Returns True when the index.html part has just completed."""
+        self.parts.append(chunk)
+        self.received += len(chunk.encode("utf-8"))
+        if self.code is not None:
+            return False
+
+        window = self._tail + chunk
+        if README_MARKER not in window:
+            self._tail = window[-(len(README_MARKER) - 1):]
+            return False
+
+        self.code = _strip_code_block(self.text.split(README_MARKER, 1)[0])
+        self.section = "README.md"
+        return True
+
+    @property
+    def text(self) -> str:
+        return "".join(self.parts)
+
+async def generate_app_code_async(brief: str, attachments=None, checks=None, round_num=1, prev_readme=None,
+                                  on_progress=None, on_code_ready=None, saved_attachments=None):
+    """
+    Generate or revise an app using Google Gemini API.
+    Pass saved_attachments (from decode_attachments) to avoid decoding twice.
+
+    With LLM_STREAMING on, the response is streamed: on_progress(bytes, section)
+    is awaited as chunks arrive and on_code_ready(index_html) is called as soon
+    as the README marker shows up, before the README itself is done.
+    """
+    saved = saved_attachments
+    if saved is None:
+        saved = await asyncio.to_thread(decode_attachments, attachments or [])
+    with timed("prompt_build"):
+        inputs = await asyncio.to_thread(fit_prompt_inputs, brief, saved, checks, prev_readme)
+        attachments_meta = inputs.attachments_meta
+        user_prompt = build_prompt(inputs.brief, attachments_meta, inputs.checks, round_num, inputs.prev_readme)
+        cache_key = await asyncio.to_thread(_cache_key, user_prompt, saved)
+    print(f"📏 Prompt ~{count_tokens(user_prompt)} tokens {inputs.tokens}")
+    # One retry deadline for every Gemini call this job makes
+    deadline = time.monotonic() + settings.LLM_RETRY_DEADLINE_SECONDS
+
+    if model and settings.LLM_MULTI_FILE and len(brief) >= settings.LLM_MULTI_FILE_MIN_BRIEF_CHARS:
+        try:
+            files = await generate_app_files_parallel(
+                inputs.brief, saved, attachments_meta, inputs.checks, round_num, inputs.prev_readme,
+                on_progress=on_progress, on_code_ready=on_code_ready, deadline=deadline
+            )
+            return {"files": files, "attachments": saved}
+        except Exception as e:
+            print(f"⚠ Multi-file generation failed, falling back to a single call: {e}")
+            LLM_FALLBACKS.inc("single_call")
+
+    try:
+        if not model:
+            raise Exception("No Gemini API client configured")
+        
+        text = await asyncio.to_thread(llm_cache.get, cache_key)
+        if text is not None:
+            print(f"⚡ Using cached Gemini response ({len(text)} chars).")
+        elif settings.LLM_STREAMING:
+            print("🤖 Streaming from Gemini API...")
+            with timed("gemini_call"):
+                text = await _stream_generate(user_prompt, on_progress, on_code_ready, deadline)
+            await asyncio.to_thread(llm_cache.set, cache_key, text)
+            print(f"✅ Generated code using Google Gemini API ({len(text)} chars).")
+        else:
+            print("🤖 Calling Gemini API (async)...")
+            with timed("gemini_call"):
+                response = await llm_limiter.call(lambda: model.generate_content_async(user_prompt), deadline)
+            text = response.text or ""
+            await asyncio.to_thread(llm_cache.set, cache_key, text)
+            print(f"✅ Generated code using Google Gemini API ({len(text)} chars).")
+    except Exception as e:
+        print(f"⚠ Gemini API failed, using fallback HTML instead: {e}")
+        LLM_FALLBACKS.inc("static_page")
+        text = _fallback_text(brief, checks, attachments_meta, round_num)
+
+    files = _split_output(text, brief, checks, attachments_meta, round_num)
     return {"files": files, "attachments": saved}
+
+async def _stream_generate(user_prompt: str, on_progress=None, on_code_ready=None, deadline=None) -> str:
+    parser = StreamingOutputParser()
+    reported = 0
+    # Quota errors surface when the stream is opened, so that is what gets retried
+    response = await llm_limiter.call(lambda: model.generate_content_async(user_prompt, stream=True), deadline)
+    async for chunk in response:
+        try:
+            piece = chunk.text
+        except ValueError:
+            # Chunks without text parts (e.g. the final finish_reason chunk)
+            continue
+        code_done = parser.feed(piece)
+        if code_done and on_code_ready:
+            on_code_ready(parser.code)
+        if on_progress and (code_done or parser.received - reported >= PROGRESS_EVERY_BYTES):
+            reported = parser.received
+            await on_progress(parser.received, parser.section)
+    return parser.text
+
+# === Multi-file generation (planner + parallel per-file calls) ===
+
+def build_plan_prompt(brief: str, attachments_meta: str, checks=None, round_num=1, prev_readme=None) -> str:
+    """Prompt asking for a file plan and the shared contract between files."""
+    context_note = f"\n### Previous README.md:\n{prev_readme}\n" if round_num == 2 and prev_readme else ""
+    return f"""
+You are planning a static web app that will be written file by file, in parallel,
+by developers who cannot see each other's work.
+
+### Round
+{round_num}
+
+### Task
+{brief}
+{context_note}
+### Attachments (if any)
+{attachments_meta}
+
+### Evaluation checks
+{checks or []}
+
+Reply with JSON only, in this shape:
+{{"files": [{{"path": "index.html", "purpose": "..."}}, ...], "contract": "..."}}
+
+Rules:
+1. At most {settings.LLM_MAX_PLANNED_FILES} files; only .html, .css, .js and .md paths.
+2. Always include index.html and README.md.
+3. "contract" lists everything the files must agree on: element ids, CSS class
+   names, global function names, data formats and which files index.html loads.
+"""
+
+def _strip_outer_fence(text: str) -> str:
+    """Drop a ```lang ... ``` wrapper around a whole file, keeping inner code blocks."""
+    text = text.strip()
+    if text.startswith("```"):
+        text = text.split("\n", 1)[1] if "\n" in text else ""
+        if text.rstrip().endswith("```"):
+            text = text.rstrip()[:-3]
+    return text.strip()
+
+def _parse_plan(text: str) -> dict:
+    """Validate the planner's JSON; anything unusable falls back to DEFAULT_PLAN."""
+    try:
+        plan = json.loads(_strip_outer_fence(text))
+        files = [
+            {"path": f["path"], "purpose": str(f.get("purpose", ""))}
+            for f in plan.get("files", [])
+            if isinstance(f, dict) and PLAN_PATH_RE.match(str(f.get("path", "")))
+        ]
+        contract = str(plan.get("contract", ""))
+    except (ValueError, AttributeError, TypeError):
+        return DEFAULT_PLAN
+
+    unique = {}
+    for f in files:
+        unique.setdefault(f["path"], f)
+    files = list(unique.values())
+    seen = set(unique)
+    for required in ("index.html", "README.md"):
+        if required not in seen:
+            files.append(next(f for f in DEFAULT_PLAN["files"] if f["path"] == required))
+    if len(files) > settings.LLM_MAX_PLANNED_FILES:
+        keep = {"index.html", "README.md"}
+        extra = [f for f in files if f["path"] not in keep]
+        files = [f for f in files if f["path"] in keep] + extra[:settings.LLM_MAX_PLANNED_FILES - len(keep)]
+    return {"files": files, "contract": contract or DEFAULT_PLAN["contract"]}
+
+def build_file_prompt(path: str, plan: dict, brief: str, attachments_meta: str, checks=None,
+                      round_num=1, prev_readme=None) -> str:
+    """Prompt for one planned file, carrying the whole plan so the parts fit together."""
+    listing = "\n".join(f"- {f['path']}: {f['purpose']}" for f in plan["files"])
+    context_note = ""
+    if round_num == 2 and prev_readme:
+        context_note = f"\n### Previous README.md:\n{prev_readme}\n\nRevise and enhance this project according to the new brief.\n"
+    readme_note = ""
+    if path == "README.md":
+        readme_note = "README.md must include Overview, Setup and Usage; in Round 2 describe the improvements.\n"
+
+    return f"""
+You are a professional web developer writing one file of a static web app.
+
+### Round
+{round_num}
+
+### Task
+{brief}
+{context_note}
+### Attachments (if any)
+{attachments_meta}
+
+### Evaluation checks
+{checks or []}
+
+### Files in this app
+{listing}
+
+### Contract all files follow
+{plan["contract"]}
+
+### Your file
+Write the complete contents of `{path}` and nothing else: no commentary and no other files.
+Follow the contract exactly so it works with the files written by others.
+{readme_note}"""
+
+def _link_assets(html: str, paths) -> str:
+    """Make sure index.html loads every planned stylesheet and script."""
+    head_tags, body_tags = [], []
+    for path in paths:
+        if path.endswith(".css") and path not in html:
+            head_tags.append(f'<link rel="stylesheet" href="{path}">')
+        elif path.endswith(".js") and path not in html:
+            body_tags.append(f'<script src="{path}"></script>')
+    if head_tags:
+        tags = "\n".join(head_tags)
+        html = html.replace("</head>", f"{tags}\n</head>", 1) if "</head>" in html else f"{tags}\n{html}"
+    if body_tags:
+        tags = "\n".join(body_tags)
+        html = html.replace("</body>", f"{tags}\n</body>", 1) if "</body>" in html else f"{html}\n{tags}"
+    return html
+
+async def _generate_cached(prompt: str, saved, deadline=None, **kwargs) -> str:
+    """One non-streamed Gemini call through the response cache and rate limiter."""
+    key = await asyncio.to_thread(_cache_key, prompt, saved)
+    text = await asyncio.to_thread(llm_cache.get, key)
+    if text is None:
+        with timed("gemini_call"):
+            response = await llm_limiter.call(lambda: model.generate_content_async(prompt, **kwargs), deadline)
+        text = response.text or ""
+        await asyncio.to_thread(llm_cache.set, key, text)
+    return text
+
+async def generate_app_files_parallel(brief: str, saved, attachments_meta: str, checks=None, round_num=1,
+                                      prev_readme=None, on_progress=None, on_code_ready=None, deadline=None) -> dict:
+    """
+    Plan the app's files with one short call, then generate every file
+    concurrently (at most LLM_PARALLEL_REQUESTS in flight) and assemble them.
+
+    on_code_ready(index_html) fires as soon as index.html is done and
+    on_progress(bytes, path) after each file.
+    """
+    plan_text = await _generate_cached(
+        build_plan_prompt(brief, attachments_meta, checks, round_num, prev_readme), saved, deadline,
+        generation_config={"response_mime_type": "application/json"},
+    )
+    plan = _parse_plan(plan_text)
+    paths = [f["path"] for f in plan["files"]]
+    print(f"🗂 Planned {len(paths)} files: {', '.join(paths)}")
+
+    limit = asyncio.Semaphore(max(1, settings.LLM_PARALLEL_REQUESTS))
+    files = {}
+    received = 0
+
+    async def generate(path: str):
+        nonlocal received
+        prompt = build_file_prompt(path, plan, brief, attachments_meta, checks, round_num, prev_readme)
+        async with limit:
+            text = await _generate_cached(prompt, saved, deadline)
+        content = _strip_outer_fence(text)
+        if path == "index.html":
+            content = _link_assets(content, paths)
+            if on_code_ready:
+                on_code_ready(content)
+        files[path] = content
+        received += len(content.encode("utf-8"))
+        if on_progress:
+            await on_progress(received, path)
+
+    tasks = [asyncio.create_task(generate(path)) for path in paths]
+    try:
+        await asyncio.gather(*tasks)
+    except BaseException:
+        # One file failed: stop the others rather than spend quota alongside the fallback
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+    if not files.get("index.html"):
+        raise ValueError("planner pipeline produced an empty index.html")
+    if not files.get("README.md"):
+        files["README.md"] = generate_readme_fallback(brief, checks, attachments_meta, round_num)
+    print(f"✅ Generated {len(files)} files in parallel using Google Gemini API.")
+    return files
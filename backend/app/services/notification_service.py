@@ -1,17 +1,20 @@
-import httpx
-import time
+import asyncio
+from ..core.http import http_pool
+from ..core.metrics import NOTIFY_RETRIES
 
-def notify_evaluation_server(evaluation_url: str, payload: dict) -> bool:
+async def notify_evaluation_server_async(evaluation_url: str, payload: dict) -> bool:
     """
     Send repo details back to the evaluation server.
-    Retries with exponential backoff if needed.
+    Retries with exponential backoff (asyncio.sleep, so waiting between
+    retries does not block other builds).
     """
     headers = {"Content-Type": "application/json"}
 
     delay = 1  # start with 1 second
     for attempt in range(5):  # try up to 5 times
         try:
-            r = httpx.post(evaluation_url, headers=headers, json=payload, timeout=30.0)
+            client = http_pool.client_for(evaluation_url)
+            r = await client.post(evaluation_url, headers=headers, json=payload)
             if r.status_code == 200:
                 print("✅ Evaluation server notified successfully.")
                 return True
@@ -21,7 +24,8 @@ def notify_evaluation_server(evaluation_url: str, payload: dict) -> bool:
             print(f"❌ Attempt {attempt+1} failed: {e}")
 
         # Exponential backoff
-        time.sleep(delay)
+        NOTIFY_RETRIES.inc()
+        await asyncio.sleep(delay)
         delay *= 2
 
     print("❌ Failed to notify evaluation server after retries.")
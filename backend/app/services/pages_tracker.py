@@ -0,0 +1,128 @@
+import asyncio
+import time
+from datetime import datetime
+from typing import Dict, Optional
+
+from ..core.config import settings
+from ..core.database import SessionLocal
+from ..core.http import http_pool
+from ..core.metrics import PAGES_DEPLOYS, timed
+from ..models.project import Project
+from ..websockets.manager import manager
+
+class PagesTracker:
+    """
+    Follows GitHub Pages deployments in the background.
+
+    track() polls /pages/builds/latest with exponential backoff until the
+    build for the given commit is "built" and the site answers, then
+    records Project.pages_deployed_at. If Pages turns out not to be enabled
+    it is enabled once. Callers that should wait until the site is live
+    (PAGES_WAIT_BEFORE_NOTIFY) await the returned task; it resolves to
+    True when the site is live and False on a failed build or timeout.
+    """
+
+    def __init__(self):
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self.deployed = 0
+        self.errored = 0
+        self.timed_out = 0
+
+    def track(self, task_id: str, commit_sha: Optional[str], pages_url: str) -> asyncio.Task:
+        """Start following the deployment of commit_sha, replacing any older tracking of task_id"""
+        previous = self._tasks.get(task_id)
+        if previous and not previous.done():
+            previous.cancel()
+        task = asyncio.create_task(self._follow(task_id, commit_sha, pages_url))
+        self._tasks[task_id] = task
+        task.add_done_callback(lambda t: self._forget(task_id, t))
+        return task
+
+    def _forget(self, task_id: str, task: asyncio.Task):
+        if self._tasks.get(task_id) is task:
+            del self._tasks[task_id]
+
+    async def stop(self):
+        for task in list(self._tasks.values()):
+            task.cancel()
+        await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+        self._tasks.clear()
+
+    async def _follow(self, task_id: str, commit_sha: Optional[str], pages_url: str) -> bool:
+        from .github_service import github_client
+
+        deadline = time.monotonic() + settings.PAGES_DEPLOY_TIMEOUT_SECONDS
+        delay = settings.PAGES_POLL_INITIAL_SECONDS
+        enable_tried = False
+        with timed("pages_deploy"):
+            while True:
+                try:
+                    build = await github_client.get_latest_pages_build(task_id)
+                except Exception as e:
+                    print(f"⚠ Pages build status for {task_id} unavailable: {e}")
+                    build = {}
+
+                if build is None and not enable_tried:
+                    # Pages is off, e.g. a later round for a repo whose enable failed
+                    enable_tried = True
+                    await github_client.enable_pages(task_id)
+                elif build and build.get("commit") in (commit_sha, None):
+                    status = build.get("status")
+                    if status == "built" and await self._site_live(pages_url):
+                        await self._record(task_id, pages_url)
+                        return True
+                    if status == "errored":
+                        message = (build.get("error") or {}).get("message")
+                        print(f"❌ Pages build failed for {task_id}: {message}")
+                        self.errored += 1
+                        PAGES_DEPLOYS.inc("errored")
+                        return False
+
+                if time.monotonic() + delay > deadline:
+                    print(f"⌛ Pages site for {task_id} not live after {settings.PAGES_DEPLOY_TIMEOUT_SECONDS:g}s")
+                    self.timed_out += 1
+                    PAGES_DEPLOYS.inc("timed_out")
+                    return False
+                await asyncio.sleep(delay)
+                delay = min(delay * 1.5, settings.PAGES_POLL_MAX_SECONDS)
+
+    async def _site_live(self, pages_url: str) -> bool:
+        # The build can report "built" a little before the CDN serves the page
+        try:
+            r = await http_pool.client_for(pages_url).head(pages_url, follow_redirects=True)
+            return r.status_code < 400
+        except Exception:
+            return False
+
+    async def _record(self, task_id: str, pages_url: str):
+        deployed_at = datetime.utcnow()
+        await asyncio.to_thread(_save_deployed_at, task_id, deployed_at)
+        self.deployed += 1
+        PAGES_DEPLOYS.inc("deployed")
+        print(f"🌐 Pages site live for {task_id}: {pages_url}")
+        await manager.broadcast_project_update(task_id, {
+            "message": "Site is live",
+            "pages_url": pages_url,
+            "pages_deployed_at": deployed_at.isoformat(),
+        })
+
+    def stats(self) -> dict:
+        return {
+            "tracking": len(self._tasks),
+            "deployed": self.deployed,
+            "errored": self.errored,
+            "timed_out": self.timed_out,
+        }
+
+def _save_deployed_at(task_id: str, deployed_at: datetime):
+    db = SessionLocal()
+    try:
+        # Through the ORM, so the flush bumps the projects change sequence
+        project = db.query(Project).filter(Project.task_id == task_id).first()
+        if project is not None:
+            project.pages_deployed_at = deployed_at
+            db.commit()
+    finally:
+        db.close()
+
+pages_tracker = PagesTracker()
@@ -0,0 +1,45 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Sequence, Tuple
+
+StageFn = Callable[..., Awaitable[Any]]
+
+class StageGraph:
+    """
+    A job's steps as a dependency graph.
+
+    Each stage starts as soon as the stages it depends on have finished and
+    receives their results as arguments, in the order given in `after`.
+    Independent stages (e.g. repo setup and LLM generation) run concurrently.
+    If any stage fails, the stages still running are cancelled and the
+    error is raised from run().
+    """
+
+    def __init__(self):
+        self._stages: Dict[str, Tuple[StageFn, Tuple[str, ...]]] = {}
+
+    def add(self, name: str, fn: StageFn, after: Sequence[str] = ()):
+        """Add a stage; its dependencies must have been added first."""
+        missing = [dep for dep in after if dep not in self._stages]
+        if missing:
+            raise ValueError(f"stage {name!r} depends on unknown stages {missing}")
+        self._stages[name] = (fn, tuple(after))
+
+    async def run(self) -> Dict[str, Any]:
+        """Run every stage; returns each stage's result by name."""
+        tasks: Dict[str, asyncio.Task] = {}
+
+        async def run_stage(name: str):
+            fn, after = self._stages[name]
+            args = [await tasks[dep] for dep in after]
+            return await fn(*args)
+
+        for name in self._stages:
+            tasks[name] = asyncio.create_task(run_stage(name))
+        try:
+            await asyncio.gather(*tasks.values())
+        except BaseException:
+            for task in tasks.values():
+                task.cancel()
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
+            raise
+        return {name: task.result() for name, task in tasks.items()}
@@ -0,0 +1,98 @@
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import event, func, insert, select, update
+from sqlalchemy.orm import Session
+
+from ..core.config import settings
+from ..models.change import ChangeSequence
+from ..models.project import Project, ProjectStatus
+
+PROJECTS_SEQ = "projects"
+
+def change_seq(db: Session) -> int:
+    """
+    Current value of the projects change sequence.
+
+    Every committed write to `projects` bumps it, from any process, so it
+    makes a cheap global version for ETags and cache validation.
+    """
+    seq = db.execute(
+        select(ChangeSequence.seq).where(ChangeSequence.name == PROJECTS_SEQ)
+    ).scalar()
+    return seq or 0
+
+class ProjectStatsCache:
+    """
+    Per-status project counts, computed with a single GROUP BY.
+
+    The result is kept in memory and reused while the projects change
+    sequence is unchanged, so dashboards polling /stats cost one primary-key
+    lookup instead of a table scan. Entries also expire after `ttl` seconds
+    as a backstop for writes that bypass the ORM.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._counts: Optional[Dict[str, int]] = None
+        self._seq = -1
+        self._loaded_at = 0.0
+
+    def invalidate(self):
+        with self._lock:
+            self._counts = None
+
+    def get(self, db: Session, seq: Optional[int] = None) -> Tuple[Dict[str, int], int]:
+        """Return (counts, seq); pass `seq` if the caller already read it"""
+        if seq is None:
+            seq = change_seq(db)
+        with self._lock:
+            if (self._counts is not None and self._seq == seq
+                    and time.monotonic() - self._loaded_at < self.ttl):
+                return self._counts, seq
+
+        rows = db.query(Project.status, func.count(Project.id)).group_by(Project.status).all()
+        counts = {status.value: 0 for status in ProjectStatus}
+        for status, count in rows:
+            if status is not None:
+                counts[status.value] = count
+        counts["total"] = sum(count for _, count in rows)
+
+        with self._lock:
+            if seq >= self._seq:
+                self._counts = counts
+                self._seq = seq
+                self._loaded_at = time.monotonic()
+        return counts, seq
+
+project_stats = ProjectStatsCache(ttl=settings.PROJECT_STATS_TTL_SECONDS)
+
+@event.listens_for(ChangeSequence.__table__, "after_create")
+def _seed_change_seq(table, connection, **kw):
+    connection.execute(table.insert().values(name=PROJECTS_SEQ, seq=0))
+
+@event.listens_for(Session, "after_flush")
+def _bump_change_seq(session, flush_context):
+    if not any(isinstance(obj, Project) for obj in (*session.new, *session.dirty, *session.deleted)):
+        return
+    # Runs inside the flush's transaction, so the bump commits or rolls back with it
+    conn = session.connection()
+    result = conn.execute(
+        update(ChangeSequence)
+        .where(ChangeSequence.name == PROJECTS_SEQ)
+        .values(seq=ChangeSequence.seq + 1)
+    )
+    if result.rowcount == 0:
+        conn.execute(insert(ChangeSequence).values(name=PROJECTS_SEQ, seq=1))
+    session.info["projects_changed"] = True
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_on_commit(session):
+    if session.info.pop("projects_changed", False):
+        project_stats.invalidate()
+
+@event.listens_for(Session, "after_rollback")
+def _forget_on_rollback(session):
+    session.info.pop("projects_changed", None)
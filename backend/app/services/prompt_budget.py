@@ -0,0 +1,287 @@
+import csv
+import json
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from ..core.config import settings
+
+# Rough size of the fixed instructions in build_prompt
+PROMPT_OVERHEAD_TOKENS = 350
+
+# Relative claim of each section on the budget; unused share flows to the others
+SECTION_WEIGHTS = {"brief": 4, "attachments": 3, "checks": 1.5, "prev_readme": 1.5}
+
+CSV_SAMPLE_ROWS = 500
+JSON_MAX_KEYS = 25
+JSON_MAX_DEPTH = 4
+# Free-text previews stay short even when the budget has room
+TEXT_PREVIEW_MAX_TOKENS = 1000
+TEXT_SUFFIXES = (".md", ".txt", ".json", ".csv", ".tsv", ".html", ".css", ".js", ".xml", ".yaml", ".yml")
+
+_INT_RE = re.compile(r"^[+-]?\d+$")
+_FLOAT_RE = re.compile(r"^[+-]?(\d+\.\d*|\.\d+|\d+)([eE][+-]?\d+)?$")
+_DATE_RE = re.compile(r"^\d{4}-\d{2}-\d{2}([ T]\d{2}:\d{2}(:\d{2})?)?")
+
+def count_tokens(text: str) -> int:
+    """
+    Approximate Gemini token count (~4 bytes per token).
+
+    Local and free, unlike model.count_tokens, which is a network call;
+    precise enough to bound prompt size.
+    """
+    return (len(text.encode("utf-8")) + 3) // 4
+
+def truncate_to_tokens(text: str, max_tokens: int, marker: str = "\n…[truncated]") -> str:
+    """Cut text to roughly max_tokens, preferring a line boundary."""
+    if count_tokens(text) <= max_tokens:
+        return text
+    limit = max(0, max_tokens * 4 - len(marker))
+    cut = text.encode("utf-8")[:limit].decode("utf-8", errors="ignore")
+    newline = cut.rfind("\n")
+    if newline > limit // 2:
+        cut = cut[:newline]
+    return cut + marker
+
+def allocate(budget: int, demands: Dict[str, int], weights: Dict[str, float]) -> Dict[str, int]:
+    """
+    Split `budget` tokens across sections by weight. A section never gets
+    more than it asks for, and whatever it leaves is shared by the rest.
+    """
+    alloc: Dict[str, int] = {}
+    remaining = max(0, budget)
+    pending = {k: d for k, d in demands.items()}
+    while pending:
+        total_weight = sum(weights.get(k, 1) for k in pending)
+        fits = {k: d for k, d in pending.items() if d <= remaining * weights.get(k, 1) / total_weight}
+        if not fits:
+            for k in pending:
+                alloc[k] = int(remaining * weights.get(k, 1) / total_weight)
+            break
+        for k, d in fits.items():
+            alloc[k] = d
+            remaining -= d
+            del pending[k]
+    return alloc
+
+# === Attachment summaries ===
+
+def _cell_type(value: str) -> str:
+    value = value.strip()
+    if not value:
+        return ""
+    if _INT_RE.match(value):
+        return "int"
+    if _FLOAT_RE.match(value):
+        return "float"
+    if value.lower() in ("true", "false", "yes", "no"):
+        return "bool"
+    if _DATE_RE.match(value):
+        return "date"
+    return "str"
+
+def _merge_types(a: str, b: str) -> str:
+    if not a or a == b:
+        return b or a
+    if not b:
+        return a
+    if {a, b} == {"int", "float"}:
+        return "float"
+    return "str"
+
+def _csv_summary(path: str, delimiter: str = ",") -> str:
+    """Row count, column names with inferred types, and a few sample rows (untruncated)."""
+    with open(path, "r", encoding="utf-8", errors="ignore", newline="") as f:
+        reader = csv.reader(f, delimiter=delimiter)
+        header = next(reader, None)
+        if header is None:
+            return "empty CSV"
+        types = [""] * len(header)
+        samples: List[List[str]] = []
+        rows = 0
+        for row in reader:
+            rows += 1
+            if rows <= CSV_SAMPLE_ROWS:
+                for i, value in enumerate(row[:len(header)]):
+                    types[i] = _merge_types(types[i], _cell_type(value))
+                if len(samples) < 3:
+                    samples.append(row)
+
+    columns = ", ".join(f"{name} ({t or 'empty'})" for name, t in zip(header, types))
+    lines = [f"CSV, {rows} rows x {len(header)} columns: {columns}"]
+    lines += ["sample: " + delimiter.join(row) for row in samples]
+    return "\n".join(lines)
+
+def summarize_csv(path: str, max_tokens: int, delimiter: str = ",") -> str:
+    """Row count, column names with inferred types, and a few sample rows."""
+    return truncate_to_tokens(_csv_summary(path, delimiter), max_tokens)
+
+def _json_shape(value, depth: int = 0) -> str:
+    if depth >= JSON_MAX_DEPTH:
+        return "…"
+    if isinstance(value, dict):
+        keys = list(value)[:JSON_MAX_KEYS]
+        inner = ", ".join(f"{k}: {_json_shape(value[k], depth + 1)}" for k in keys)
+        more = f", +{len(value) - len(keys)} more keys" if len(value) > len(keys) else ""
+        return "{" + inner + more + "}"
+    if isinstance(value, list):
+        if not value:
+            return "[]"
+        return f"[{len(value)} x {_json_shape(value[0], depth + 1)}]"
+    if isinstance(value, bool):
+        return "bool"
+    if isinstance(value, int):
+        return "int"
+    if isinstance(value, float):
+        return "float"
+    if value is None:
+        return "null"
+    return "str"
+
+def _json_parts(path: str):
+    """(shape line, first record as JSON) of the document."""
+    with open(path, "r", encoding="utf-8", errors="ignore") as f:
+        data = json.load(f)
+    first = data[0] if isinstance(data, list) and data else data
+    return f"JSON shape: {_json_shape(data)}", json.dumps(first, ensure_ascii=False)
+
+def _render_json(summary: str, example: str, max_tokens: int) -> str:
+    budget_left = max_tokens - count_tokens(summary) - 4
+    if budget_left > 20:
+        summary += "\nexample: " + truncate_to_tokens(example, budget_left, marker="…")
+    return truncate_to_tokens(summary, max_tokens)
+
+def summarize_json(path: str, max_tokens: int) -> str:
+    """Schema-like shape of the document plus the start of its first record."""
+    return _render_json(*_json_parts(path), max_tokens)
+
+def _text_head(path: str) -> str:
+    # Never read more than the longest preview can hold
+    with open(path, "r", encoding="utf-8", errors="ignore") as f:
+        return f.read(TEXT_PREVIEW_MAX_TOKENS * 4 + 1)
+
+def _render_text(head: str, max_tokens: int) -> str:
+    return "preview:\n" + truncate_to_tokens(head, min(max_tokens, TEXT_PREVIEW_MAX_TOKENS))
+
+def summarize_text(path: str, max_tokens: int) -> str:
+    return _render_text(_text_head(path), max_tokens)
+
+class AttachmentSummary:
+    """
+    One attachment, read and parsed once; render() describes it within any
+    number of tokens without touching the file again.
+    """
+
+    def __init__(self, info: dict):
+        self.name, self.mime, self.size = info["name"], info.get("mime", ""), info.get("size", 0)
+        self._render = None
+        self._error: Optional[Exception] = None
+        lower = self.name.lower()
+        try:
+            if lower.endswith(".csv") or self.mime == "text/csv":
+                text = _csv_summary(info["path"])
+                self._render = lambda room: truncate_to_tokens(text, room)
+            elif lower.endswith(".tsv"):
+                text = _csv_summary(info["path"], delimiter="\t")
+                self._render = lambda room: truncate_to_tokens(text, room)
+            elif lower.endswith(".json") or self.mime == "application/json":
+                summary, example = _json_parts(info["path"])
+                self._render = lambda room: _render_json(summary, example, room)
+            elif self.mime.startswith("text") or lower.endswith(TEXT_SUFFIXES):
+                head = _text_head(info["path"])
+                self._render = lambda room: _render_text(head, room)
+        except Exception as e:
+            self._error = e
+
+    def render(self, max_tokens: int) -> str:
+        header = f"- {self.name} ({self.mime}, {self.size} bytes)"
+        room = max_tokens - count_tokens(header + ": ")
+        if room < 4:
+            body = ""
+        elif self._error is not None:
+            body = f"(could not summarize: {self._error})"
+        else:
+            body = self._render(room) if self._render else ""
+        return f"{header}: {body}" if body else header
+
+def summarize_attachment(info: dict, max_tokens: int) -> str:
+    """One attachment, described within max_tokens."""
+    return AttachmentSummary(info).render(max_tokens)
+
+def _fit_summaries(summaries: List[AttachmentSummary], max_tokens: int) -> str:
+    # Rendering with the whole budget tells how much each one actually needs
+    # (+2 absorbs rounding so a summary that fits is reproduced unchanged)
+    demands = {str(i): count_tokens(s.render(max_tokens)) + 2 for i, s in enumerate(summaries)}
+    alloc = allocate(max_tokens, demands, {k: 1 for k in demands})
+    return "\n".join(s.render(alloc[str(i)]) for i, s in enumerate(summaries))
+
+def summarize_attachments(saved, max_tokens: int) -> str:
+    """All attachments within max_tokens; space one doesn't need goes to the others."""
+    saved = list(saved or [])
+    if not saved:
+        return ""
+    return _fit_summaries([AttachmentSummary(s) for s in saved], max_tokens)
+
+# === Whole prompt ===
+
+@dataclass
+class PromptInputs:
+    """Prompt sections after fitting them into the budget."""
+    brief: str
+    attachments_meta: str
+    checks: List[str]
+    prev_readme: Optional[str]
+    tokens: Dict[str, int] = field(default_factory=dict)
+
+def fit_prompt_inputs(brief: str, saved, checks=None, prev_readme=None,
+                      budget: Optional[int] = None) -> PromptInputs:
+    """
+    Fit brief, checks, attachment summaries and the previous README into
+    LLM_PROMPT_TOKEN_BUDGET, so prompt size (and Gemini latency and cost)
+    stays bounded whatever the request carries.
+    """
+    budget = settings.LLM_PROMPT_TOKEN_BUDGET if budget is None else budget
+    available = max(0, budget - PROMPT_OVERHEAD_TOKENS)
+    checks = [str(c) for c in (checks or [])]
+
+    # Each attachment is read once; the summary at full budget is the demand
+    summaries = [AttachmentSummary(s) for s in (saved or [])]
+    attachments_full = _fit_summaries(summaries, available) if summaries else ""
+    demands = {
+        "brief": count_tokens(brief),
+        "checks": count_tokens("\n".join(checks)),
+        "attachments": count_tokens(attachments_full),
+        "prev_readme": count_tokens(prev_readme) if prev_readme else 0,
+    }
+    alloc = allocate(available, demands, SECTION_WEIGHTS)
+    if alloc["attachments"] >= demands["attachments"]:
+        attachments_meta = attachments_full
+    else:
+        attachments_meta = _fit_summaries(summaries, alloc["attachments"])
+
+    fitted_checks: List[str] = []
+    left = alloc["checks"]
+    for check in checks:
+        cost = count_tokens(check) + 2
+        if cost > left:
+            if left > 16:
+                fitted_checks.append(truncate_to_tokens(check, left - 2, marker="…"))
+            if len(fitted_checks) < len(checks):
+                fitted_checks.append(f"(+{len(checks) - len(fitted_checks)} more checks omitted)")
+            break
+        fitted_checks.append(check)
+        left -= cost
+
+    inputs = PromptInputs(
+        brief=truncate_to_tokens(brief, alloc["brief"]),
+        attachments_meta=attachments_meta,
+        checks=fitted_checks,
+        prev_readme=truncate_to_tokens(prev_readme, alloc["prev_readme"]) if prev_readme else None,
+    )
+    inputs.tokens = {
+        "brief": count_tokens(inputs.brief),
+        "attachments": count_tokens(inputs.attachments_meta),
+        "checks": count_tokens("\n".join(inputs.checks)),
+        "prev_readme": count_tokens(inputs.prev_readme or ""),
+    }
+    return inputs
@@ -0,0 +1,126 @@
+import asyncio
+import random
+import re
+import time
+from typing import Awaitable, Callable, Optional, TypeVar
+
+from google.api_core import exceptions as google_exceptions
+
+from ..core.config import settings
+from ..core.metrics import LLM_RETRIES
+
+T = TypeVar("T")
+
+# Errors worth retrying: quota (429), overload and transient server failures
+RETRYABLE_ERRORS = (
+    google_exceptions.ResourceExhausted,
+    google_exceptions.TooManyRequests,
+    google_exceptions.ServiceUnavailable,
+    google_exceptions.InternalServerError,
+    google_exceptions.DeadlineExceeded,
+    asyncio.TimeoutError,
+)
+QUOTA_ERRORS = (google_exceptions.ResourceExhausted, google_exceptions.TooManyRequests)
+
+_RETRY_AFTER_RE = re.compile(r"retry in ([\d.]+)\s*s|retry_delay\s*\{\s*seconds:\s*(\d+)", re.IGNORECASE)
+
+def retry_after_seconds(error: Exception) -> Optional[float]:
+    """Server-suggested wait from a quota error message, if any."""
+    match = _RETRY_AFTER_RE.search(str(error))
+    if not match:
+        return None
+    return float(match.group(1) or match.group(2))
+
+class AdaptiveRateLimiter:
+    """
+    Token bucket shared by every job in the process, with AIMD rate control.
+
+    Each success nudges the rate up by one request per minute; a quota error
+    halves it and pauses sends for as long as the server asked. The rate
+    settles just under the real quota instead of bursting into 429s.
+    """
+
+    def __init__(self, per_minute: float, min_per_minute: float, max_per_minute: float, burst: int):
+        self.rate = per_minute / 60
+        self.min_rate = min_per_minute / 60
+        self.max_rate = max_per_minute / 60
+        self.burst = burst
+        self.tokens = float(burst)
+        self.blocked_until = 0.0
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+        self.throttled = 0
+        self.retries = 0
+
+    def _refill(self, now: float):
+        self.tokens = min(self.burst, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self):
+        """Wait for a send slot; waiters are served in arrival order"""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self.blocked_until:
+                    await asyncio.sleep(self.blocked_until - now)
+                    continue
+                self._refill(now)
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def on_success(self):
+        self.rate = min(self.max_rate, self.rate + 1 / 60)
+
+    def on_throttle(self, retry_after: Optional[float] = None):
+        self.throttled += 1
+        self.rate = max(self.min_rate, self.rate / 2)
+        self.tokens = 0.0
+        if retry_after:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + retry_after)
+
+    async def call(self, fn: Callable[[], Awaitable[T]], deadline: Optional[float] = None) -> T:
+        """
+        Run fn() under the limiter, retrying retryable errors with
+        full-jitter exponential backoff until `deadline` (time.monotonic()).
+        """
+        if deadline is None:
+            deadline = time.monotonic() + settings.LLM_RETRY_DEADLINE_SECONDS
+        attempt = 0
+        while True:
+            await self.acquire()
+            try:
+                result = await fn()
+            except RETRYABLE_ERRORS as e:
+                retry_after = retry_after_seconds(e)
+                if isinstance(e, QUOTA_ERRORS):
+                    self.on_throttle(retry_after)
+                backoff = min(settings.LLM_RETRY_MAX_DELAY, settings.LLM_RETRY_BASE_DELAY * 2 ** attempt)
+                delay = max(retry_after or 0, random.uniform(0, backoff))
+                if time.monotonic() + delay >= deadline:
+                    raise
+                attempt += 1
+                self.retries += 1
+                LLM_RETRIES.inc()
+                print(f"⏳ Gemini {type(e).__name__}, retry {attempt} in {delay:.1f}s")
+                await asyncio.sleep(delay)
+                continue
+            self.on_success()
+            return result
+
+    def stats(self) -> dict:
+        return {
+            "rate_per_minute": round(self.rate * 60, 1),
+            "tokens": round(self.tokens, 2),
+            "blocked_for": round(max(0.0, self.blocked_until - time.monotonic()), 1),
+            "throttled": self.throttled,
+            "retries": self.retries,
+        }
+
+llm_limiter = AdaptiveRateLimiter(
+    per_minute=settings.LLM_RATE_PER_MINUTE,
+    min_per_minute=settings.LLM_RATE_MIN_PER_MINUTE,
+    max_per_minute=settings.LLM_RATE_MAX_PER_MINUTE,
+    burst=settings.LLM_RATE_BURST,
+)
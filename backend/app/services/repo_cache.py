@@ -0,0 +1,96 @@
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+
+from ..core.config import settings
+
+# Only small text blobs (READMEs and the like) are worth keeping
+BLOB_CACHE_MAX_ENTRIES = 256
+BLOB_CACHE_MAX_CHARS = 32 * 1024
+
+@dataclass
+class RepoState:
+    """What we know about one repository and the head of its default branch."""
+    repo: Any
+    default_branch: str = "main"
+    head_sha: Optional[str] = None
+    tree_sha: Optional[str] = None
+    # path -> blob SHA for every file in head_sha's tree
+    blobs: Optional[Dict[str, str]] = None
+    fetched_at: float = field(default_factory=time.monotonic)
+
+class RepoCache:
+    """
+    In-process cache of repository metadata, so repeat jobs on a repo
+    (round 2, re-submissions) skip the lookups GitHub already answered.
+
+    Entries expire REPO_CACHE_TTL_SECONDS after they were last confirmed.
+    Our own commits update the entry with the new head, tree and blob SHAs
+    (all known locally), and callers drop the entry when a write fails, so a
+    stale entry costs at most one retry. Blob contents never change for a SHA
+    and are kept in a small LRU.
+    """
+
+    def __init__(self, ttl: float, max_repos: int):
+        self.ttl = ttl
+        self.max_repos = max_repos
+        self._repos: "OrderedDict[str, RepoState]" = OrderedDict()
+        self._blobs: "OrderedDict[str, str]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, name: str) -> Optional[RepoState]:
+        state = self._repos.get(name)
+        if state is not None and time.monotonic() - state.fetched_at > self.ttl:
+            del self._repos[name]
+            state = None
+        if state is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._repos.move_to_end(name)
+        return state
+
+    def put(self, name: str, repo: Any, default_branch: Optional[str]) -> RepoState:
+        state = RepoState(repo=repo, default_branch=default_branch or "main")
+        self._repos[name] = state
+        self._repos.move_to_end(name)
+        while len(self._repos) > self.max_repos:
+            self._repos.popitem(last=False)
+        return state
+
+    def set_head(self, name: str, head_sha: Optional[str], tree_sha: Optional[str], blobs: Dict[str, str]):
+        """Record the branch head and its tree; ignored if the repo itself is not cached."""
+        state = self._repos.get(name)
+        if state is not None:
+            state.head_sha, state.tree_sha, state.blobs = head_sha, tree_sha, dict(blobs)
+            state.fetched_at = time.monotonic()
+
+    def invalidate(self, name: str):
+        self._repos.pop(name, None)
+
+    def get_blob(self, sha: str) -> Optional[str]:
+        text = self._blobs.get(sha)
+        if text is not None:
+            self._blobs.move_to_end(sha)
+        return text
+
+    def put_blob(self, sha: str, text: str):
+        if len(text) > BLOB_CACHE_MAX_CHARS:
+            return
+        self._blobs[sha] = text
+        self._blobs.move_to_end(sha)
+        while len(self._blobs) > BLOB_CACHE_MAX_ENTRIES:
+            self._blobs.popitem(last=False)
+
+    def stats(self) -> dict:
+        return {
+            "repos": len(self._repos),
+            "blobs": len(self._blobs),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+# Shared by every job through AsyncGitHubClient; only used on the event loop
+repo_cache = RepoCache(settings.REPO_CACHE_TTL_SECONDS, settings.REPO_CACHE_MAX_REPOS)
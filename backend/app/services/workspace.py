@@ -0,0 +1,129 @@
+import asyncio
+import os
+import re
+import shutil
+import time
+import uuid
+from pathlib import Path
+from typing import Optional, Set
+
+from ..core.config import settings
+
+def workspaces_root() -> Path:
+    return Path(settings.TEMP_DIR) / "jobs"
+
+# Workspaces in use by this process; the sweeper never touches these
+_active: Set[Path] = set()
+
+# Other processes share the root: each live workspace holds this file, touched
+# on every sweep, and sweepers skip workspaces whose heartbeat is recent
+HEARTBEAT_FILE = ".active"
+
+def _heartbeat_window() -> float:
+    return 3 * settings.WORKSPACE_SWEEP_INTERVAL
+
+class JobWorkspace:
+    """
+    Private scratch directory for one build.
+
+    Created when the job starts and removed when it finishes, so concurrent
+    jobs with same-named attachments never share files and nothing is left
+    behind in TEMP_DIR.
+    """
+
+    def __init__(self, job_key: str, root: Optional[Path] = None):
+        safe_key = re.sub(r"[^A-Za-z0-9_.-]", "_", job_key)[:64]
+        self.path = Path(root or workspaces_root()) / f"{safe_key}-{uuid.uuid4().hex[:8]}"
+
+    def create(self) -> Path:
+        self.path.mkdir(parents=True, exist_ok=True)
+        (self.path / HEARTBEAT_FILE).touch()
+        _active.add(self.path)
+        return self.path
+
+    def cleanup(self):
+        _active.discard(self.path)
+        shutil.rmtree(self.path, ignore_errors=True)
+
+    def __enter__(self) -> "JobWorkspace":
+        self.create()
+        return self
+
+    def __exit__(self, *exc):
+        self.cleanup()
+
+def _dir_size(path: Path) -> int:
+    total = 0
+    for dirpath, _, filenames in os.walk(path):
+        for name in filenames:
+            try:
+                total += os.path.getsize(os.path.join(dirpath, name))
+            except OSError:
+                pass
+    return total
+
+def _is_live(path: Path, now: float) -> bool:
+    try:
+        return now - (path / HEARTBEAT_FILE).stat().st_mtime < _heartbeat_window()
+    except OSError:
+        return False
+
+def sweep_workspaces(max_age: Optional[int] = None, max_bytes: Optional[int] = None) -> dict:
+    """
+    Remove abandoned workspaces (older than max_age), then the oldest ones
+    until the total is under max_bytes. Active workspaces, this process's
+    and other processes' (recent heartbeat), are never removed.
+    """
+    max_age = settings.WORKSPACE_MAX_AGE_SECONDS if max_age is None else max_age
+    max_bytes = settings.WORKSPACE_QUOTA_BYTES if max_bytes is None else max_bytes
+    root = workspaces_root()
+    if not root.exists():
+        return {"removed": 0, "bytes": 0}
+
+    now = time.time()
+    for path in list(_active):
+        try:
+            os.utime(path / HEARTBEAT_FILE)
+        except OSError:
+            pass
+
+    removed = 0
+    live_bytes = 0
+    entries = []
+    for path in root.iterdir():
+        if not path.is_dir() or path in _active:
+            continue
+        if _is_live(path, now):
+            # In use by another process
+            live_bytes += _dir_size(path)
+            continue
+        try:
+            mtime = path.stat().st_mtime
+        except FileNotFoundError:
+            continue
+        if now - mtime > max_age:
+            shutil.rmtree(path, ignore_errors=True)
+            removed += 1
+            continue
+        entries.append((mtime, _dir_size(path), path))
+
+    total = sum(size for _, size, _ in entries) + live_bytes + sum(_dir_size(p) for p in list(_active))
+    entries.sort()
+    while total > max_bytes and entries:
+        _, size, path = entries.pop(0)
+        shutil.rmtree(path, ignore_errors=True)
+        total -= size
+        removed += 1
+
+    if removed:
+        print(f"🧹 Removed {removed} stale job workspaces ({total} bytes left)")
+    return {"removed": removed, "bytes": total}
+
+async def run_sweeper():
+    """Background task: sweep workspaces every WORKSPACE_SWEEP_INTERVAL seconds."""
+    while True:
+        try:
+            await asyncio.to_thread(sweep_workspaces)
+        except Exception as e:
+            print(f"⚠ Workspace sweep failed: {e}")
+        await asyncio.sleep(settings.WORKSPACE_SWEEP_INTERVAL)
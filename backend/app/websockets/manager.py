@@ -1,54 +1,116 @@
-from typing import Dict, Set
+from typing import Dict, Optional, Set
 from fastapi import WebSocket
+import asyncio
 import json
+from ..core.config import settings
+from ..services.broadcast import create_backend
+from ..services.event_log import Outbox, coalesce_key, event_log
+
+class ClientConnection:
+    """
+    One WebSocket with its own bounded outbox and writer task.
+
+    Broadcasts only enqueue; the writer sends at the client's pace, so a
+    slow client delays nobody but itself. A client whose send times out or
+    fails is disconnected.
+    """
+
+    def __init__(self, websocket: WebSocket, manager: "ConnectionManager"):
+        self.websocket = websocket
+        self.manager = manager
+        self.subscriptions: Set[str] = set()
+        self.outbox = Outbox(settings.CLIENT_QUEUE_SIZE)
+        self._writer: Optional[asyncio.Task] = None
+
+    def start(self):
+        self._writer = asyncio.create_task(self._run())
+
+    def send(self, message: dict, key=None):
+        self.outbox.put(json.dumps(message), key)
+
+    async def _run(self):
+        try:
+            while True:
+                text = await self.outbox.get()
+                await asyncio.wait_for(self.websocket.send_text(text), settings.WS_SEND_TIMEOUT_SECONDS)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            self.manager.disconnect(self.websocket)
+
+    def close(self):
+        if self._writer and self._writer is not asyncio.current_task():
+            self._writer.cancel()
 
 class ConnectionManager:
-    def __init__(self):
-        self.active_connections: Set[WebSocket] = set()
-        self.project_subscribers: Dict[str, Set[WebSocket]] = {}
+    def __init__(self, backend=None):
+        self.active_connections: Dict[WebSocket, ClientConnection] = {}
+        self.project_subscribers: Dict[str, Set[ClientConnection]] = {}
+        # Broadcasts go through the backend so every worker process sees them
+        self.backend = backend or create_backend()
     
+    async def start(self):
+        await self.backend.start(self._deliver)
+    
+    async def stop(self):
+        await self.backend.stop()
+
     async def connect(self, websocket: WebSocket):
         await websocket.accept()
-        self.active_connections.add(websocket)
-    
+        client = ClientConnection(websocket, self)
+        self.active_connections[websocket] = client
+        client.start()
+
     def disconnect(self, websocket: WebSocket):
-        self.active_connections.discard(websocket)
-        # Remove from all project subscriptions
-        for subscribers in self.project_subscribers.values():
-            subscribers.discard(websocket)
-    
+        client = self.active_connections.pop(websocket, None)
+        if client is None:
+            return
+        client.close()
+        # Only the client's own subscriptions, not every project
+        for task_id in client.subscriptions:
+            subscribers = self.project_subscribers.get(task_id)
+            if subscribers is not None:
+                subscribers.discard(client)
+                if not subscribers:
+                    del self.project_subscribers[task_id]
+
     async def subscribe_to_project(self, websocket: WebSocket, task_id: str):
-        if task_id not in self.project_subscribers:
-            self.project_subscribers[task_id] = set()
-        self.project_subscribers[task_id].add(websocket)
-    
+        client = self.active_connections.get(websocket)
+        if client is None:
+            return
+        client.subscriptions.add(task_id)
+        self.project_subscribers.setdefault(task_id, set()).add(client)
+
     async def broadcast_project_update(self, task_id: str, data: dict):
         """Send update to all subscribers of a specific project"""
-        if task_id in self.project_subscribers:
-            message = json.dumps({"type": "project_update", "task_id": task_id, "data": data})
-            disconnected = set()
-            for connection in self.project_subscribers[task_id]:
-                try:
-                    await connection.send_text(message)
-                except:
-                    disconnected.add(connection)
-            
-            # Clean up disconnected clients
-            for conn in disconnected:
-                self.project_subscribers[task_id].discard(conn)
+        await self.backend.publish("project_update", data, task_id)
     
     async def broadcast_global(self, data: dict):
         """Send update to all connected clients"""
-        message = json.dumps({"type": "global_update", "data": data})
-        disconnected = set()
-        for connection in self.active_connections:
-            try:
-                await connection.send_text(message)
-            except:
-                disconnected.add(connection)
-        
-        # Clean up disconnected clients
-        for conn in disconnected:
-            self.disconnect(conn)
+        await self.backend.publish("global_update", data)
+    
+    def _deliver(self, type: str, data: dict, task_id: Optional[str], event_id: Optional[int]):
+        """Queue an event from the backend for this process's SSE and WebSocket clients"""
+        event_log.publish(type, data, task_id=task_id, event_id=event_id)
+        message = {"type": type, "data": data}
+        if task_id is None:
+            clients = self.active_connections.values()
+        else:
+            message["task_id"] = task_id
+            clients = self.project_subscribers.get(task_id, ())
+        key = coalesce_key(type, task_id)
+        for client in clients:
+            client.send(message, key)
+    
+    def stats(self) -> dict:
+        clients = self.active_connections.values()
+        return {
+            "backend": type(self.backend).__name__,
+            "clients": len(self.active_connections),
+            "subscribed_projects": len(self.project_subscribers),
+            "queued": sum(len(c.outbox) for c in clients),
+            "dropped": sum(c.outbox.dropped for c in clients),
+            "coalesced": sum(c.outbox.coalesced for c in clients),
+        }
 
 manager = ConnectionManager()
@@ -0,0 +1,303 @@
+"""
+In-process stand-ins for Gemini, the GitHub REST API and the evaluation
+server, with configurable latency and error injection.
+"""
+import asyncio
+import base64
+import hashlib
+import json
+import random
+import re
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+import httpx
+from google.api_core import exceptions as google_exceptions
+
+from app.services.llm_generator import README_MARKER
+
+@dataclass
+class Fault:
+    """Latency (seconds, +/- jitter fraction) and error probability of one fake service"""
+    latency: float = 0.0
+    jitter: float = 0.5
+    error_rate: float = 0.0
+
+    def sample(self) -> float:
+        spread = self.latency * self.jitter
+        return max(0.0, random.uniform(self.latency - spread, self.latency + spread))
+
+    async def delay(self):
+        if self.latency > 0:
+            await asyncio.sleep(self.sample())
+
+    def fails(self) -> bool:
+        return self.error_rate > 0 and random.random() < self.error_rate
+
+# === Gemini ===
+
+class _Response:
+    def __init__(self, text: str):
+        self.text = text
+
+class _Stream:
+    """Async iterator over response chunks, spreading the latency across them"""
+
+    def __init__(self, chunks: List[str], per_chunk: float):
+        self.chunks = chunks
+        self.per_chunk = per_chunk
+
+    def __aiter__(self):
+        return self._iter()
+
+    async def _iter(self):
+        for chunk in self.chunks:
+            await asyncio.sleep(self.per_chunk)
+            yield _Response(chunk)
+
+class FakeGeminiModel:
+    """
+    Drop-in for genai.GenerativeModel as llm_generator uses it: answers the
+    plan, per-file and single-page prompts with canned output of page_bytes.
+    Injected errors are quota errors (429) with a short retry hint.
+    """
+
+    def __init__(self, fault: Fault, page_bytes: int = 8000, chunk_bytes: int = 1024):
+        self.fault = fault
+        self.page_bytes = page_bytes
+        self.chunk_bytes = chunk_bytes
+        self.calls = 0
+        self.errors = 0
+
+    def _text(self, prompt: str) -> str:
+        if "Reply with JSON only" in prompt:
+            return json.dumps({
+                "files": [{"path": p, "purpose": p} for p in ("index.html", "style.css", "app.js", "README.md")],
+                "contract": "#app is the root element",
+            })
+        filler = "<p>" + "lorem ipsum " * (self.page_bytes // 12) + "</p>"
+        page = f"<!DOCTYPE html>\n<html><head><title>bench</title></head><body>{filler}</body></html>"
+        match = re.search(r"Write the complete contents of `([^`]+)`", prompt)
+        if match:
+            path = match.group(1)
+            return page if path == "index.html" else f"/* {path} */\n" + "x" * (self.page_bytes // 4)
+        return f"{page}\n{README_MARKER}\n# Bench app\n\n## Overview\nGenerated by the benchmark.\n"
+
+    async def _start(self):
+        self.calls += 1
+        if self.fault.fails():
+            self.errors += 1
+            await asyncio.sleep(0.05)
+            raise google_exceptions.ResourceExhausted("Quota exceeded, please retry in 1s")
+
+    async def generate_content_async(self, prompt: str, stream: bool = False, **kwargs):
+        await self._start()
+        text = self._text(prompt)
+        if not stream:
+            await self.fault.delay()
+            return _Response(text)
+        chunks = [text[i:i + self.chunk_bytes] for i in range(0, len(text), self.chunk_bytes)]
+        # A fifth of the latency before the first chunk, the rest spread over the stream
+        total = self.fault.sample()
+        await asyncio.sleep(total * 0.2)
+        return _Stream(chunks, total * 0.8 / len(chunks))
+
+    def generate_content(self, prompt: str, **kwargs):
+        self.calls += 1
+        if self.fault.fails():
+            self.errors += 1
+            raise google_exceptions.ResourceExhausted("Quota exceeded, please retry in 1s")
+        time.sleep(self.fault.sample())
+        return _Response(self._text(prompt))
+
+# === GitHub ===
+
+def _sha(data: bytes) -> str:
+    return hashlib.sha1(data).hexdigest()
+
+class _Repo:
+    def __init__(self, owner: str, name: str):
+        self.full_name = f"{owner}/{name}"
+        self.blobs: Dict[str, bytes] = {}
+        self.trees: Dict[str, Dict[str, str]] = {}
+        self.commits: Dict[str, str] = {}
+        self.parents: Dict[str, List[str]] = {}
+        self.refs: Dict[str, str] = {}
+        self.pages = False
+        self.pushed_at = time.monotonic()
+        # auto_init: one commit holding a README
+        readme = self.add_blob(b"# " + name.encode())
+        self.refs["main"] = self.add_commit(self.add_tree({"README.md": readme}))
+
+    def add_blob(self, content: bytes) -> str:
+        sha = _sha(b"blob %d\0" % len(content) + content)
+        self.blobs[sha] = content
+        return sha
+
+    def add_tree(self, entries: Dict[str, str]) -> str:
+        sha = _sha(json.dumps(entries, sort_keys=True).encode())
+        self.trees[sha] = dict(entries)
+        return sha
+
+    def add_commit(self, tree_sha: str, parents: Optional[List[str]] = None) -> str:
+        sha = _sha(f"{tree_sha}{len(self.commits)}{random.random()}".encode())
+        self.commits[sha] = tree_sha
+        self.parents[sha] = list(parents or [])
+        return sha
+
+    def json(self) -> dict:
+        return {
+            "name": self.full_name.split("/", 1)[1],
+            "full_name": self.full_name,
+            "html_url": f"https://github.com/{self.full_name}",
+            "default_branch": "main",
+        }
+
+class FakeGitHub:
+    """
+    The subset of the GitHub REST API that AsyncGitHubClient calls, kept in
+    memory. Sends X-RateLimit headers like the real API. Injected errors
+    are split between 502s and secondary rate limits (403 + Retry-After).
+    """
+
+    def __init__(self, fault: Fault, owner: str, quota: int = 5000, pages_build_seconds: float = 0.0):
+        self.fault = fault
+        self.owner = owner
+        self.pages_build_seconds = pages_build_seconds
+        self.repos: Dict[str, _Repo] = {}
+        self.quota = quota
+        self.remaining = quota
+        self.reset_at = int(time.time()) + 3600
+        self.requests = 0
+        self.errors = 0
+
+    def transport(self) -> httpx.MockTransport:
+        return httpx.MockTransport(self.handle)
+
+    def site_transport(self) -> httpx.MockTransport:
+        """The owner's github.io site: a repo's page is served once its Pages build is done"""
+        def handle(request: httpx.Request) -> httpx.Response:
+            repo = self.repos.get(request.url.path.strip("/").split("/")[0])
+            return httpx.Response(200 if repo and self._pages_built(repo) else 404)
+        return httpx.MockTransport(handle)
+
+    def _pages_built(self, repo: "_Repo") -> bool:
+        return repo.pages and time.monotonic() - repo.pushed_at >= self.pages_build_seconds
+
+    def _reply(self, status: int, body: Optional[dict] = None, headers: Optional[dict] = None) -> httpx.Response:
+        self.remaining = max(0, self.remaining - 1)
+        base = {
+            "x-ratelimit-limit": str(self.quota),
+            "x-ratelimit-remaining": str(self.remaining),
+            "x-ratelimit-reset": str(self.reset_at),
+            "x-ratelimit-resource": "core",
+        }
+        return httpx.Response(status, json=body if body is not None else {}, headers={**base, **(headers or {})})
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        self.requests += 1
+        await self.fault.delay()
+        if self.fault.fails():
+            self.errors += 1
+            if random.random() < 0.5:
+                return self._reply(403, {"message": "You have exceeded a secondary rate limit"}, {"retry-after": "1"})
+            return self._reply(502, {"message": "Server Error"})
+        try:
+            return self._route(request)
+        except KeyError:
+            return self._reply(404, {"message": "Not Found"})
+
+    def _route(self, request: httpx.Request) -> httpx.Response:
+        method, path = request.method, request.url.path
+        body = json.loads(request.content) if request.content else {}
+
+        if method == "POST" and path == "/user/repos":
+            name = body["name"]
+            if name in self.repos:
+                return self._reply(422, {"message": "name already exists on this account"})
+            self.repos[name] = _Repo(self.owner, name)
+            return self._reply(201, self.repos[name].json())
+
+        match = re.match(r"^/repos/[^/]+/([^/]+)(/.*)?$", path)
+        if not match:
+            return self._reply(404, {"message": "Not Found"})
+        repo = self.repos[match.group(1)]
+        rest = match.group(2) or ""
+
+        if method == "GET" and rest == "":
+            return self._reply(200, repo.json())
+        if method == "GET" and rest.startswith("/contents/"):
+            tree = repo.trees[repo.commits[repo.refs["main"]]]
+            sha = tree[rest[len("/contents/"):]]
+            return self._reply(200, {"sha": sha, "content": base64.b64encode(repo.blobs[sha]).decode("ascii")})
+        if method == "PUT" and rest.startswith("/contents/"):
+            tree = dict(repo.trees[repo.commits[repo.refs["main"]]])
+            tree[rest[len("/contents/"):]] = repo.add_blob(base64.b64decode(body["content"]))
+            branch = body.get("branch", "main")
+            tree_sha = repo.add_tree(tree)
+            sha = repo.add_commit(tree_sha, [repo.refs[branch]] if branch in repo.refs else [])
+            repo.refs[branch] = sha
+            repo.pushed_at = time.monotonic()
+            return self._reply(201, {"commit": {"sha": sha, "tree": {"sha": tree_sha}}})
+        if method == "POST" and rest == "/git/blobs":
+            return self._reply(201, {"sha": repo.add_blob(base64.b64decode(body["content"]))})
+        if method == "GET" and rest.startswith("/branches/"):
+            sha = repo.refs[rest[len("/branches/"):]]
+            return self._reply(200, {"commit": {"sha": sha, "commit": {"tree": {"sha": repo.commits[sha]}}}})
+        if method == "GET" and rest.startswith("/git/ref/heads/"):
+            return self._reply(200, {"object": {"sha": repo.refs[rest[len("/git/ref/heads/"):]]}})
+        if method == "GET" and rest.startswith("/git/commits/"):
+            return self._reply(200, {"tree": {"sha": repo.commits[rest[len("/git/commits/"):]]}})
+        if method == "GET" and rest.startswith("/git/trees/"):
+            tree = repo.trees[rest[len("/git/trees/"):]]
+            return self._reply(200, {"tree": [{"path": p, "sha": s, "type": "blob"} for p, s in tree.items()]})
+        if method == "POST" and rest == "/git/trees":
+            tree = dict(repo.trees[body["base_tree"]])
+            for entry in body["tree"]:
+                sha = entry.get("sha") or repo.add_blob(entry["content"].encode("utf-8"))
+                tree[entry["path"]] = sha
+            return self._reply(201, {"sha": repo.add_tree(tree)})
+        if method == "POST" and rest == "/git/commits":
+            return self._reply(201, {"sha": repo.add_commit(body["tree"], body.get("parents"))})
+        if method == "PATCH" and rest.startswith("/git/refs/heads/"):
+            branch = rest[len("/git/refs/heads/"):]
+            if not body.get("force") and repo.refs[branch] not in repo.parents[body["sha"]]:
+                return self._reply(422, {"message": "Update is not a fast forward"})
+            repo.refs[branch] = body["sha"]
+            repo.pushed_at = time.monotonic()
+            return self._reply(200, {"object": {"sha": body["sha"]}})
+        if method == "POST" and rest == "/pages":
+            if repo.pages:
+                return self._reply(409, {"message": "GitHub Pages is already enabled."})
+            repo.pages = True
+            repo.pushed_at = time.monotonic()
+            return self._reply(201, {"url": f"https://{self.owner}.github.io/{repo.full_name.split('/')[1]}/"})
+        if method == "GET" and rest == "/pages/builds/latest":
+            if not repo.pages:
+                return self._reply(404, {"message": "Not Found"})
+            status = "built" if self._pages_built(repo) else "building"
+            return self._reply(200, {"status": status, "commit": repo.refs["main"]})
+        return self._reply(404, {"message": "Not Found"})
+
+# === Evaluation server ===
+
+class FakeEvaluator:
+    """Accepts callbacks (200, or 500 for injected errors) and records when each task was notified"""
+
+    def __init__(self, fault: Fault):
+        self.fault = fault
+        self.notified: Dict[str, float] = {}
+        self.errors = 0
+
+    def transport(self) -> httpx.MockTransport:
+        return httpx.MockTransport(self.handle)
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        await self.fault.delay()
+        if self.fault.fails():
+            self.errors += 1
+            return httpx.Response(500, text="injected failure")
+        payload = json.loads(request.content)
+        self.notified.setdefault(payload["task"], time.monotonic())
+        return httpx.Response(200, json={"status": "ok"})
@@ -0,0 +1,267 @@
+"""
+End-to-end load benchmark for the build pipeline.
+
+Boots the FastAPI app in-process against fakes for Gemini, GitHub and the
+evaluation server (see bench/fakes.py), sends N build requests with a fixed
+client concurrency and waits for every job to finish. Reports the
+acknowledgement latency of the create call (p50/p95/p99), build
+throughput (jobs/minute) and peak RSS.
+
+Run from backend/:
+
+    python -m bench.run --requests 50 --concurrency 10 --gemini-latency 8
+    python -m bench.run --json before.json
+    python -m bench.run --baseline before.json      # compare with an earlier run
+
+Any setting of app.core.config.Settings can be overridden with --set KEY=VALUE
+(e.g. --set JOB_WORKERS=8 --set LLM_RATE_PER_MINUTE=120).
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import resource
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+GITHUB_API = "https://api.github.com"
+EVALUATOR_URL = "http://evaluator.bench/notify"
+SECRET = "bench-secret"
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--requests", type=int, default=50, help="build requests to send")
+    parser.add_argument("--concurrency", type=int, default=10, help="requests in flight at once")
+    parser.add_argument("--endpoint", choices=["v1", "legacy"], default="v1",
+                        help="v1 = /api/v1/builder/create, legacy = /api-endpoint")
+    parser.add_argument("--brief-chars", type=int, default=200,
+                        help="brief length (>= LLM_MULTI_FILE_MIN_BRIEF_CHARS exercises multi-file generation)")
+    parser.add_argument("--page-kb", type=float, default=8, help="size of the generated page")
+    parser.add_argument("--jitter", type=float, default=0.5, help="latency jitter, as a fraction of the latency")
+    parser.add_argument("--gemini-latency", type=float, default=2.0)
+    parser.add_argument("--gemini-error-rate", type=float, default=0.0)
+    parser.add_argument("--github-latency", type=float, default=0.1)
+    parser.add_argument("--github-error-rate", type=float, default=0.0)
+    parser.add_argument("--github-quota", type=int, default=5000)
+    parser.add_argument("--pages-build-seconds", type=float, default=0.0,
+                        help="time from a push until the Pages site serves it")
+    parser.add_argument("--evaluator-latency", type=float, default=0.05)
+    parser.add_argument("--evaluator-error-rate", type=float, default=0.0)
+    parser.add_argument("--timeout", type=float, default=600, help="give up waiting for jobs after this many seconds")
+    parser.add_argument("--set", action="append", default=[], metavar="KEY=VALUE", help="override a setting")
+    parser.add_argument("--json", metavar="PATH", help="write the results as JSON")
+    parser.add_argument("--baseline", metavar="PATH", help="compare with results written by --json")
+    parser.add_argument("--verbose", action="store_true", help="keep the app's own log output")
+    return parser.parse_args(argv)
+
+def configure_environment(args: argparse.Namespace, workdir: str):
+    """Point the app at throwaway storage and fake credentials; must run before importing it"""
+    env = {
+        "DATABASE_URL": f"sqlite:///{workdir}/bench.db",
+        "TEMP_DIR": f"{workdir}/attachments",
+        "LLM_CACHE_DIR": f"{workdir}/llm_cache",
+        "BROADCAST_BACKEND": "memory",
+        "GITHUB_TOKEN": "bench-token",
+        "GITHUB_USERNAME": "bench",
+        "USER_SECRET": SECRET,
+        "GEMINI_API_KEY": "",
+    }
+    for item in args.set:
+        key, _, value = item.partition("=")
+        env[key.strip()] = value
+    os.environ.update(env)
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+def peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+def current_rss_mb() -> Optional[float]:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError):
+        return None
+
+def make_request(args: argparse.Namespace, run_id: str, n: int) -> dict:
+    brief = f"Bench app {n}: " + ("a page that lists items and filters them. " * (args.brief_chars // 40 + 1))
+    return {
+        "email": "bench@example.com",
+        "secret": SECRET,
+        "task": f"bench-{run_id}-{n}",
+        "round": 1,
+        "nonce": f"{run_id}-{n}",
+        "brief": brief[:args.brief_chars],
+        "checks": ["Page has a title", "Items can be filtered"],
+        "evaluation_url": EVALUATOR_URL,
+        "attachments": [],
+    }
+
+async def run(args: argparse.Namespace) -> dict:
+    import httpx
+    from app.main import app
+    from app.core.database import SessionLocal
+    from app.core.http import http_pool
+    from app.core.config import settings
+    from app.models.job import Job, JobStatus
+    from app.models.project import Project, ProjectStatus
+    from app.services import llm_generator
+    from .fakes import Fault, FakeEvaluator, FakeGeminiModel, FakeGitHub
+
+    gemini = FakeGeminiModel(Fault(args.gemini_latency, args.jitter, args.gemini_error_rate),
+                             page_bytes=int(args.page_kb * 1024))
+    github = FakeGitHub(Fault(args.github_latency, args.jitter, args.github_error_rate),
+                        owner=settings.GITHUB_USERNAME, quota=args.github_quota,
+                        pages_build_seconds=args.pages_build_seconds)
+    evaluator = FakeEvaluator(Fault(args.evaluator_latency, args.jitter, args.evaluator_error_rate))
+    llm_generator.model = gemini
+    http_pool.mount(GITHUB_API, github.transport())
+    http_pool.mount(f"https://{settings.GITHUB_USERNAME}.github.io", github.site_transport())
+    http_pool.mount(EVALUATOR_URL, evaluator.transport())
+
+    path = "/api/v1/builder/create" if args.endpoint == "v1" else "/api-endpoint"
+    run_id = str(int(time.time()))
+    tasks = [f"bench-{run_id}-{n}" for n in range(args.requests)]
+    ack_latencies: List[float] = []
+    rejected = 0
+    finished: Dict[str, float] = {}
+    failed = set()
+    rss_samples: List[float] = []
+
+    await app.router.startup()
+    rss_start = current_rss_mb()
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=None)
+    limit = asyncio.Semaphore(max(1, args.concurrency))
+
+    async def send(n: int):
+        nonlocal rejected
+        async with limit:
+            sent = time.perf_counter()
+            r = await client.post(path, json=make_request(args, run_id, n))
+            ack_latencies.append(time.perf_counter() - sent)
+            if r.status_code != 200 or "error" in r.json():
+                rejected += 1
+
+    def poll_finished():
+        # A job is finished once the queue is done with it (retries included)
+        db = SessionLocal()
+        try:
+            rows = db.query(Job.task_id, Project.status).join(Project, Project.task_id == Job.task_id).filter(
+                Job.task_id.in_(tasks),
+                Job.status.in_([JobStatus.DONE, JobStatus.FAILED]),
+            ).all()
+        finally:
+            db.close()
+        now = time.perf_counter()
+        for task_id, status in rows:
+            finished.setdefault(task_id, now)
+            if status != ProjectStatus.COMPLETED:
+                failed.add(task_id)
+
+    started = time.perf_counter()
+    sender = asyncio.gather(*(send(n) for n in range(args.requests)))
+    deadline = started + args.timeout
+    while time.perf_counter() < deadline:
+        await asyncio.sleep(0.2)
+        rss = current_rss_mb()
+        if rss is not None:
+            rss_samples.append(rss)
+        await asyncio.to_thread(poll_finished)
+        if sender.done() and len(finished) + rejected >= args.requests:
+            break
+    await sender
+    elapsed = (max(finished.values()) if finished else time.perf_counter()) - started
+
+    await client.aclose()
+    await app.router.shutdown()
+
+    completed = len(finished) - len(failed)
+    return {
+        "config": {k: v for k, v in vars(args).items() if k not in ("json", "baseline", "verbose")},
+        "requests": args.requests,
+        "accepted": args.requests - rejected,
+        "completed": completed,
+        "failed": len(failed),
+        "unfinished": args.requests - rejected - len(finished),
+        "ack_p50_ms": _ms(percentile(ack_latencies, 50)),
+        "ack_p95_ms": _ms(percentile(ack_latencies, 95)),
+        "ack_p99_ms": _ms(percentile(ack_latencies, 99)),
+        "ack_max_ms": _ms(max(ack_latencies) if ack_latencies else None),
+        "wall_seconds": round(elapsed, 2),
+        "jobs_per_minute": round(completed / elapsed * 60, 2) if elapsed > 0 else None,
+        "rss_start_mb": round(rss_start, 1) if rss_start is not None else None,
+        "rss_peak_sampled_mb": round(max(rss_samples), 1) if rss_samples else None,
+        "rss_peak_mb": round(peak_rss_mb(), 1),
+        "gemini_calls": gemini.calls,
+        "gemini_errors": gemini.errors,
+        "github_requests": github.requests,
+        "github_errors": github.errors,
+        "evaluator_errors": evaluator.errors,
+    }
+
+def _ms(seconds: Optional[float]) -> Optional[float]:
+    return round(seconds * 1000, 1) if seconds is not None else None
+
+# Metrics where a change has a clear direction; the rest are shown for context
+LOWER_IS_BETTER = ("ack_p50_ms", "ack_p95_ms", "ack_p99_ms", "ack_max_ms", "wall_seconds",
+                   "rss_peak_mb", "failed", "unfinished")
+HIGHER_IS_BETTER = ("completed", "jobs_per_minute")
+
+def report(results: dict, baseline: Optional[dict] = None) -> str:
+    keys = [k for k in results if k != "config"]
+    lines = [f"{'metric':<22}{'value':>12}" + (f"{'baseline':>12}{'change':>10}" if baseline else "")]
+    for key in keys:
+        value = results[key]
+        line = f"{key:<22}{_fmt(value):>12}"
+        if baseline is not None:
+            before = baseline.get(key)
+            line += f"{_fmt(before):>12}"
+            if isinstance(value, (int, float)) and isinstance(before, (int, float)) and before:
+                change = (value - before) / before * 100
+                better = (key in LOWER_IS_BETTER and change < 0) or (key in HIGHER_IS_BETTER and change > 0)
+                line += f"{change:>+9.1f}%" + (" ✓" if better and abs(change) >= 1 else "")
+        lines.append(line)
+    return "\n".join(lines)
+
+def _fmt(value) -> str:
+    return "-" if value is None else str(value)
+
+def main(argv=None):
+    args = parse_args(argv)
+    with tempfile.TemporaryDirectory(prefix="tds-bench-") as workdir:
+        configure_environment(args, workdir)
+        print(f"🏁 {args.requests} requests, concurrency {args.concurrency}, endpoint {args.endpoint}")
+        stdout = sys.stdout
+        if not args.verbose:
+            # The app logs every step with print(); keep the report readable
+            sys.stdout = open(os.devnull, "w")
+        try:
+            results = asyncio.run(run(args))
+        finally:
+            if sys.stdout is not stdout:
+                sys.stdout.close()
+                sys.stdout = stdout
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    print(report(results, baseline))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"💾 Results written to {args.json}")
+
+if __name__ == "__main__":
+    main()
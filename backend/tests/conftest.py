@@ -0,0 +1,24 @@
+import os
+import sys
+import tempfile
+
+# The app reads its settings at import time: point it at throwaway storage first
+_workdir = tempfile.mkdtemp(prefix="tds-tests-")
+os.environ.update({
+    "DATABASE_URL": f"sqlite:///{_workdir}/test.db",
+    "TEMP_DIR": f"{_workdir}/attachments",
+    "LLM_CACHE_DIR": f"{_workdir}/llm_cache",
+    "BROADCAST_BACKEND": "memory",
+    "GITHUB_TOKEN": "test-token",
+    "GITHUB_USERNAME": "tester",
+    "USER_SECRET": "test-secret",
+    "GEMINI_API_KEY": "",
+    # No pacing between writes to the (fake) GitHub API
+    "GITHUB_WRITE_INTERVAL": "0",
+})
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.database import init_db  # noqa: E402
+from app.models import change, job, project  # noqa: E402,F401  (registers the tables)
+
+init_db()
@@ -0,0 +1,101 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+from github import GithubException
+
+from app.api.v1.endpoints.builder import _is_retryable, process_request_legacy
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.services import llm_generator, notification_service
+from app.services.github_service import github_client
+
+def test_transient_failures_are_retryable():
+    assert _is_retryable(httpx.ConnectTimeout("timed out"))
+    assert _is_retryable(GithubException(502, {"message": "Server Error"}, {}))
+    assert _is_retryable(GithubException(403, {"message": "You have exceeded a secondary rate limit"}, {}))
+    assert not _is_retryable(GithubException(422, {"message": "Validation Failed"}, {}))
+    assert not _is_retryable(ValueError("bad brief"))
+
+def _request(task_id: str, round_num: int) -> dict:
+    return {
+        "email": "a@b.c", "secret": "test-secret", "task": task_id, "round": round_num,
+        "nonce": f"{task_id}-{round_num}", "brief": "A page", "checks": [],
+        "evaluation_url": "http://evaluator.test/notify", "attachments": [],
+    }
+
+@pytest.fixture
+def fake_services(monkeypatch):
+    """Slow repo creation next to a fake LLM; records when each one ran"""
+    events = {}
+
+    async def create_repo(task_id, description=""):
+        events["repo_started"] = time.perf_counter()
+        await asyncio.sleep(0.3)
+        events["repo_done"] = time.perf_counter()
+        return {"html_url": f"https://github.com/tester/{task_id}", "default_branch": "main"}
+
+    async def generate(*args, **kwargs):
+        events["llm_started"] = time.perf_counter()
+        return {"files": {"index.html": "<h1>hi</h1>", "README.md": "# hi"}}
+
+    async def noop(*args, **kwargs):
+        return None
+
+    monkeypatch.setattr(github_client, "create_repo", create_repo)
+    monkeypatch.setattr(github_client, "get_file_text", noop)
+    monkeypatch.setattr(github_client, "create_blob", noop)
+    monkeypatch.setattr(github_client, "enable_pages", lambda *a, **k: asyncio.sleep(0, True))
+    monkeypatch.setattr(github_client, "publish_files", lambda *a, **k: asyncio.sleep(0, "abc123"))
+    monkeypatch.setattr(llm_generator, "generate_app_code_async", generate)
+    monkeypatch.setattr(notification_service, "notify_evaluation_server_async", noop)
+    monkeypatch.setattr(settings, "PAGES_TRACK_DEPLOYS", False)
+    return events
+
+def _build(data: dict):
+    db = SessionLocal()
+    try:
+        asyncio.run(process_request_legacy(data, db))
+    finally:
+        db.close()
+
+def test_round_one_generation_overlaps_repo_setup(fake_services):
+    _build(_request("overlap", 1))
+    assert fake_services["llm_started"] < fake_services["repo_done"]
+
+def test_round_two_generation_waits_for_the_previous_readme(fake_services):
+    _build(_request("overlap-r2", 2))
+    assert fake_services["llm_started"] >= fake_services["repo_done"]
+
+def test_fallback_index_html_supersedes_the_first_upload(fake_services, monkeypatch):
+    uploads = []
+
+    async def create_blob(task_id, content):
+        uploads.append(content)
+        try:
+            await asyncio.sleep(0.2)
+        except asyncio.CancelledError:
+            uploads.remove(content)
+            raise
+        return f"sha-{len(uploads)}"
+
+    async def generate(*args, on_code_ready=None, **kwargs):
+        # The parallel path finishes index.html, fails, and the fallback streams it again
+        on_code_ready("<h1>parallel</h1>")
+        await asyncio.sleep(0)
+        on_code_ready("<h1>hi</h1>")
+        return {"files": {"index.html": "<h1>hi</h1>", "README.md": "# hi"}}
+
+    published = {}
+
+    async def publish_files(repo_name, files, message, branch="main", blob_shas=None):
+        published.update(blob_shas or {})
+        return "abc123"
+
+    monkeypatch.setattr(github_client, "create_blob", create_blob)
+    monkeypatch.setattr(github_client, "publish_files", publish_files)
+    monkeypatch.setattr(llm_generator, "generate_app_code_async", generate)
+    _build(_request("fallback", 1))
+    assert uploads == ["<h1>hi</h1>"]
+    assert published == {"index.html": "sha-1"}
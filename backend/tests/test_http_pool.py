@@ -0,0 +1,43 @@
+import asyncio
+
+import httpx
+
+from app.core.config import settings
+from app.core.http import HTTPPool
+
+def _ok(request):
+    return httpx.Response(200)
+
+def test_mount_closes_the_replaced_client():
+    async def run():
+        pool = HTTPPool()
+        old = pool.client_for("https://a.example/x")
+        pool.mount("https://a.example", httpx.MockTransport(_ok))
+        new = pool.client_for("https://a.example/y")
+        assert (await new.get("https://a.example/y")).status_code == 200
+        await pool.aclose()
+        return old, new
+
+    old, new = asyncio.run(run())
+    assert old is not new
+    assert old.is_closed
+
+def test_idle_and_excess_origins_are_evicted(monkeypatch):
+    monkeypatch.setattr(settings, "HTTP_MAX_ORIGINS", 2)
+    monkeypatch.setattr(settings, "HTTP_TIMEOUT", 0.0)
+
+    async def run():
+        pool = HTTPPool()
+        first = pool.client_for("https://1.example")
+        await asyncio.sleep(0.01)
+        pool.client_for("https://2.example")
+        await asyncio.sleep(0.01)
+        pool.client_for("https://3.example")
+        await asyncio.sleep(0)  # let the scheduled aclose() run
+        origins = list(pool._async)
+        await pool.aclose()
+        return first, origins
+
+    first, origins = asyncio.run(run())
+    assert origins == ["https://2.example", "https://3.example"]
+    assert first.is_closed
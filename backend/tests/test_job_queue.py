@@ -0,0 +1,88 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import httpx
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.job import Job, JobStatus
+from app.services.job_queue import JobQueue, enqueue_job, retry_delay
+
+def _job(job_id: int) -> Job:
+    db = SessionLocal()
+    try:
+        return db.get(Job, job_id)
+    finally:
+        db.close()
+
+def test_failed_job_is_retried_until_it_succeeds(monkeypatch):
+    monkeypatch.setattr(settings, "JOB_RETRY_BASE_SECONDS", 0.2)
+    calls = []
+
+    async def handler(payload):
+        calls.append((payload["task"], datetime.utcnow()))
+        if len(calls) == 1:
+            raise httpx.ConnectError("connection reset")
+
+    async def run():
+        queue = JobQueue()
+        queue.start(handler, workers=1)
+        db = SessionLocal()
+        try:
+            job_id = enqueue_job(db, "retry-once", {"task": "retry-once"}).id
+        finally:
+            db.close()
+        try:
+            for _ in range(100):
+                job = _job(job_id)
+                if job.status in (JobStatus.DONE, JobStatus.FAILED):
+                    return job
+                await asyncio.sleep(0.05)
+            raise AssertionError("job did not finish")
+        finally:
+            await queue.stop()
+
+    job = asyncio.run(run())
+    assert [task for task, _ in calls] == ["retry-once", "retry-once"]
+    assert calls[1][1] - calls[0][1] >= timedelta(seconds=0.2)
+    assert job.status == JobStatus.DONE
+    assert job.attempts == 2
+    assert job.last_error is None
+
+def test_retry_delay_grows_exponentially_up_to_the_cap(monkeypatch):
+    monkeypatch.setattr(settings, "JOB_RETRY_BASE_SECONDS", 10)
+    monkeypatch.setattr(settings, "JOB_RETRY_MAX_SECONDS", 60)
+    assert [retry_delay(n) for n in (1, 2, 3, 4, 5)] == [10, 20, 40, 60, 60]
+
+def test_requeued_job_is_not_claimed_before_its_backoff():
+    db = SessionLocal()
+    try:
+        job = enqueue_job(db, "backoff", {"task": "backoff"})
+        job.not_before = datetime.utcnow() + timedelta(minutes=5)
+        db.commit()
+        job_id = job.id
+    finally:
+        db.close()
+    queue = JobQueue()
+    claimed = []
+    while (job := queue._claim("tester")) is not None:
+        claimed.append(job[0])
+    assert job_id not in claimed
+
+def test_finished_jobs_are_pruned_after_the_retention_period():
+    old = datetime.utcnow() - timedelta(seconds=settings.JOB_RETENTION_SECONDS + 60)
+    db = SessionLocal()
+    try:
+        jobs = [
+            Job(task_id="prune-done", payload={}, status=JobStatus.DONE, finished_at=old),
+            Job(task_id="prune-failed", payload={}, status=JobStatus.FAILED, finished_at=old),
+            Job(task_id="prune-recent", payload={}, status=JobStatus.DONE, finished_at=datetime.utcnow()),
+            Job(task_id="prune-queued", payload={}, status=JobStatus.QUEUED),
+        ]
+        db.add_all(jobs)
+        db.commit()
+        ids = [job.id for job in jobs]
+    finally:
+        db.close()
+    JobQueue()._prune()
+    assert [_job(job_id) is not None for job_id in ids] == [False, False, True, True]
@@ -0,0 +1,32 @@
+import asyncio
+import json
+
+import pytest
+
+from app.services import llm_generator
+
+def test_parallel_generation_cancels_remaining_files_on_failure(monkeypatch):
+    plan = {"files": [{"path": "index.html"}, {"path": "app.js"}, {"path": "style.css"}, {"path": "README.md"}]}
+    finished = []
+
+    async def fake_generate(prompt, saved, deadline=None, **kwargs):
+        if "generation_config" in kwargs:
+            return json.dumps(plan)
+        if "`app.js`" in prompt:
+            await asyncio.sleep(0.01)
+            raise RuntimeError("quota exhausted")
+        await asyncio.sleep(1)
+        finished.append(prompt)
+        return "content"
+
+    monkeypatch.setattr(llm_generator, "_generate_cached", fake_generate)
+    monkeypatch.setattr(llm_generator.settings, "LLM_PARALLEL_REQUESTS", 4)
+
+    async def run():
+        with pytest.raises(RuntimeError):
+            await llm_generator.generate_app_files_parallel("brief", [], "")
+        # Give any surviving call time to complete
+        await asyncio.sleep(1.2)
+
+    asyncio.run(run())
+    assert finished == []
@@ -0,0 +1,18 @@
+from datetime import datetime
+
+from app.services.pages_tracker import _save_deployed_at
+from test_projects_api import _add_projects, _client
+
+def test_recorded_deploy_changes_the_list_etag():
+    _add_projects("deploy", 1)
+    client = _client()
+    etag = client.get("/projects").headers["etag"]
+    assert client.get("/projects", headers={"If-None-Match": etag}).status_code == 304
+
+    _save_deployed_at("deploy-0", datetime.utcnow())
+
+    r = client.get("/projects", headers={"If-None-Match": etag})
+    assert r.status_code == 200
+    assert r.headers["etag"] != etag
+    deployed = next(p for p in r.json()["projects"] if p["task_id"] == "deploy-0")
+    assert deployed["pages_deployed_at"] is not None
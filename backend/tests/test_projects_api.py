@@ -0,0 +1,48 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.v1.endpoints import projects
+from app.core.database import SessionLocal
+from app.models.project import Project, ProjectStatus
+
+def _client() -> TestClient:
+    app = FastAPI()
+    app.include_router(projects.router, prefix="/projects")
+    return TestClient(app)
+
+def _add_projects(prefix: str, count: int, status=ProjectStatus.COMPLETED):
+    # Inserted within the same second: created_at (server default) ties on SQLite
+    db = SessionLocal()
+    try:
+        for n in range(count):
+            db.add(Project(task_id=f"{prefix}-{n}", email="a@b.c", brief="b", round_num=1,
+                           nonce=f"{prefix}-{n}", evaluation_url="http://e", status=status))
+        db.commit()
+    finally:
+        db.close()
+
+def _walk(client: TestClient, **params) -> list:
+    seen, cursor = [], None
+    for _ in range(50):
+        query = dict(params, **({"cursor": cursor} if cursor else {}))
+        body = client.get("/projects", params=query).json()
+        seen.extend(p["task_id"] for p in body["projects"])
+        cursor = body["next_cursor"]
+        if not cursor:
+            return seen
+    raise AssertionError("pagination did not terminate")
+
+def test_cursor_pagination_visits_every_project_once():
+    _add_projects("page", 7)
+    _add_projects("page-failed", 4, status=ProjectStatus.FAILED)
+    client = _client()
+
+    seen = [t for t in _walk(client, limit=3) if t.startswith("page")]
+    assert len(seen) == len(set(seen)) == 11
+    assert seen[:2] == ["page-failed-3", "page-failed-2"]
+
+    failed = [t for t in _walk(client, limit=3, status="failed") if t.startswith("page")]
+    assert failed == [f"page-failed-{n}" for n in (3, 2, 1, 0)]
+
+def test_invalid_cursor_is_rejected():
+    assert _client().get("/projects", params={"cursor": "bm90LWFuLWlk"}).status_code == 400
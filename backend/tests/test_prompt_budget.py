@@ -0,0 +1,32 @@
+import builtins
+import json
+
+from app.services import prompt_budget
+from app.services.prompt_budget import count_tokens, fit_prompt_inputs
+
+def _attachments(tmp_path):
+    (tmp_path / "data.csv").write_text("id,name\n" + "\n".join(f"{i},item{i}" for i in range(2000)))
+    (tmp_path / "data.json").write_text(json.dumps([{"id": i, "tags": ["a", "b"]} for i in range(500)]))
+    (tmp_path / "notes.md").write_text("note line\n" * 3000)
+    return [
+        {"name": p.name, "path": str(p), "mime": mime, "size": p.stat().st_size}
+        for p, mime in [(tmp_path / "data.csv", "text/csv"),
+                        (tmp_path / "data.json", "application/json"),
+                        (tmp_path / "notes.md", "text/markdown")]
+    ]
+
+def test_each_attachment_is_read_once_per_prompt(tmp_path, monkeypatch):
+    saved = _attachments(tmp_path)
+    opened = []
+
+    def counting_open(path, *args, **kwargs):
+        opened.append(path)
+        return builtins.open(path, *args, **kwargs)
+
+    monkeypatch.setattr(prompt_budget, "open", counting_open, raising=False)
+    for budget in (600, 1200, 20000):
+        opened.clear()
+        inputs = fit_prompt_inputs("brief " * 500, saved, ["check"], "readme " * 2000, budget=budget)
+        assert sorted(opened) == sorted(s["path"] for s in saved)
+        assert sum(inputs.tokens.values()) <= budget - prompt_budget.PROMPT_OVERHEAD_TOKENS
+        assert count_tokens(inputs.attachments_meta) == inputs.tokens["attachments"]
@@ -0,0 +1,37 @@
+import asyncio
+
+from bench.fakes import Fault, FakeGitHub
+from app.core.http import http_pool
+from app.services.github_service import github_client, git_blob_sha
+
+def test_repeat_jobs_reuse_cached_repo_state_and_recover_from_a_stale_head():
+    github = FakeGitHub(Fault(0, 0, 0), owner=github_client.owner)
+
+    async def run():
+        http_pool.mount(github_client.base_url, github.transport())
+        try:
+            await github_client.create_repo("cached")
+            await github_client.publish_files("cached", {"index.html": "<h1>1</h1>", "README.md": "# one"}, "r1")
+
+            # Round 2: repo, README and branch head all come from the cache
+            before = github.requests
+            await github_client.create_repo("cached")
+            assert await github_client.get_file_text("cached", "README.md") == "# one"
+            await github_client.publish_files("cached", {"index.html": "<h1>2</h1>"}, "r2")
+            assert github.requests - before == 3  # tree, commit, ref update
+
+            # Someone else pushes: the cached head is stale and the commit is retried
+            repo = github.repos["cached"]
+            tree = dict(repo.trees[repo.commits[repo.refs["main"]]])
+            tree["other.txt"] = repo.add_blob(b"other")
+            repo.refs["main"] = repo.add_commit(repo.add_tree(tree), [repo.refs["main"]])
+            sha = await github_client.publish_files("cached", {"index.html": "<h1>3</h1>"}, "r3")
+        finally:
+            http_pool.mount(github_client.base_url, None)
+        return repo, sha
+
+    repo, sha = asyncio.run(run())
+    files = repo.trees[repo.commits[repo.refs["main"]]]
+    assert repo.refs["main"] == sha
+    assert files["index.html"] == git_blob_sha("<h1>3</h1>")
+    assert "other.txt" in files
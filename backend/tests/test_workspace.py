@@ -0,0 +1,22 @@
+import os
+import time
+
+from app.services import workspace
+from app.services.workspace import HEARTBEAT_FILE, JobWorkspace, sweep_workspaces
+
+def test_quota_sweep_spares_other_processes_live_workspaces(tmp_path, monkeypatch):
+    ws = JobWorkspace("build", root=tmp_path)
+    ws.create()
+    (ws.path / "data.bin").write_bytes(b"x" * 1024)
+    # As seen from another process: not in this process's active set
+    workspace._active.discard(ws.path)
+    monkeypatch.setattr(workspace, "workspaces_root", lambda: tmp_path)
+
+    sweep_workspaces(max_bytes=0)
+    assert ws.path.exists()
+
+    # The owner died: its heartbeat goes stale and the workspace is reclaimed
+    stale = time.time() - 10 * workspace._heartbeat_window()
+    os.utime(ws.path / HEARTBEAT_FILE, (stale, stale))
+    assert sweep_workspaces(max_bytes=0)["removed"] == 1
+    assert not ws.path.exists()
@@ -0,0 +1,71 @@
+import type { WebSocketMessage } from '@/types'
+import { useQueryClient } from '@tanstack/react-query'
+import { useEffect, useRef, useState } from 'react'
+
+const EVENT_TYPES = ['project_update', 'global_update', 'reset'] as const
+
+// Same API base as the REST calls: the backend may live on another origin in production
+const API_BASE = (import.meta.env.VITE_API_URL || '/api/v1').replace(/\/+$/, '')
+
+// Slow polling while the event stream is down
+const FALLBACK_POLL_MS = 15000
+
+/**
+ * Whether a message changes what the project endpoints return: a global
+ * update, a new status for the project, or a recorded Pages deploy.
+ * Streaming progress events repeat the current status and are skipped;
+ * the detail page shows them from the message itself.
+ */
+function isRecordChange(message: WebSocketMessage, lastStatus: Map<string, string>) {
+  if (message.type !== 'project_update' || !message.task_id) return true
+  const status = message.data?.status
+  if (message.data?.pages_deployed_at) return true
+  if (!status || lastStatus.get(message.task_id) === status) return false
+  lastStatus.set(message.task_id, status)
+  return true
+}
+
+/**
+ * Subscribe to the server's Server-Sent Events stream (all projects, or one
+ * project when taskId is given) and refresh the affected queries when a
+ * project's status changes. EventSource reconnects by itself and resumes
+ * from the last event id. Returns the refetchInterval for the page's queries: false
+ * while the stream is connected, a slow poll while it is not.
+ */
+export function useProjectEvents(taskId?: string, onMessage?: (message: WebSocketMessage) => void) {
+  const queryClient = useQueryClient()
+  const onMessageRef = useRef(onMessage)
+  onMessageRef.current = onMessage
+  const [connected, setConnected] = useState(true)
+
+  useEffect(() => {
+    const url = taskId ? `${API_BASE}/events/${encodeURIComponent(taskId)}` : `${API_BASE}/events`
+    const source = new EventSource(url)
+    const lastStatus = new Map<string, string>()
+
+    const handle = (event: MessageEvent) => {
+      const message: WebSocketMessage = event.type === 'reset'
+        ? { type: 'global_update' }
+        : JSON.parse(event.data)
+
+      if (isRecordChange(message, lastStatus)) {
+        queryClient.invalidateQueries({ queryKey: ['project-stats'] })
+        queryClient.invalidateQueries({ queryKey: ['recent-projects'] })
+        queryClient.invalidateQueries({ queryKey: ['projects'] })
+        if (message.task_id) {
+          queryClient.invalidateQueries({ queryKey: ['project', message.task_id] })
+        } else {
+          queryClient.invalidateQueries({ queryKey: ['project'] })
+        }
+      }
+      onMessageRef.current?.(message)
+    }
+
+    EVENT_TYPES.forEach((type) => source.addEventListener(type, handle))
+    source.onopen = () => setConnected(true)
+    source.onerror = () => setConnected(false)
+    return () => source.close()
+  }, [taskId, queryClient])
+
+  return connected ? false : FALLBACK_POLL_MS
+}
@@ -1,6 +1,7 @@
 import { Badge } from '@/components/ui/Badge'
 import { Button } from '@/components/ui/Button'
 import { Card, CardContent, CardDescription, CardHeader, CardTitle } from '@/components/ui/Card'
+import { useProjectEvents } from '@/hooks/useProjectEvents'
 import { projectsApi } from '@/lib/api'
 import { formatRelativeTime } from '@/lib/utils'
 import { useQuery } from '@tanstack/react-query'
@@ -9,17 +10,18 @@ import { useNavigate } from 'react-router-dom'
 
 export default function Dashboard() {
   const navigate = useNavigate()
+  const refetchInterval = useProjectEvents()
 
   const { data: stats, isLoading: statsLoading } = useQuery({
     queryKey: ['project-stats'],
     queryFn: projectsApi.getStats,
-    refetchInterval: 5000,
+    refetchInterval,
   })
 
   const { data: recentProjects, isLoading: projectsLoading } = useQuery({
     queryKey: ['recent-projects'],
     queryFn: () => projectsApi.getProjects({ limit: 5 }),
-    refetchInterval: 5000,
+    refetchInterval,
   })
 
   const statCards = [
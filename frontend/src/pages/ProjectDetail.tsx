@@ -1,12 +1,12 @@
 import { Badge } from '@/components/ui/Badge'
 import { Button } from '@/components/ui/Button'
 import { Card, CardContent, CardDescription, CardHeader, CardTitle } from '@/components/ui/Card'
+import { useProjectEvents } from '@/hooks/useProjectEvents'
 import { projectsApi } from '@/lib/api'
 import { formatDate } from '@/lib/utils'
-import { wsClient } from '@/lib/websocket'
 import { useQuery } from '@tanstack/react-query'
 import { AlertCircle, ArrowLeft, Calendar, ExternalLink, Github, Hash, Loader2, Mail } from 'lucide-react'
-import { useEffect, useState } from 'react'
+import { useState } from 'react'
 import { useNavigate, useParams } from 'react-router-dom'
 
 export default function ProjectDetail() {
@@ -14,23 +14,17 @@ export default function ProjectDetail() {
   const navigate = useNavigate()
   const [liveStatus, setLiveStatus] = useState<any>(null)
 
-  const { data: project, isLoading, refetch } = useQuery({
+  const refetchInterval = useProjectEvents(taskId, (message) => {
+    if (message.type === 'project_update') setLiveStatus(message.data)
+  })
+
+  const { data: project, isLoading } = useQuery({
     queryKey: ['project', taskId],
     queryFn: () => projectsApi.getProject(taskId!),
     enabled: !!taskId,
+    refetchInterval,
   })
 
-  useEffect(() => {
-    if (!taskId) return
-
-    const unsubscribe = wsClient.subscribe(`project:${taskId}`, (data) => {
-      setLiveStatus(data)
-      refetch()
-    })
-
-    return unsubscribe
-  }, [taskId, refetch])
-
   const getStatusBadge = (status: string) => {
     const variants: Record<string, any> = {
       completed: 'success',
@@ -148,6 +142,16 @@ export default function ProjectDetail() {
               </div>
             )}
 
+            {project.pages_deployed_at && (
+              <div className="flex items-start gap-3">
+                <Calendar className="h-5 w-5 text-muted-foreground mt-0.5" />
+                <div className="flex-1">
+                  <p className="text-sm font-medium">Site live</p>
+                  <p className="text-sm text-muted-foreground">{formatDate(project.pages_deployed_at)}</p>
+                </div>
+              </div>
+            )}
+
             <div className="pt-2 border-t">
               <p className="text-sm font-medium mb-1">Round</p>
               <Badge>{project.round_num}</Badge>
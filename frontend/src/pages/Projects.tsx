@@ -2,6 +2,7 @@ import { Badge } from '@/components/ui/Badge'
 import { Button } from '@/components/ui/Button'
 import { Card, CardContent, CardHeader, CardTitle } from '@/components/ui/Card'
 import { Input } from '@/components/ui/Input'
+import { useProjectEvents } from '@/hooks/useProjectEvents'
 import { projectsApi } from '@/lib/api'
 import { formatRelativeTime } from '@/lib/utils'
 import type { ProjectStatus } from '@/types'
@@ -14,13 +15,14 @@ export default function Projects() {
   const navigate = useNavigate()
   const [statusFilter, setStatusFilter] = useState<ProjectStatus | 'all'>('all')
   const [searchQuery, setSearchQuery] = useState('')
+  const refetchInterval = useProjectEvents()
 
   const { data, isLoading } = useQuery({
     queryKey: ['projects', statusFilter],
     queryFn: () => projectsApi.getProjects({
       status: statusFilter === 'all' ? undefined : statusFilter
     }),
-    refetchInterval: 5000,
+    refetchInterval,
   })
 
   const getStatusBadge = (status: string) => {
@@ -13,7 +13,9 @@ export interface Project {
   created_at: string
   updated_at?: string
   completed_at?: string
+  pages_deployed_at?: string
   error_message?: string
+  stage_timings?: Record<string, number>
 }
 
 export interface ProjectStats {